@@ -0,0 +1,366 @@
+"""MongoDB index bootstrap and migration manager for FundFlow.
+
+Indexes are declared as numbered versions. Each version is applied once, in
+order, and the highest applied version is recorded in the ``settings``
+collection (``{"key": "index_version"}``). A version may also carry a data
+backfill, run after its indexes are built and before it is recorded, so it
+runs once per database rather than on every start. The server applies pending
+versions on startup when AUTO_APPLY_INDEXES is set; the same steps can be run
+by hand:
+
+    python db_indexes.py apply     # create any pending indexes
+    python db_indexes.py status    # show applied / latest version
+    python db_indexes.py explain   # assert hot queries use an IXSCAN
+"""
+import argparse
+import asyncio
+import logging
+import os
+import re
+import unicodedata
+from datetime import datetime, timezone
+from pathlib import Path
+
+from pymongo import ASCENDING, DESCENDING, TEXT, IndexModel, UpdateOne
+
+logger = logging.getLogger(__name__)
+
+INDEX_VERSION_KEY = "index_version"
+
+# How long processed webhook events are kept (seconds) before the TTL index deletes them.
+# Read when index version 12 is built; changing it later needs a collMod on the index.
+WEBHOOK_EVENT_RETENTION = int(os.environ.get('WEBHOOK_EVENT_RETENTION', str(7 * 86400)))
+
+# Version -> {collection name: [IndexModel, ...]}
+INDEX_MIGRATIONS = {
+    1: {
+        "users": [
+            IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+            IndexModel([("email", ASCENDING)], name="email_unique", unique=True),
+        ],
+        "collections": [
+            IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+            IndexModel(
+                [("status", ASCENDING), ("visibility", ASCENDING), ("category", ASCENDING), ("created_at", DESCENDING)],
+                name="status_visibility_category_created"
+            ),
+            IndexModel(
+                [("status", ASCENDING), ("visibility", ASCENDING), ("created_at", DESCENDING)],
+                name="status_visibility_created"
+            ),
+            IndexModel([("status", ASCENDING), ("created_at", DESCENDING)], name="status_created"),
+            IndexModel([("user_id", ASCENDING), ("created_at", DESCENDING)], name="user_created"),
+            IndexModel([("virtual_account.id", ASCENDING)], name="virtual_account_id", sparse=True),
+        ],
+        "donations": [
+            IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+            IndexModel([("order_id", ASCENDING)], name="order_id_unique", unique=True),
+            IndexModel(
+                [("razorpay_order_id", ASCENDING)],
+                name="razorpay_order_id_unique",
+                unique=True,
+                partialFilterExpression={"razorpay_order_id": {"$type": "string"}}
+            ),
+            IndexModel([("razorpay_payment_id", ASCENDING)], name="razorpay_payment_id", sparse=True),
+            IndexModel(
+                [("collection_id", ASCENDING), ("status", ASCENDING), ("created_at", DESCENDING)],
+                name="collection_status_created"
+            ),
+            IndexModel([("status", ASCENDING), ("created_at", ASCENDING)], name="status_created"),
+        ],
+        "withdrawals": [
+            IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+            IndexModel([("user_id", ASCENDING), ("created_at", DESCENDING)], name="user_created"),
+            IndexModel([("status", ASCENDING), ("created_at", DESCENDING)], name="status_created"),
+        ],
+        "kyc": [
+            IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+            IndexModel([("user_id", ASCENDING)], name="user_id_unique", unique=True),
+            IndexModel([("status", ASCENDING), ("created_at", DESCENDING)], name="status_created"),
+        ],
+        "settings": [
+            IndexModel([("key", ASCENDING)], name="key_unique", unique=True),
+        ],
+    },
+    2: {
+        # Keyset pagination sorts on (created_at, id); include id so the sort is index-backed
+        "collections": [
+            IndexModel(
+                [("status", ASCENDING), ("visibility", ASCENDING), ("category", ASCENDING),
+                 ("created_at", DESCENDING), ("id", DESCENDING)],
+                name="status_visibility_category_created_id"
+            ),
+            IndexModel(
+                [("status", ASCENDING), ("visibility", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)],
+                name="status_visibility_created_id"
+            ),
+            IndexModel([("user_id", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)], name="user_created_id"),
+        ],
+        "donations": [
+            IndexModel(
+                [("collection_id", ASCENDING), ("status", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)],
+                name="collection_status_created_id"
+            ),
+        ],
+    },
+    3: {
+        "webhook_events": [
+            IndexModel([("event_id", ASCENDING)], name="event_id_unique", unique=True),
+            IndexModel([("status", ASCENDING), ("next_attempt_at", ASCENDING)], name="status_next_attempt"),
+        ],
+    },
+    4: {
+        "collection_counter_shards": [
+            IndexModel([("collection_id", ASCENDING), ("shard", ASCENDING)], name="collection_shard_unique", unique=True),
+        ],
+    },
+    5: {
+        # Live collection streams pick up donations captured by other processes by updated_at
+        "donations": [
+            IndexModel(
+                [("collection_id", ASCENDING), ("status", ASCENDING), ("updated_at", ASCENDING)],
+                name="collection_status_updated"
+            ),
+        ],
+    },
+    6: {
+        "payout_beneficiaries": [
+            IndexModel([("user_id", ASCENDING), ("fingerprint", ASCENDING)], name="user_fingerprint_unique", unique=True),
+        ],
+    },
+    7: {
+        "withdrawals": [
+            IndexModel([("claim_id", ASCENDING)], name="claim_id", sparse=True),
+        ],
+        "withdrawal_jobs": [
+            IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        ],
+    },
+    8: {
+        # Payout reconciler: match listed payouts, and find the oldest PROCESSING withdrawal
+        "withdrawals": [
+            IndexModel([("razorpay_payout_id", ASCENDING)], name="razorpay_payout_id", sparse=True),
+            IndexModel([("status", ASCENDING), ("approved_at", ASCENDING)], name="status_approved"),
+        ],
+    },
+    9: {
+        "donations_archive": [
+            IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+            IndexModel([("order_id", ASCENDING)], name="order_id"),
+        ],
+    },
+    10: {
+        # Collection search. The text index is prefixed by the ACTIVE/PUBLIC equality filter so a
+        # search only walks public entries; title_normalized backs anchored-regex autocomplete.
+        "collections": [
+            IndexModel(
+                [("status", ASCENDING), ("visibility", ASCENDING),
+                 ("title", TEXT), ("organizer_name", TEXT), ("description", TEXT)],
+                name="status_visibility_text",
+                weights={"title": 10, "organizer_name": 5, "description": 1}
+            ),
+            IndexModel(
+                [("status", ASCENDING), ("visibility", ASCENDING), ("title_normalized", ASCENDING), ("id", ASCENDING)],
+                name="status_visibility_title_prefix"
+            ),
+        ],
+    },
+    11: {
+        # Recorded donations still waiting for their collection credit (only a handful at a time)
+        "donations": [
+            IndexModel(
+                [("credited", ASCENDING), ("updated_at", ASCENDING)],
+                name="credit_pending",
+                partialFilterExpression={"credited": False}
+            ),
+        ],
+    },
+    12: {
+        # Processed webhook events expire; pending and dead-lettered ones are kept
+        "webhook_events": [
+            IndexModel(
+                [("processed_at", ASCENDING)],
+                name="done_processed_ttl",
+                expireAfterSeconds=WEBHOOK_EVENT_RETENTION,
+                partialFilterExpression={"status": "done"}
+            ),
+        ],
+    },
+}
+
+# Version -> {collection name: [index name, ...]} superseded by that version
+INDEX_DROPS = {
+    2: {
+        "collections": ["status_visibility_category_created", "status_visibility_created", "user_created"],
+        "donations": ["collection_status_created"],
+    },
+}
+
+LATEST_INDEX_VERSION = max(INDEX_MIGRATIONS)
+
+
+def normalize_search_text(text: str) -> str:
+    """Lowercase, strip accents and punctuation, and collapse whitespace (used for title prefix search)"""
+    text = unicodedata.normalize("NFKD", text or "")
+    text = "".join(ch for ch in text if not unicodedata.combining(ch)).lower()
+    return " ".join(re.sub(r"[^\w]+", " ", text).split())
+
+
+async def backfill_title_normalized(db, batch_size: int = 1000) -> int:
+    """Set title_normalized on collections created before prefix search existed.
+    
+    Walks the collection once in _id order, one batch at a time, so it never rescans
+    documents it has already handled.
+    """
+    updated = 0
+    last_id = None
+    while True:
+        query = {"title_normalized": {"$exists": False}}
+        if last_id is not None:
+            query["_id"] = {"$gt": last_id}
+        docs = await db.collections.find(query, {"_id": 1, "title": 1}) \
+            .sort("_id", ASCENDING).limit(batch_size).to_list(length=batch_size)
+        if not docs:
+            return updated
+        await db.collections.bulk_write([
+            UpdateOne(
+                {"_id": d["_id"], "title_normalized": {"$exists": False}},
+                {"$set": {"title_normalized": normalize_search_text(d.get("title", ""))}}
+            )
+            for d in docs
+        ], ordered=False)
+        updated += len(docs)
+        last_id = docs[-1]["_id"]
+
+
+# Version -> data backfill run once, after that version's indexes exist
+INDEX_BACKFILLS = {
+    10: backfill_title_normalized,
+}
+
+# Hot queries that must be served by an index: (collection, filter, sort)
+REGISTERED_QUERIES = [
+    ("users", {"email": "probe@example.com"}, None),
+    ("users", {"id": "probe"}, None),
+    ("collections", {"id": "probe"}, None),
+    ("collections", {"status": "active", "visibility": "public"}, [("created_at", DESCENDING), ("id", DESCENDING)]),
+    ("collections", {"status": "active", "visibility": "public", "category": "medical"},
+     [("created_at", DESCENDING), ("id", DESCENDING)]),
+    ("collections", {"user_id": "probe"}, [("created_at", DESCENDING), ("id", DESCENDING)]),
+    ("collections", {"virtual_account.id": "probe"}, None),
+    ("collections", {"status": "pending_approval"}, [("created_at", DESCENDING)]),
+    ("donations", {"order_id": "probe"}, None),
+    ("donations", {"razorpay_order_id": "probe"}, None),
+    ("donations", {"razorpay_payment_id": "probe"}, None),
+    ("donations", {"status": "pending", "created_at": {"$lt": "probe"}}, [("created_at", ASCENDING)]),
+    ("donations", {"collection_id": "probe", "status": "success"}, [("created_at", DESCENDING), ("id", DESCENDING)]),
+    ("withdrawals", {"id": "probe"}, None),
+    ("withdrawals", {"user_id": "probe"}, [("created_at", DESCENDING)]),
+    ("kyc", {"user_id": "probe"}, None),
+    ("settings", {"key": "platform"}, None),
+    ("donations", {"collection_id": "probe", "status": "success", "updated_at": {"$gt": ""}}, [("updated_at", ASCENDING)]),
+    ("withdrawals", {"claim_id": "probe"}, None),
+    ("withdrawals", {"razorpay_payout_id": {"$in": ["probe"]}}, None),
+    ("withdrawals", {"status": "processing"}, [("approved_at", ASCENDING)]),
+    ("withdrawal_jobs", {"id": "probe"}, None),
+    ("payout_beneficiaries", {"user_id": "probe", "fingerprint": "probe"}, None),
+    ("collection_counter_shards", {"collection_id": {"$in": ["probe"]}}, None),
+    ("collections", {"status": "active", "visibility": "public", "$text": {"$search": "probe"}}, None),
+    ("collections", {"status": "active", "visibility": "public", "title_normalized": {"$regex": "^probe"}},
+     [("title_normalized", ASCENDING), ("id", ASCENDING)]),
+    ("donations", {"credited": False, "updated_at": {"$lt": "probe"}}, None),
+]
+
+
+async def get_applied_index_version(db) -> int:
+    """Return the highest index version recorded in the database (0 if none)"""
+    doc = await db.settings.find_one({"key": INDEX_VERSION_KEY}, {"_id": 0})
+    return doc.get("version", 0) if doc else 0
+
+
+async def apply_index_migrations(db, target_version: int = LATEST_INDEX_VERSION) -> int:
+    """Create the indexes for every version above the applied one, up to target_version"""
+    applied = await get_applied_index_version(db)
+    for version in sorted(v for v in INDEX_MIGRATIONS if applied < v <= target_version):
+        for collection_name, indexes in INDEX_MIGRATIONS[version].items():
+            await db[collection_name].create_indexes(indexes)
+        for collection_name, index_names in INDEX_DROPS.get(version, {}).items():
+            existing = await db[collection_name].index_information()
+            for index_name in index_names:
+                if index_name in existing:
+                    await db[collection_name].drop_index(index_name)
+        if version in INDEX_BACKFILLS:
+            updated = await INDEX_BACKFILLS[version](db)
+            logger.info(f"Backfilled {updated} documents for index version {version}")
+        await db.settings.update_one(
+            {"key": INDEX_VERSION_KEY},
+            {"$set": {"version": version, "applied_at": datetime.now(timezone.utc).isoformat()}},
+            upsert=True
+        )
+        applied = version
+        logger.info(f"Applied index version {version}")
+    return applied
+
+
+def _plan_stages(plan: dict) -> list:
+    """Flatten the stage names of an explain() winning plan"""
+    if not isinstance(plan, dict):
+        return []
+    stages = [plan["stage"]] if "stage" in plan else []
+    for key in ("inputStage", "queryPlan"):
+        stages += _plan_stages(plan.get(key))
+    for child in plan.get("inputStages", []):
+        stages += _plan_stages(child)
+    return stages
+
+
+async def explain_registered_queries(db) -> list:
+    """Run explain() for each registered query and report whether it is index-backed"""
+    results = []
+    for collection_name, query, sort in REGISTERED_QUERIES:
+        cursor = db[collection_name].find(query)
+        if sort:
+            cursor = cursor.sort(sort)
+        explain = await cursor.explain()
+        stages = _plan_stages(explain.get("queryPlanner", {}).get("winningPlan", {}))
+        # EOF means the collection does not exist yet, so there is nothing to scan
+        missing = stages == ["EOF"]
+        results.append({
+            "collection": collection_name,
+            "query": query,
+            "sort": sort,
+            "stages": stages,
+            "ok": missing or ("COLLSCAN" not in stages and any(s in ("IXSCAN", "IDHACK", "EXPRESS_IXSCAN") for s in stages))
+        })
+    return results
+
+
+async def _main(command: str):
+    from dotenv import load_dotenv
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    load_dotenv(Path(__file__).parent / '.env')
+    client = AsyncIOMotorClient(os.environ['MONGO_URL'])
+    db = client[os.environ['DB_NAME']]
+    try:
+        if command == "apply":
+            version = await apply_index_migrations(db)
+            print(f"Index version {version} (latest {LATEST_INDEX_VERSION})")
+        elif command == "status":
+            version = await get_applied_index_version(db)
+            print(f"Index version {version} (latest {LATEST_INDEX_VERSION})")
+        elif command == "explain":
+            results = await explain_registered_queries(db)
+            for r in results:
+                print(f"{'OK  ' if r['ok'] else 'FAIL'} {r['collection']} {r['query']} sort={r['sort']} -> {r['stages']}")
+            if not all(r["ok"] for r in results):
+                raise SystemExit(1)
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="FundFlow MongoDB index manager")
+    parser.add_argument("command", choices=["apply", "status", "explain"])
+    asyncio.run(_main(parser.parse_args().command))
@@ -1,38 +1,56 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Request, Query, Depends
+from fastapi import FastAPI, APIRouter, HTTPException, Request, Response, Query, Depends
+from fastapi.responses import StreamingResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError, ExecutionTimeout, OperationFailure
 import os
 import logging
 from pathlib import Path
-from pydantic import BaseModel, Field, ConfigDict, EmailStr
+from pydantic import BaseModel, Field, ConfigDict, EmailStr, TypeAdapter
 from typing import List, Optional, Dict
 import uuid
 from datetime import datetime, timezone, timedelta
 from enum import Enum
 import hashlib
+import random
+import re
 import hmac
 import base64
 import json
+import time
+import asyncio
+import socket
+from concurrent.futures import ThreadPoolExecutor
+from collections import OrderedDict
 import aiohttp
+from contextlib import asynccontextmanager
 from jose import JWTError, jwt
 from passlib.context import CryptContext
-import razorpay
+from db_indexes import apply_index_migrations, normalize_search_text
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
-# MongoDB connection
-mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
-db = client[os.environ['DB_NAME']]
+# MongoDB connection (opened per process in lifespan, see connect_mongo)
+MONGO_URL = os.environ['MONGO_URL']
+DB_NAME = os.environ['DB_NAME']
+MONGO_MAX_POOL_SIZE = int(os.environ.get('MONGO_MAX_POOL_SIZE', '100'))
+MONGO_MIN_POOL_SIZE = int(os.environ.get('MONGO_MIN_POOL_SIZE', '0'))
+client = None
+db = None
+
+# Server processes (python server.py); each worker builds its own app via create_app()
+WEB_CONCURRENCY = int(os.environ.get('WEB_CONCURRENCY', str(os.cpu_count() or 1)))
+HOST = os.environ.get('HOST', '0.0.0.0')
+PORT = int(os.environ.get('PORT', '8001'))
 
 # Razorpay configuration (for payment collection)
 RAZORPAY_KEY_ID = os.environ.get('RAZORPAY_KEY_ID')
 RAZORPAY_KEY_SECRET = os.environ.get('RAZORPAY_KEY_SECRET')
 RAZORPAY_WEBHOOK_SECRET = os.environ.get('RAZORPAY_WEBHOOK_SECRET', '')
-razorpay_client = razorpay.Client(auth=(RAZORPAY_KEY_ID, RAZORPAY_KEY_SECRET))
 
 # Razorpay API base URL
 RAZORPAY_API_URL = "https://api.razorpay.com/v1"
@@ -40,6 +58,14 @@ RAZORPAY_API_URL = "https://api.razorpay.com/v1"
 # RazorpayX Payout Account Number (your business account)
 RAZORPAYX_ACCOUNT_NUMBER = os.environ.get('RAZORPAYX_ACCOUNT_NUMBER', '')
 
+# Shared Razorpay HTTP client pool
+RAZORPAY_HTTP_POOL_SIZE = int(os.environ.get('RAZORPAY_HTTP_POOL_SIZE', '20'))
+RAZORPAY_HTTP_TIMEOUT = float(os.environ.get('RAZORPAY_HTTP_TIMEOUT', '30'))
+RAZORPAY_HTTP_KEEPALIVE = float(os.environ.get('RAZORPAY_HTTP_KEEPALIVE', '60'))
+
+# Apply pending MongoDB index migrations on startup (see db_indexes.py)
+AUTO_APPLY_INDEXES = os.environ.get('AUTO_APPLY_INDEXES', 'true').lower() == 'true'
+
 # Admin credentials (for demo - in production use proper auth)
 ADMIN_EMAIL = os.environ.get('ADMIN_EMAIL', 'admin@fundflow.com')
 ADMIN_PASSWORD = os.environ.get('ADMIN_PASSWORD', 'admin123')
@@ -49,15 +75,102 @@ SECRET_KEY = os.environ.get('JWT_SECRET_KEY', 'fundflow-secret-key-change-in-pro
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24 * 7  # 7 days
 
-# Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Interval for rebuilding the materialized dashboard counters from source collections
+COUNTERS_RECONCILE_INTERVAL = float(os.environ.get('COUNTERS_RECONCILE_INTERVAL', '900'))
+
+# Public /stats responses are served from memory for this many seconds
+STATS_CACHE_TTL = float(os.environ.get('STATS_CACHE_TTL', '10'))
+
+# Gateway status lookups (orders, payouts): concurrent lookups of one object share a single
+# upstream call; results are reused briefly while pending and longer once final
+GATEWAY_LOOKUP_TTL_PENDING = float(os.environ.get('GATEWAY_LOOKUP_TTL_PENDING', '2'))
+GATEWAY_LOOKUP_TTL_FINAL = float(os.environ.get('GATEWAY_LOOKUP_TTL_FINAL', '60'))
+GATEWAY_LOOKUP_CACHE_SIZE = int(os.environ.get('GATEWAY_LOOKUP_CACHE_SIZE', '10000'))
+
+# Public collection listing response cache
+LISTING_CACHE_TTL = float(os.environ.get('LISTING_CACHE_TTL', '30'))
+LISTING_CACHE_SIZE = int(os.environ.get('LISTING_CACHE_SIZE', '2000'))
+
+# Collection search: LRU of popular query pages, and a per-query time budget
+SEARCH_CACHE_TTL = float(os.environ.get('SEARCH_CACHE_TTL', '30'))
+SEARCH_CACHE_SIZE = int(os.environ.get('SEARCH_CACHE_SIZE', '500'))
+SEARCH_MAX_TIME_MS = int(os.environ.get('SEARCH_MAX_TIME_MS', '200'))
+
+# Webhook inbox workers (events are acked on receipt and processed in the background)
+WEBHOOK_WORKERS = int(os.environ.get('WEBHOOK_WORKERS', '4'))
+WEBHOOK_MAX_ATTEMPTS = int(os.environ.get('WEBHOOK_MAX_ATTEMPTS', '8'))
+WEBHOOK_LOCK_TIMEOUT = float(os.environ.get('WEBHOOK_LOCK_TIMEOUT', '300'))
+WEBHOOK_POLL_INTERVAL = float(os.environ.get('WEBHOOK_POLL_INTERVAL', '2'))
+
+# Donation capture: "auto" wraps the status transition and collection credit in a
+# transaction when the deployment supports it (replica set / mongos), "off" never does
+DONATION_CAPTURE_TRANSACTIONS = os.environ.get('DONATION_CAPTURE_TRANSACTIONS', 'auto').lower()
+
+# Payment status push: how long an events stream stays open, the keepalive interval, and
+# the gateway fallback poll (starting interval, doubled up to the max)
+PAYMENT_EVENTS_TIMEOUT = float(os.environ.get('PAYMENT_EVENTS_TIMEOUT', '120'))
+PAYMENT_EVENTS_HEARTBEAT = float(os.environ.get('PAYMENT_EVENTS_HEARTBEAT', '15'))
+PAYMENT_EVENTS_GATEWAY_POLL = float(os.environ.get('PAYMENT_EVENTS_GATEWAY_POLL', '5'))
+PAYMENT_EVENTS_GATEWAY_POLL_MAX = float(os.environ.get('PAYMENT_EVENTS_GATEWAY_POLL_MAX', '60'))
+
+# Live collection progress streams: per-subscriber buffer, and how often each process
+# checks for donations captured by other processes (0 disables the check)
+LIVE_EVENTS_QUEUE_SIZE = int(os.environ.get('LIVE_EVENTS_QUEUE_SIZE', '100'))
+LIVE_EVENTS_POLL_INTERVAL = float(os.environ.get('LIVE_EVENTS_POLL_INTERVAL', '5'))
+
+# Withdrawal payouts: concurrent RazorpayX payout chains and payout starts per second
+# (per process), and how long a claimed withdrawal stays locked if its job dies
+PAYOUT_CONCURRENCY = int(os.environ.get('PAYOUT_CONCURRENCY', '5'))
+PAYOUT_RATE_LIMIT = float(os.environ.get('PAYOUT_RATE_LIMIT', '10'))
+WITHDRAWAL_CLAIM_TIMEOUT = float(os.environ.get('WITHDRAWAL_CLAIM_TIMEOUT', '600'))
+
+# Payout reconciler: how often PROCESSING withdrawals are checked against RazorpayX's payout
+# list (0 disables), and the most pages of 100 payouts one run may read
+PAYOUT_RECONCILE_INTERVAL = float(os.environ.get('PAYOUT_RECONCILE_INTERVAL', '300'))
+PAYOUT_RECONCILE_MAX_PAGES = int(os.environ.get('PAYOUT_RECONCILE_MAX_PAGES', '50'))
+# The window is listed in slices of this many seconds, oldest first, because RazorpayX
+# returns newest first and the page cap must not starve the oldest payouts
+PAYOUT_RECONCILE_SLICE = int(os.environ.get('PAYOUT_RECONCILE_SLICE', '3600'))
+
+# Stale donation sweeper: PENDING donations older than DONATION_PENDING_CHECK_AFTER are checked
+# against Razorpay (paid -> captured, unpaid past DONATION_ABANDON_AFTER -> FAILED), and FAILED
+# donations older than DONATION_ARCHIVE_AFTER move to donations_archive. Recorded Smart Collect
+# donations whose collection credit was interrupted are credited too. Ages in seconds.
+DONATION_SWEEP_INTERVAL = float(os.environ.get('DONATION_SWEEP_INTERVAL', '600'))
+DONATION_SWEEP_BATCH = int(os.environ.get('DONATION_SWEEP_BATCH', '500'))
+DONATION_SWEEP_CONCURRENCY = int(os.environ.get('DONATION_SWEEP_CONCURRENCY', '5'))
+DONATION_PENDING_CHECK_AFTER = float(os.environ.get('DONATION_PENDING_CHECK_AFTER', '1800'))
+DONATION_ABANDON_AFTER = float(os.environ.get('DONATION_ABANDON_AFTER', '86400'))
+DONATION_ARCHIVE_AFTER = float(os.environ.get('DONATION_ARCHIVE_AFTER', str(7 * 86400)))
+
+# Platform settings are kept in memory and refreshed from a change stream on db.settings;
+# without a replica set each process polls the settings document at this interval instead
+SETTINGS_POLL_INTERVAL = float(os.environ.get('SETTINGS_POLL_INTERVAL', '1'))
+
+# Sharded collection counters: a collection receiving more than COUNTER_SHARD_THRESHOLD
+# donations per second (over COUNTER_SHARD_WINDOW seconds) spreads its $inc over N shards
+COUNTER_SHARDS = int(os.environ.get('COUNTER_SHARDS', '8'))
+COUNTER_SHARD_THRESHOLD = float(os.environ.get('COUNTER_SHARD_THRESHOLD', '5'))
+COUNTER_SHARD_WINDOW = float(os.environ.get('COUNTER_SHARD_WINDOW', '10'))
+COUNTER_FOLD_INTERVAL = float(os.environ.get('COUNTER_FOLD_INTERVAL', '30'))
+
+# Background job leases: a running job holds its lease for JOB_LEASE_TTL seconds and renews
+# it every third of that, so a crashed holder frees the job within one TTL
+JOB_LEASE_TTL = float(os.environ.get('JOB_LEASE_TTL', '60'))
+
+# Auth caches (resolved users and verified tokens)
+AUTH_CACHE_TTL = float(os.environ.get('AUTH_CACHE_TTL', '60'))
+AUTH_CACHE_SIZE = int(os.environ.get('AUTH_CACHE_SIZE', '10000'))
+
+# Password hashing (bcrypt runs in a bounded thread pool, off the event loop)
+BCRYPT_ROUNDS = int(os.environ.get('BCRYPT_ROUNDS', '12'))
+PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', '4'))
+PASSWORD_HASH_MAX_QUEUE = int(os.environ.get('PASSWORD_HASH_MAX_QUEUE', '200'))
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS)
 
 # Security
 security = HTTPBearer(auto_error=False)
 
-# Create the main app
-app = FastAPI(title="FundFlow API", version="1.0.0")
-
 # Create a router with the /api prefix
 api_router = APIRouter(prefix="/api")
 
@@ -157,6 +270,11 @@ class WithdrawalRequest(BaseModel):
     amount: float
     payout_mode: str  # "bank" or "upi"
 
+class BulkWithdrawalAction(BaseModel):
+    withdrawal_ids: List[str] = Field(..., min_length=1, max_length=1000)
+    action: str = Field(..., pattern="^(approve|reject)$")
+    failure_reason: Optional[str] = None
+
 class WithdrawalResponse(BaseModel):
     model_config = ConfigDict(extra="ignore")
     id: str
@@ -182,12 +300,199 @@ class KYCReview(BaseModel):
     rejection_reason: Optional[str] = None
 
 
+# ==================== IN-PROCESS CACHES ====================
+class TTLCache:
+    """Small LRU cache whose entries expire after a TTL, with hit/miss counters"""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        entry = self._data.get(key)
+        if entry is not None:
+            expires_at, value = entry
+            if expires_at > time.monotonic():
+                self._data.move_to_end(key)
+                self.hits += 1
+                return value
+            del self._data[key]
+        self.misses += 1
+        return default
+
+    def set(self, key, value, ttl: float = None):
+        ttl = self.ttl if ttl is None else ttl
+        if ttl <= 0:
+            return
+        self._data[key] = (time.monotonic() + ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def pop(self, key):
+        self._data.pop(key, None)
+
+    def clear(self):
+        self._data.clear()
+
+    def metrics(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0
+        }
+
+
+# Keyed by user id -> user document (without password)
+user_cache = TTLCache(AUTH_CACHE_SIZE, AUTH_CACHE_TTL)
+# Keyed by sha256(token) -> user id, for tokens whose signature and expiry were already verified
+token_cache = TTLCache(AUTH_CACHE_SIZE, AUTH_CACHE_TTL)
+
+class SingleFlightCache:
+    """Caches async load results per key and collapses concurrent loads of a key into one call"""
+
+    _MISSING = object()
+
+    def __init__(self, ttl: float, maxsize: int = 1024, ttl_for=None):
+        self._cache = TTLCache(maxsize, ttl)
+        self._inflight: Dict[str, asyncio.Task] = {}
+        # Optional callable(result) -> ttl, for results that deserve a longer/shorter life
+        self.ttl_for = ttl_for
+        self.loads = 0
+        self.coalesced = 0
+
+    async def get(self, key, loader):
+        value = self._cache.get(key, self._MISSING)
+        if value is not self._MISSING:
+            return value
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._load(key, loader))
+            self._inflight[key] = task
+        else:
+            self.coalesced += 1
+        # Shielded so one cancelled caller does not cancel the load for everyone else
+        return await asyncio.shield(task)
+
+    async def _load(self, key, loader):
+        try:
+            self.loads += 1
+            value = await loader()
+            self._cache.set(key, value, self.ttl_for(value) if self.ttl_for else None)
+            return value
+        finally:
+            self._inflight.pop(key, None)
+
+    def invalidate(self, key=None):
+        if key is None:
+            self._cache.clear()
+        else:
+            self._cache.pop(key)
+
+    def metrics(self) -> dict:
+        return {**self._cache.metrics(), "loads": self.loads, "coalesced": self.coalesced, "in_flight": len(self._inflight)}
+
+
+def invalidate_user_cache(user_id: str):
+    """Drop a cached user after its record changes"""
+    user_cache.pop(user_id)
+
+
+# ==================== PASSWORD HASHING ====================
+class PasswordHasher:
+    """Runs bcrypt hash/verify in a dedicated thread pool with a concurrency cap.
+
+    At most `max_workers` hashes run at once; further calls wait their turn
+    (the queue), and once `max_queue` calls are waiting new ones are refused
+    with 503 instead of piling up.
+    """
+
+    def __init__(self, context: CryptContext, max_workers: int, max_queue: int):
+        self.context = context
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._executor = None
+        self._slots = None
+        # Metrics
+        self.waiting = 0
+        self.peak_waiting = 0
+        self.running = 0
+        self.completed = 0
+        self.rejected = 0
+        self.rehashed = 0
+
+    def start(self):
+        """Create the thread pool; called per process so forked workers never inherit one"""
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="password-hash")
+        self._slots = asyncio.Semaphore(self.max_workers)
+
+    async def _run(self, fn, *args):
+        if self._executor is None:
+            self.start()
+        if self.waiting >= self.max_queue:
+            self.rejected += 1
+            raise HTTPException(status_code=503, detail="Server busy, please retry")
+        self.waiting += 1
+        self.peak_waiting = max(self.peak_waiting, self.waiting)
+        try:
+            await self._slots.acquire()
+        finally:
+            self.waiting -= 1
+        self.running += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+        finally:
+            self.running -= 1
+            self.completed += 1
+            self._slots.release()
+
+    async def hash(self, password: str) -> str:
+        return await self._run(self.context.hash, password)
+
+    async def verify_and_update(self, password: str, hashed_password: str) -> tuple:
+        """Returns (is_valid, new_hash); new_hash is set when the stored hash uses outdated parameters"""
+        return await self._run(self.context.verify_and_update, password, hashed_password)
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+            self._slots = None
+
+    def metrics(self) -> dict:
+        return {
+            "max_workers": self.max_workers,
+            "max_queue": self.max_queue,
+            "running": self.running,
+            "queue_depth": self.waiting,
+            "peak_queue_depth": self.peak_waiting,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "rehashed": self.rehashed
+        }
+
+
+password_hasher = PasswordHasher(pwd_context, PASSWORD_HASH_WORKERS, PASSWORD_HASH_MAX_QUEUE)
+
+
 # ==================== AUTH HELPER FUNCTIONS ====================
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+async def verify_password(plain_password: str, hashed_password: str, user_id: str = None) -> bool:
+    """Verify a password off the event loop, upgrading the stored hash if its cost factor is outdated"""
+    valid, new_hash = await password_hasher.verify_and_update(plain_password, hashed_password)
+    if valid and new_hash and user_id:
+        await db.users.update_one({"id": user_id}, {"$set": {"password": new_hash}})
+        password_hasher.rehashed += 1
+        logger.info(f"Password hash upgraded for user {user_id}")
+    return valid
 
-def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+async def get_password_hash(password: str) -> str:
+    return await password_hasher.hash(password)
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     to_encode = data.copy()
@@ -199,18 +504,39 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
+def get_token_subject(token: str) -> Optional[str]:
+    """Return the user id of a valid token, skipping the signature check for recently verified tokens"""
+    token_key = hashlib.sha256(token.encode()).hexdigest()
+    user_id = token_cache.get(token_key)
+    if user_id:
+        return user_id
+    payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    user_id = payload.get("sub")
+    if user_id:
+        # Never cache a token beyond its own expiry
+        ttl = min(AUTH_CACHE_TTL, payload.get("exp", 0) - time.time())
+        token_cache.set(token_key, user_id, ttl=ttl)
+    return user_id
+
+async def load_user(user_id: str) -> Optional[dict]:
+    """Get a user by id, served from the in-process cache when warm"""
+    user = user_cache.get(user_id)
+    if user is None:
+        user = await db.users.find_one({"id": user_id}, {"_id": 0, "password": 0})
+        if user:
+            user_cache.set(user_id, user)
+    # Callers may mutate the dict, so never hand out the cached instance
+    return dict(user) if user else None
+
 async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)) -> Optional[dict]:
     """Get current user from JWT token - returns None if not authenticated"""
     if not credentials:
         return None
     try:
-        token = credentials.credentials
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        user_id: str = payload.get("sub")
+        user_id = get_token_subject(credentials.credentials)
         if user_id is None:
             return None
-        user = await db.users.find_one({"id": user_id}, {"_id": 0, "password": 0})
-        return user
+        return await load_user(user_id)
     except JWTError:
         return None
 
@@ -219,12 +545,10 @@ async def get_required_user(credentials: HTTPAuthorizationCredentials = Depends(
     if not credentials:
         raise HTTPException(status_code=401, detail="Authentication required")
     try:
-        token = credentials.credentials
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        user_id: str = payload.get("sub")
+        user_id = get_token_subject(credentials.credentials)
         if user_id is None:
             raise HTTPException(status_code=401, detail="Invalid token")
-        user = await db.users.find_one({"id": user_id}, {"_id": 0, "password": 0})
+        user = await load_user(user_id)
         if not user:
             raise HTTPException(status_code=401, detail="User not found")
         return user
@@ -271,6 +595,28 @@ class CollectionResponse(BaseModel):
     created_at: str
     share_link: str
 
+class CollectionCard(BaseModel):
+    """The fields a collection card shows in list views"""
+    model_config = ConfigDict(extra="ignore")
+    id: str
+    title: str
+    description: str
+    category: str
+    goal_amount: Optional[float] = None
+    current_amount: float
+    withdrawn_amount: float = 0.0
+    available_amount: float = 0.0
+    visibility: str
+    status: str
+    deadline: Optional[str] = None
+    cover_image: Optional[str] = None
+    organizer_name: str
+    donor_count: int
+    created_at: str
+
+class MyCollectionCard(CollectionCard):
+    rejection_reason: Optional[str] = None
+
 class DonationCreate(BaseModel):
     collection_id: str
     donor_name: str
@@ -326,6 +672,433 @@ def get_category_image(category: str) -> str:
     return category_images.get(category.lower(), "https://images.unsplash.com/photo-1556761175-5973dc0f32e7")
 
 
+async def fetch_docs_by_field(collection, field: str, values, projection: dict) -> Dict[str, dict]:
+    """Fetch all documents whose `field` is in `values` with one query, keyed by that field"""
+    values = list({v for v in values if v})
+    if not values:
+        return {}
+    docs = await collection.find({field: {"$in": values}}, {"_id": 0, field: 1, **projection}).to_list(length=len(values))
+    return {d[field]: d for d in docs}
+
+def encode_page_cursor(doc: dict) -> str:
+    """Encode the (created_at, id) sort key of the last item into an opaque cursor"""
+    raw = json.dumps([doc["created_at"], doc["id"]], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def apply_page_cursor(query: dict, cursor: Optional[str]) -> dict:
+    """Restrict a created_at-desc query to items strictly after the cursor position"""
+    if not cursor:
+        return query
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, item_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if not isinstance(created_at, str) or not isinstance(item_id, str):
+            raise ValueError("cursor fields must be strings")
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return {
+        **query,
+        "$or": [
+            {"created_at": {"$lt": created_at}},
+            {"created_at": created_at, "id": {"$lt": item_id}}
+        ]
+    }
+
+# Newest first, id breaks ties so keyset pages never skip or repeat items
+PAGE_SORT = [("created_at", -1), ("id", -1)]
+
+def encode_search_cursor(sort_value, item_id: str) -> str:
+    """Encode the (sort value, id) key of the last search result into an opaque cursor"""
+    raw = json.dumps([sort_value, item_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def decode_search_cursor(cursor: str, value_type: type) -> tuple:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        sort_value, item_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if value_type is float and isinstance(sort_value, int):
+            sort_value = float(sort_value)
+        if not isinstance(sort_value, value_type) or not isinstance(item_id, str):
+            raise ValueError("cursor fields have the wrong type")
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return sort_value, item_id
+
+# ==================== PLATFORM COUNTERS ====================
+# Materialized dashboard counters, kept in the settings collection and bumped on every
+# status transition. `reconcile_platform_counters` rebuilds them to correct any drift.
+COUNTERS_KEY = "platform_counters"
+
+async def bump_platform_counters(kind: str, old_status: Optional[str], new_status: Optional[str], extra: dict = None):
+    """Move one `kind` (collections/kyc/withdrawals/users) document from old_status to new_status"""
+    inc = dict(extra or {})
+    if old_status != new_status:
+        if old_status:
+            inc[f"{kind}.{old_status}"] = inc.get(f"{kind}.{old_status}", 0) - 1
+        if new_status:
+            inc[f"{kind}.{new_status}"] = inc.get(f"{kind}.{new_status}", 0) + 1
+    if not inc:
+        return
+    try:
+        # No upsert: a partial document would hide every other bucket from readers. While the
+        # document is missing, get_platform_counters rebuilds it from a full recount instead.
+        await db.settings.update_one({"key": COUNTERS_KEY}, {"$inc": inc})
+    except Exception as e:
+        # Counters are best-effort; the reconcile job repairs any drift
+        logger.error(f"Error updating platform counters: {str(e)}")
+
+async def record_successful_donation(amount: float):
+    """Count a donation that just transitioned to SUCCESS in the public stats"""
+    await bump_platform_counters("donations", None, PaymentStatus.SUCCESS.value, {"totals.raised": amount})
+
+async def bump_withdrawal_counters(withdrawal: dict, new_status: str):
+    """Record a withdrawal status transition, including completed payout totals"""
+    old_status = withdrawal.get("status")
+    if old_status == new_status:
+        return
+    extra = {}
+    completed = WithdrawalStatus.COMPLETED.value
+    if completed in (old_status, new_status):
+        sign = 1 if new_status == completed else -1
+        extra = {
+            "totals.withdrawn": sign * withdrawal.get("net_amount", 0),
+            "totals.platform_fees": sign * withdrawal.get("platform_fee", 0)
+        }
+    await bump_platform_counters("withdrawals", old_status, new_status, extra)
+
+async def compute_platform_counters() -> dict:
+    """Recount the dashboard counters from the source collections"""
+    by_status = [{"$group": {"_id": "$status", "count": {"$sum": 1}}}]
+    users, collections, kyc, withdrawals, donations = await asyncio.gather(
+        db.users.count_documents({"is_admin": {"$ne": True}}),
+        db.collections.aggregate(by_status).to_list(None),
+        db.kyc.aggregate(by_status).to_list(None),
+        db.withdrawals.aggregate([{"$facet": {
+            "by_status": by_status,
+            "totals": [
+                {"$match": {"status": WithdrawalStatus.COMPLETED.value}},
+                {"$group": {"_id": None, "withdrawn": {"$sum": "$net_amount"}, "platform_fees": {"$sum": "$platform_fee"}}}
+            ]
+        }}]).to_list(1),
+        db.donations.aggregate([
+            {"$match": {"status": PaymentStatus.SUCCESS.value}},
+            {"$group": {"_id": None, "count": {"$sum": 1}, "raised": {"$sum": "$amount"}}}
+        ]).to_list(1)
+    )
+    facets = withdrawals[0] if withdrawals else {"by_status": [], "totals": []}
+    totals = facets["totals"][0] if facets["totals"] else {}
+    donation_totals = donations[0] if donations else {}
+    return {
+        "users": {"total": users},
+        "collections": {g["_id"]: g["count"] for g in collections if g["_id"]},
+        "kyc": {g["_id"]: g["count"] for g in kyc if g["_id"]},
+        "withdrawals": {g["_id"]: g["count"] for g in facets["by_status"] if g["_id"]},
+        "donations": {PaymentStatus.SUCCESS.value: donation_totals.get("count", 0)},
+        "totals": {
+            "withdrawn": totals.get("withdrawn", 0),
+            "platform_fees": totals.get("platform_fees", 0),
+            "raised": donation_totals.get("raised", 0)
+        }
+    }
+
+async def reconcile_platform_counters(fix: bool = True) -> dict:
+    """Compare the materialized counters against a full recount, overwriting them if they drifted"""
+    actual = await compute_platform_counters()
+    stored = await db.settings.find_one({"key": COUNTERS_KEY}, {"_id": 0, "key": 0, "rebuilt_at": 0}) or {}
+    drift = {}
+    for group, values in actual.items():
+        stored_group = stored.get(group, {})
+        for name in set(values) | set(stored_group):
+            expected, current = values.get(name, 0), stored_group.get(name, 0)
+            if round(expected - current, 2) != 0:
+                drift[f"{group}.{name}"] = {"stored": current, "actual": expected}
+    if fix and (drift or not stored):
+        await db.settings.replace_one(
+            {"key": COUNTERS_KEY},
+            {"key": COUNTERS_KEY, **actual, "rebuilt_at": datetime.now(timezone.utc).isoformat()},
+            upsert=True
+        )
+        if drift and stored:
+            logger.warning(f"Platform counters drifted, rebuilt: {drift}")
+    return {"drift": drift, "counters": actual}
+
+async def get_platform_counters() -> dict:
+    """Read the materialized counters, rebuilding them first if they do not exist yet"""
+    counters = await db.settings.find_one({"key": COUNTERS_KEY}, {"_id": 0})
+    if not counters:
+        counters = (await reconcile_platform_counters())["counters"]
+    return counters
+
+
+# ==================== COLLECTION COUNTER SHARDS ====================
+# A viral collection takes every donation's $inc on one document. Once its write rate
+# crosses the threshold the collection is marked with `counter_shards: N` and donations
+# increment a random shard in `collection_counter_shards` instead. Readers add the shard
+# totals on top of the parent; `fold_counter_shards` periodically moves them into it.
+class CollectionWriteRate:
+    """Per-collection donation counts over a fixed window, used to decide when to shard"""
+
+    def __init__(self, window: float, threshold: float):
+        self.window = window
+        self.limit = threshold * window
+        self._counts: Dict[str, int] = {}
+        self._window_start = time.monotonic()
+
+    def hit(self, collection_id: str) -> bool:
+        """Record one write; returns True if the collection is over the threshold"""
+        now = time.monotonic()
+        if now - self._window_start >= self.window:
+            self._counts.clear()
+            self._window_start = now
+        count = self._counts.get(collection_id, 0) + 1
+        self._counts[collection_id] = count
+        return count > self.limit
+
+
+collection_write_rate = CollectionWriteRate(COUNTER_SHARD_WINDOW, COUNTER_SHARD_THRESHOLD)
+sharded_collections: Dict[str, int] = {}
+counter_shard_metrics = {"enabled": 0, "shard_writes": 0, "folded": 0}
+
+async def enable_counter_shards(collection_id: str) -> int:
+    """Switch a collection to sharded counters (idempotent across processes)"""
+    # $max keeps a larger shard count another process (or older config) already chose
+    await db.collections.update_one({"id": collection_id}, {"$max": {"counter_shards": COUNTER_SHARDS}})
+    doc = await db.collections.find_one({"id": collection_id}, {"_id": 0, "counter_shards": 1})
+    shards = (doc or {}).get("counter_shards") or COUNTER_SHARDS
+    # Pre-create the shards so concurrent first writes never race on an upsert
+    try:
+        await db.collection_counter_shards.insert_many(
+            [{"collection_id": collection_id, "shard": i, "amount": 0.0, "donors": 0} for i in range(shards)],
+            ordered=False
+        )
+    except BulkWriteError as e:
+        # Shards another process already created
+        if any(err.get("code") != 11000 for err in e.details.get("writeErrors", [])):
+            raise
+    sharded_collections[collection_id] = shards
+    counter_shard_metrics["enabled"] += 1
+    invalidate_collection_listings()
+    logger.info(f"Collection {collection_id} switched to {shards} counter shards")
+    return shards
+
+async def increment_collection_counters(collection_id: str, amount: float, now: str, session=None):
+    """Credit one donation to a collection, on a random shard when it is running hot"""
+    shards = sharded_collections.get(collection_id)
+    if not shards and collection_write_rate.hit(collection_id):
+        shards = await enable_counter_shards(collection_id)
+    if shards:
+        await db.collection_counter_shards.update_one(
+            {"collection_id": collection_id, "shard": random.randrange(shards)},
+            {"$inc": {"amount": amount, "donors": 1}},
+            upsert=True,
+            session=session
+        )
+        counter_shard_metrics["shard_writes"] += 1
+        return
+    await db.collections.update_one(
+        {"id": collection_id},
+        {
+            "$inc": {"current_amount": amount, "donor_count": 1},
+            "$set": {"updated_at": now}
+        },
+        session=session
+    )
+
+async def apply_counter_shards(collections: List[dict]) -> List[dict]:
+    """Add unfolded shard totals to current_amount / donor_count of sharded collections.
+    
+    A fold claimed off a shard but not yet applied to the parent (its id is not in the
+    parent's counter_folds) is counted too, so reads never dip while a fold is in flight.
+    """
+    sharded_ids = [c["id"] for c in collections if c.get("counter_shards")]
+    if sharded_ids:
+        totals = await db.collection_counter_shards.aggregate([
+            {"$match": {"collection_id": {"$in": sharded_ids}}},
+            {"$group": {
+                "_id": "$collection_id",
+                "amount": {"$sum": "$amount"},
+                "donors": {"$sum": "$donors"},
+                "folds": {"$push": "$folding"}
+            }}
+        ]).to_list(None)
+        by_id = {t["_id"]: t for t in totals}
+        # Applied fold ids, read only for collections that have a fold in flight
+        folding_ids = [
+            c["id"] for c in collections
+            if by_id.get(c["id"], {}).get("folds") and "counter_folds" not in c
+        ]
+        applied = {}
+        if folding_ids:
+            parents = await db.collections.find(
+                {"id": {"$in": folding_ids}}, {"_id": 0, "id": 1, "counter_folds": 1}
+            ).to_list(None)
+            applied = {p["id"]: p.get("counter_folds", []) for p in parents}
+        for c in collections:
+            t = by_id.get(c["id"])
+            if not t:
+                continue
+            amount, donors = t["amount"], t["donors"]
+            done = c["counter_folds"] if "counter_folds" in c else applied.get(c["id"], [])
+            for fold in t.get("folds", []):
+                if fold and fold["id"] not in done:
+                    amount += fold["amount"]
+                    donors += fold["donors"]
+            c["current_amount"] = c.get("current_amount", 0.0) + amount
+            c["donor_count"] = c.get("donor_count", 0) + donors
+    return collections
+
+async def apply_shard_fold(shard: dict, fold: dict):
+    """Add one claimed fold to its parent collection (at most once) and clear the shard's marker"""
+    await db.collections.update_one(
+        {"id": shard["collection_id"], "counter_folds": {"$ne": fold["id"]}},
+        {
+            "$inc": {"current_amount": fold["amount"], "donor_count": fold["donors"]},
+            "$set": {"updated_at": datetime.now(timezone.utc).isoformat()},
+            # Remember recent fold ids so a retried fold is not added twice
+            "$push": {"counter_folds": {"$each": [fold["id"]], "$slice": -4 * COUNTER_SHARDS}}
+        }
+    )
+    await db.collection_counter_shards.update_one(
+        {"collection_id": shard["collection_id"], "shard": shard["shard"], "folding.id": fold["id"]},
+        {"$unset": {"folding": ""}}
+    )
+
+async def fold_counter_shards() -> int:
+    """Move shard totals into their parent collections; returns the number of shards folded.
+    
+    Each fold is first recorded on the shard (`folding`) in the same update that subtracts
+    it, so a fold interrupted before reaching the parent is finished by the next run.
+    """
+    shards = await db.collection_counter_shards.find(
+        {"$or": [{"amount": {"$ne": 0}}, {"donors": {"$ne": 0}}, {"folding": {"$exists": True}}]}, {"_id": 0}
+    ).to_list(None)
+    folded = 0
+    for shard in shards:
+        fold = shard.get("folding")
+        if not fold:
+            fold = {"id": str(uuid.uuid4()), "amount": shard["amount"], "donors": shard["donors"]}
+            # Subtract exactly what was read so donations landing meanwhile stay on the shard
+            claimed = await db.collection_counter_shards.update_one(
+                {"collection_id": shard["collection_id"], "shard": shard["shard"], "folding": {"$exists": False}},
+                {"$inc": {"amount": -fold["amount"], "donors": -fold["donors"]}, "$set": {"folding": fold}}
+            )
+            if not claimed.modified_count:
+                continue
+        await apply_shard_fold(shard, fold)
+        folded += 1
+    if folded:
+        counter_shard_metrics["folded"] += folded
+        invalidate_collection_listings()
+    return folded
+
+
+# ==================== PLATFORM SETTINGS ====================
+PLATFORM_SETTINGS_KEY = "platform"
+
+class PlatformSettingsService:
+    """In-memory copy of the platform settings document, kept current across workers.
+
+    Writes bump a `version` on the document. Each process follows a change stream on
+    db.settings, or polls the document every SETTINGS_POLL_INTERVAL seconds when change
+    streams are unavailable (standalone mongod), and only applies newer versions.
+    """
+
+    DEFAULTS = {"platform_fee_percentage": 2.5}
+    # "The $changeStream stage is only supported on replica sets"
+    CHANGE_STREAM_UNSUPPORTED = 40573
+
+    def __init__(self, poll_interval: float):
+        self.poll_interval = poll_interval
+        self.values = dict(self.DEFAULTS)
+        self.version = -1
+        self.mode = None
+        self.refreshes = 0
+        self._task = None
+
+    @property
+    def fee_percentage(self) -> float:
+        return self.values["platform_fee_percentage"]
+
+    def _apply(self, doc: Optional[dict]):
+        version = (doc or {}).get("version", 0)
+        if version <= self.version:
+            return
+        self.values = {k: (doc or {}).get(k, default) for k, default in self.DEFAULTS.items()}
+        self.version = version
+        self.refreshes += 1
+
+    async def refresh(self):
+        self._apply(await db.settings.find_one({"key": PLATFORM_SETTINGS_KEY}, {"_id": 0}))
+
+    async def update(self, values: dict, updated_by: str):
+        """Persist new settings and apply them locally; other workers pick them up from the stream/poll"""
+        await db.settings.update_one(
+            {"key": PLATFORM_SETTINGS_KEY},
+            {
+                "$set": {**values, "updated_at": datetime.now(timezone.utc).isoformat(), "updated_by": updated_by},
+                "$inc": {"version": 1}
+            },
+            upsert=True
+        )
+        await self.refresh()
+
+    async def _watch(self):
+        pipeline = [{"$match": {"fullDocument.key": PLATFORM_SETTINGS_KEY}}]
+        async with db.settings.watch(pipeline, full_document="updateLookup") as stream:
+            self.mode = "change_stream"
+            # Catch anything written between the initial load and the stream opening
+            await self.refresh()
+            async for change in stream:
+                self._apply(change.get("fullDocument"))
+
+    async def _poll(self, duration: float = None):
+        self.mode = "polling"
+        loop = asyncio.get_running_loop()
+        until = loop.time() + duration if duration else None
+        while until is None or loop.time() < until:
+            await asyncio.sleep(self.poll_interval)
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.error(f"Error polling platform settings: {str(e)}")
+
+    async def _follow(self):
+        while True:
+            try:
+                await self._watch()
+            except asyncio.CancelledError:
+                raise
+            except OperationFailure as e:
+                if e.code == self.CHANGE_STREAM_UNSUPPORTED:
+                    logger.info("Change streams unavailable, polling platform settings")
+                    await self._poll()  # until cancelled
+                    return
+                logger.warning(f"Platform settings change stream failed: {str(e)}")
+            except Exception as e:
+                logger.warning(f"Platform settings change stream failed: {str(e)}")
+            # Poll for a while before trying the stream again
+            await self._poll(duration=60)
+
+    async def start(self):
+        try:
+            await self.refresh()
+        except Exception as e:
+            logger.error(f"Error loading platform settings, using defaults: {str(e)}")
+        self._task = asyncio.create_task(self._follow())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def metrics(self) -> dict:
+        return {"mode": self.mode, "version": self.version, "refreshes": self.refreshes, **self.values}
+
+
+platform_settings = PlatformSettingsService(SETTINGS_POLL_INTERVAL)
+
+
 # ==================== AUTH ENDPOINTS ====================
 @api_router.post("/auth/register", response_model=TokenResponse)
 async def register(user_data: UserRegister):
@@ -344,13 +1117,14 @@ async def register(user_data: UserRegister):
             "id": user_id,
             "name": user_data.name,
             "email": user_data.email.lower(),
-            "password": get_password_hash(user_data.password),
+            "password": await get_password_hash(user_data.password),
             "phone": user_data.phone,
             "created_at": now,
             "updated_at": now
         }
         
         await db.users.insert_one(user_doc)
+        await bump_platform_counters("users", None, None, {"users.total": 1})
         logger.info(f"User registered: {user_id}")
         
         # Create access token
@@ -384,7 +1158,7 @@ async def login(credentials: UserLogin):
             raise HTTPException(status_code=401, detail="Invalid email or password")
         
         # Verify password
-        if not verify_password(credentials.password, user["password"]):
+        if not await verify_password(credentials.password, user["password"], user["id"]):
             raise HTTPException(status_code=401, detail="Invalid email or password")
         
         # Create access token
@@ -419,62 +1193,283 @@ async def get_me(current_user: dict = Depends(get_required_user)):
     return UserResponse(**current_user)
 
 
+# ==================== RAZORPAY HTTP CLIENT ====================
+class RazorpayHTTPClient:
+    """Shared keep-alive HTTP client for the Razorpay / RazorpayX REST APIs.
+
+    One aiohttp session (and connection pool) is opened per process by the app
+    lifespan and reused by every outbound helper, so repeated calls skip the
+    TCP+TLS handshake. The Basic auth header is computed once.
+    """
+
+    def __init__(self, base_url: str, key_id: str, key_secret: str, pool_size: int = 20,
+                 timeout: float = 30.0, keepalive: float = 60.0):
+        self.base_url = base_url.rstrip("/")
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.keepalive = keepalive
+        auth_string = base64.b64encode(f"{key_id}:{key_secret}".encode()).decode()
+        self._headers = {
+            "Content-Type": "application/json",
+            "Authorization": f"Basic {auth_string}"
+        }
+        self._session: Optional[aiohttp.ClientSession] = None
+        # Metrics
+        self.requests_total = 0
+        self.errors_total = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.connections_created = 0
+        self.connections_reused = 0
+        self.queued_total = 0
+
+    async def start(self):
+        """Open the pooled session (idempotent)"""
+        if self._session and not self._session.closed:
+            return
+        trace_config = aiohttp.TraceConfig()
+        trace_config.on_connection_create_end.append(self._on_connection_created)
+        trace_config.on_connection_reuseconn.append(self._on_connection_reused)
+        trace_config.on_connection_queued_start.append(self._on_connection_queued)
+        connector = aiohttp.TCPConnector(
+            limit=self.pool_size,
+            keepalive_timeout=self.keepalive,
+            ttl_dns_cache=300
+        )
+        self._session = aiohttp.ClientSession(
+            connector=connector,
+            headers=self._headers,
+            timeout=aiohttp.ClientTimeout(total=self.timeout),
+            trace_configs=[trace_config]
+        )
+        logger.info(f"Razorpay HTTP pool started (limit={self.pool_size}, timeout={self.timeout}s)")
+
+    async def close(self):
+        """Close the pooled session and its keep-alive connections"""
+        if self._session and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    async def _on_connection_created(self, session, ctx, params):
+        self.connections_created += 1
+
+    async def _on_connection_reused(self, session, ctx, params):
+        self.connections_reused += 1
+
+    async def _on_connection_queued(self, session, ctx, params):
+        self.queued_total += 1
+
+    async def request(self, method: str, path: str, json_body: dict = None, params: dict = None,
+                      headers: dict = None, timeout: float = None) -> tuple:
+        """Send a request to the Razorpay API. Returns (status_code, response_json)."""
+        if not self._session or self._session.closed:
+            await self.start()
+        url = path if path.startswith("http") else f"{self.base_url}{path}"
+        # Only override the session timeout when asked: aiohttp treats timeout=None as "no timeout"
+        options = {"timeout": aiohttp.ClientTimeout(total=timeout)} if timeout else {}
+        self.requests_total += 1
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        try:
+            async with self._session.request(
+                method, url, json=json_body, params=params, headers=headers, **options
+            ) as resp:
+                try:
+                    data = await resp.json(content_type=None)
+                except (aiohttp.ContentTypeError, json.JSONDecodeError):
+                    data = {}
+                if resp.status >= 400:
+                    self.errors_total += 1
+                return resp.status, data or {}
+        except Exception:
+            self.errors_total += 1
+            raise
+        finally:
+            self.in_flight -= 1
+
+    async def get(self, path: str, **kwargs) -> tuple:
+        return await self.request("GET", path, **kwargs)
+
+    async def post(self, path: str, **kwargs) -> tuple:
+        return await self.request("POST", path, **kwargs)
+
+    def metrics(self) -> dict:
+        """Pool saturation and connection reuse statistics"""
+        acquired = self.connections_created + self.connections_reused
+        return {
+            "pool_size": self.pool_size,
+            "in_flight": self.in_flight,
+            "peak_in_flight": self.peak_in_flight,
+            "waiting": max(0, self.in_flight - self.pool_size),
+            "saturation": round(min(self.in_flight, self.pool_size) / self.pool_size, 3) if self.pool_size else 0,
+            "peak_saturation": round(min(self.peak_in_flight, self.pool_size) / self.pool_size, 3) if self.pool_size else 0,
+            "queued_total": self.queued_total,
+            "requests_total": self.requests_total,
+            "errors_total": self.errors_total,
+            "connections_created": self.connections_created,
+            "connections_reused": self.connections_reused,
+            "reuse_ratio": round(self.connections_reused / acquired, 3) if acquired else 0
+        }
+
+
+razorpay_http = RazorpayHTTPClient(
+    RAZORPAY_API_URL,
+    RAZORPAY_KEY_ID or "",
+    RAZORPAY_KEY_SECRET or "",
+    pool_size=RAZORPAY_HTTP_POOL_SIZE,
+    timeout=RAZORPAY_HTTP_TIMEOUT,
+    keepalive=RAZORPAY_HTTP_KEEPALIVE
+)
+
+
+# ==================== RAZORPAY ORDER FUNCTIONS ====================
+async def create_razorpay_order(order_data: dict) -> tuple:
+    """Create a Razorpay order without blocking the event loop. Returns (order, error)."""
+    try:
+        status, result = await razorpay_http.post("/orders", json_body=order_data)
+        if status in [200, 201]:
+            return result, None
+        error_msg = result.get("error", {}).get("description", "Failed to create order")
+        logger.error(f"Razorpay order creation failed: {result}")
+        return None, error_msg
+    except Exception as e:
+        logger.error(f"Razorpay order creation error: {str(e)}")
+        return None, str(e)
+
+
+RAZORPAY_FINAL_ORDER_STATUSES = {"paid"}
+RAZORPAY_FINAL_PAYOUT_STATUSES = {"processed", "reversed", "failed", "rejected", "cancelled"}
+
+def gateway_lookup_ttl(final_statuses: set):
+    """Status-aware TTL for cached (result, error) lookups: errors are never cached"""
+    def ttl_for(value: tuple) -> float:
+        result, error = value
+        if error or not result:
+            return 0
+        return GATEWAY_LOOKUP_TTL_FINAL if result.get("status") in final_statuses else GATEWAY_LOOKUP_TTL_PENDING
+    return ttl_for
+
+razorpay_order_lookups = SingleFlightCache(
+    ttl=GATEWAY_LOOKUP_TTL_PENDING,
+    maxsize=GATEWAY_LOOKUP_CACHE_SIZE,
+    ttl_for=gateway_lookup_ttl(RAZORPAY_FINAL_ORDER_STATUSES)
+)
+razorpay_payout_lookups = SingleFlightCache(
+    ttl=GATEWAY_LOOKUP_TTL_PENDING,
+    maxsize=GATEWAY_LOOKUP_CACHE_SIZE,
+    ttl_for=gateway_lookup_ttl(RAZORPAY_FINAL_PAYOUT_STATUSES)
+)
+
+
+async def fetch_razorpay_order(razorpay_order_id: str) -> tuple:
+    """Fetch a Razorpay order by id, deduplicating concurrent lookups. Returns (order, error)."""
+    return await razorpay_order_lookups.get(razorpay_order_id, lambda: _fetch_razorpay_order(razorpay_order_id))
+
+
+async def _fetch_razorpay_order(razorpay_order_id: str) -> tuple:
+    try:
+        status, result = await razorpay_http.get(f"/orders/{razorpay_order_id}")
+        if status == 200:
+            return result, None
+        error_msg = result.get("error", {}).get("description", "Failed to fetch order")
+        return None, error_msg
+    except Exception as e:
+        return None, str(e)
+
+
+async def fetch_razorpay_payout(payout_id: str) -> tuple:
+    """Fetch a RazorpayX payout by id, deduplicating concurrent lookups. Returns (payout, error)."""
+    return await razorpay_payout_lookups.get(payout_id, lambda: _fetch_razorpay_payout(payout_id))
+
+
+async def _fetch_razorpay_payout(payout_id: str) -> tuple:
+    try:
+        status, result = await razorpay_http.get(f"/payouts/{payout_id}")
+        if status == 200:
+            return result, None
+        return None, result.get("error", {}).get("description", "Failed to fetch payout")
+    except Exception as e:
+        return None, str(e)
+
+
+def signature_matches(expected: str, signature: Optional[str]) -> bool:
+    """Constant-time compare of a hex HMAC digest with a client-supplied signature.
+    
+    Compares bytes: hmac.compare_digest raises TypeError for non-ASCII str, and any
+    signature that cannot be encoded is simply a mismatch.
+    """
+    if not signature:
+        return False
+    try:
+        provided = signature.encode("utf-8")
+    except (AttributeError, UnicodeEncodeError):
+        return False
+    return hmac.compare_digest(expected.encode("ascii"), provided)
+
+
+def verify_webhook_signature(body: bytes, signature: Optional[str]) -> bool:
+    """Verify X-Razorpay-Signature (HMAC-SHA256 of the raw body with the webhook secret)"""
+    if not RAZORPAY_WEBHOOK_SECRET:
+        return False
+    expected = hmac.new(RAZORPAY_WEBHOOK_SECRET.encode(), body, hashlib.sha256).hexdigest()
+    return signature_matches(expected, signature)
+
+
+def verify_razorpay_signature(razorpay_order_id: str, razorpay_payment_id: str, signature: str) -> bool:
+    """Verify a Checkout payment signature locally (HMAC-SHA256 of "order_id|payment_id")"""
+    if not RAZORPAY_KEY_SECRET or not signature:
+        return False
+    expected = hmac.new(
+        RAZORPAY_KEY_SECRET.encode(),
+        f"{razorpay_order_id}|{razorpay_payment_id}".encode(),
+        hashlib.sha256
+    ).hexdigest()
+    return signature_matches(expected, signature)
+
+
 # ==================== SMART COLLECT FUNCTIONS ====================
 async def create_razorpay_customer(name: str, email: str, contact: str = None) -> str:
     """Create a Razorpay customer and return the customer_id. Returns existing customer if already exists."""
     try:
-        url = f"{RAZORPAY_API_URL}/customers"
-        
         payload = {
             "name": name,
             "email": email,
         }
         if contact:
             payload["contact"] = contact
-        
-        async with aiohttp.ClientSession() as session:
-            auth_string = base64.b64encode(f"{RAZORPAY_KEY_ID}:{RAZORPAY_KEY_SECRET}".encode()).decode()
-            headers = {
-                "Content-Type": "application/json",
-                "Authorization": f"Basic {auth_string}"
-            }
-            
-            async with session.post(url, json=payload, headers=headers) as resp:
-                response_data = await resp.json()
-                
-                if resp.status in [200, 201]:
-                    customer_id = response_data.get("id")
-                    logger.info(f"Razorpay customer created: {customer_id}")
-                    return customer_id
-                
-                # Check if customer already exists
-                error = response_data.get("error", {})
-                if "already exists" in error.get("description", "").lower():
-                    # Try to find existing customer by email
-                    logger.info(f"Customer already exists for {email}, searching...")
-                    search_url = f"{RAZORPAY_API_URL}/customers"
-                    async with session.get(search_url, headers=headers) as search_resp:
-                        if search_resp.status == 200:
-                            customers_data = await search_resp.json()
-                            items = customers_data.get("items", [])
-                            for customer in items:
-                                if customer.get("email") == email:
-                                    logger.info(f"Found existing customer: {customer.get('id')}")
-                                    return customer.get("id")
-                    
-                    # If we can't find by email, create with unique email
-                    unique_email = f"{email.split('@')[0]}+{uuid.uuid4().hex[:6]}@{email.split('@')[1]}" if '@' in email else f"user-{uuid.uuid4().hex[:8]}@fundflow.app"
-                    payload["email"] = unique_email
-                    async with session.post(url, json=payload, headers=headers) as retry_resp:
-                        retry_data = await retry_resp.json()
-                        if retry_resp.status in [200, 201]:
-                            customer_id = retry_data.get("id")
-                            logger.info(f"Created customer with unique email: {customer_id}")
-                            return customer_id
-                
-                logger.error(f"Failed to create customer: {response_data}")
-                return None
-                
+
+        status, response_data = await razorpay_http.post("/customers", json_body=payload)
+
+        if status in [200, 201]:
+            customer_id = response_data.get("id")
+            logger.info(f"Razorpay customer created: {customer_id}")
+            return customer_id
+
+        # Check if customer already exists
+        error = response_data.get("error", {})
+        if "already exists" in error.get("description", "").lower():
+            # Try to find existing customer by email
+            logger.info(f"Customer already exists for {email}, searching...")
+            search_status, customers_data = await razorpay_http.get("/customers")
+            if search_status == 200:
+                items = customers_data.get("items", [])
+                for customer in items:
+                    if customer.get("email") == email:
+                        logger.info(f"Found existing customer: {customer.get('id')}")
+                        return customer.get("id")
+
+            # If we can't find by email, create with unique email
+            unique_email = f"{email.split('@')[0]}+{uuid.uuid4().hex[:6]}@{email.split('@')[1]}" if '@' in email else f"user-{uuid.uuid4().hex[:8]}@fundflow.app"
+            payload["email"] = unique_email
+            retry_status, retry_data = await razorpay_http.post("/customers", json_body=payload)
+            if retry_status in [200, 201]:
+                customer_id = retry_data.get("id")
+                logger.info(f"Created customer with unique email: {customer_id}")
+                return customer_id
+
+        logger.error(f"Failed to create customer: {response_data}")
+        return None
+
     except Exception as e:
         logger.error(f"Error creating customer: {str(e)}")
         return None
@@ -492,9 +1487,6 @@ async def create_virtual_account(collection_id: str, collection_title: str, orga
             logger.error("Could not create Razorpay customer for virtual account")
             return None
         
-        # Smart Collect API endpoint
-        url = f"{RAZORPAY_API_URL}/virtual_accounts"
-        
         # Set close_by to 1 year from now (in Unix timestamp)
         close_by_timestamp = int((datetime.now(timezone.utc) + timedelta(days=365)).timestamp())
         
@@ -511,24 +1503,17 @@ async def create_virtual_account(collection_id: str, collection_title: str, orga
             }
         }
         
-        async with aiohttp.ClientSession() as session:
-            auth_string = base64.b64encode(f"{RAZORPAY_KEY_ID}:{RAZORPAY_KEY_SECRET}".encode()).decode()
-            headers = {
-                "Content-Type": "application/json",
-                "Authorization": f"Basic {auth_string}"
-            }
-            
-            async with session.post(url, json=payload, headers=headers) as resp:
-                response_data = await resp.json()
-                
-                if resp.status not in [200, 201]:
-                    logger.error(f"Failed to create virtual account: {response_data}")
-                    return None
-                
-                logger.info(f"Virtual account created for collection {collection_id}: {response_data.get('id')}")
-                logger.info(f"Virtual account full response: {json.dumps(response_data)}")
-                return response_data
-                
+        # Smart Collect API endpoint
+        status, response_data = await razorpay_http.post("/virtual_accounts", json_body=payload)
+        
+        if status not in [200, 201]:
+            logger.error(f"Failed to create virtual account: {response_data}")
+            return None
+        
+        logger.info(f"Virtual account created for collection {collection_id}: {response_data.get('id')}")
+        logger.info(f"Virtual account full response: {json.dumps(response_data)}")
+        return response_data
+        
     except Exception as e:
         logger.error(f"Error creating virtual account: {str(e)}")
         return None
@@ -537,24 +1522,14 @@ async def create_virtual_account(collection_id: str, collection_title: str, orga
 async def close_virtual_account(virtual_account_id: str) -> bool:
     """Close a Razorpay Virtual Account"""
     try:
-        url = f"{RAZORPAY_API_URL}/virtual_accounts/{virtual_account_id}/close"
-        
-        async with aiohttp.ClientSession() as session:
-            auth_string = base64.b64encode(f"{RAZORPAY_KEY_ID}:{RAZORPAY_KEY_SECRET}".encode()).decode()
-            headers = {
-                "Content-Type": "application/json",
-                "Authorization": f"Basic {auth_string}"
-            }
+        status, response_data = await razorpay_http.post(f"/virtual_accounts/{virtual_account_id}/close")
+        if status == 200:
+            logger.info(f"Virtual account closed: {virtual_account_id}")
+            return True
+        else:
+            logger.error(f"Failed to close virtual account: {response_data}")
+            return False
             
-            async with session.post(url, headers=headers) as resp:
-                if resp.status == 200:
-                    logger.info(f"Virtual account closed: {virtual_account_id}")
-                    return True
-                else:
-                    response_data = await resp.json()
-                    logger.error(f"Failed to close virtual account: {response_data}")
-                    return False
-                    
     except Exception as e:
         logger.error(f"Error closing virtual account: {str(e)}")
         return False
@@ -576,6 +1551,7 @@ async def create_collection(collection: CollectionCreate, current_user: dict = D
             "id": collection_id,
             "user_id": current_user["id"],
             "title": collection.title,
+            "title_normalized": normalize_search_text(collection.title),
             "description": collection.description,
             "category": collection.category,
             "goal_amount": collection.goal_amount,
@@ -600,6 +1576,7 @@ async def create_collection(collection: CollectionCreate, current_user: dict = D
         }
         
         await db.collections.insert_one(doc)
+        await bump_platform_counters("collections", None, doc["status"])
         logger.info(f"Collection created: {collection_id}")
         
         # Note: Smart Collect Virtual Account creation is disabled
@@ -613,39 +1590,179 @@ async def create_collection(collection: CollectionCreate, current_user: dict = D
         logger.error(f"Error creating collection: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@api_router.get("/collections", response_model=List[CollectionResponse])
-async def get_collections(
-    visibility: Optional[str] = Query(None),
+# Serialized pages of GET /collections: key -> (etag, body bytes, next cursor)
+collection_list_cache = TTLCache(LISTING_CACHE_SIZE, LISTING_CACHE_TTL)
+listing_not_modified = 0
+
+# List views read only the card fields (no gallery, virtual account or organizer contact details),
+# plus counter_shards so apply_counter_shards can add unfolded totals
+COLLECTION_CARD_PROJECTION = {
+    "_id": 0, "counter_shards": 1,
+    **{field: 1 for field in CollectionCard.model_fields if field != "available_amount"}
+}
+MY_COLLECTION_CARD_PROJECTION = {**COLLECTION_CARD_PROJECTION, "rejection_reason": 1}
+collection_card_adapter = TypeAdapter(List[CollectionCard])
+my_collection_card_adapter = TypeAdapter(List[MyCollectionCard])
+
+def serialize_collection_cards(adapter: TypeAdapter, collections: list) -> bytes:
+    """Validate list rows once and serialize them straight to JSON bytes"""
+    for c in collections:
+        c["withdrawn_amount"] = c.get("withdrawn_amount", 0.0)
+        c["available_amount"] = c.get("current_amount", 0.0) - c["withdrawn_amount"]
+    return adapter.dump_json(adapter.validate_python(collections))
+
+def invalidate_collection_listings():
+    """Drop cached listing and search pages after a write that changes what they show"""
+    collection_list_cache.clear()
+    collection_search_cache.clear()
+
+def etag_matches(request: Request, etag: str) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    tags = [t.strip() for t in if_none_match.split(",")]
+    return "*" in tags or etag in tags or f"W/{etag}" in tags
+
+@api_router.get("/collections", response_model=List[CollectionCard])
+async def get_collections(
+    request: Request,
+    visibility: Optional[str] = Query(None),
     category: Optional[str] = Query(None),
+    cursor: Optional[str] = Query(None),
     skip: int = Query(0, ge=0),
     limit: int = Query(20, ge=1, le=100)
 ):
-    """Get all public collections with optional filters"""
+    """Get all public collections with optional filters.
+    
+    Pass the X-Next-Cursor response header back as `cursor` to fetch the next page;
+    `skip` is still honoured when no cursor is given. Responses carry an ETag and
+    honour If-None-Match.
+    """
+    global listing_not_modified
     try:
-        query = {"status": CollectionStatus.ACTIVE.value}
-        
-        # By default, only show public collections
-        if visibility:
-            query["visibility"] = visibility
-        else:
-            query["visibility"] = CollectionVisibility.PUBLIC.value
+        cache_key = (visibility, category, cursor, 0 if cursor else skip, limit)
+        cached = collection_list_cache.get(cache_key)
+        if cached is None:
+            query = {"status": CollectionStatus.ACTIVE.value}
             
-        if category:
-            query["category"] = category
-        
-        cursor = db.collections.find(query, {"_id": 0}).skip(skip).limit(limit).sort("created_at", -1)
-        collections = await cursor.to_list(length=limit)
-        
-        # Add available_amount calculation
-        for c in collections:
-            c["withdrawn_amount"] = c.get("withdrawn_amount", 0.0)
-            c["available_amount"] = c.get("current_amount", 0.0) - c["withdrawn_amount"]
-        
-        return [CollectionResponse(**c) for c in collections]
+            # By default, only show public collections
+            if visibility:
+                query["visibility"] = visibility
+            else:
+                query["visibility"] = CollectionVisibility.PUBLIC.value
+                
+            if category:
+                query["category"] = category
+            
+            if cursor:
+                query = apply_page_cursor(query, cursor)
+                skip = 0
+            
+            collections = await db.collections.find(query, COLLECTION_CARD_PROJECTION).sort(PAGE_SORT).skip(skip).limit(limit).to_list(length=limit)
+            next_cursor = encode_page_cursor(collections[-1]) if len(collections) == limit else None
+            await apply_counter_shards(collections)
+            
+            body = serialize_collection_cards(collection_card_adapter, collections)
+            cached = (f'"{hashlib.sha1(body).hexdigest()}"', body, next_cursor)
+            collection_list_cache.set(cache_key, cached)
+        
+        etag, body, next_cursor = cached
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+        if next_cursor:
+            headers["X-Next-Cursor"] = next_cursor
+        if etag_matches(request, etag):
+            listing_not_modified += 1
+            return Response(status_code=304, headers=headers)
+        return Response(content=body, media_type="application/json", headers=headers)
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error fetching collections: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+# ==================== COLLECTION SEARCH ====================
+# Popular query pages: key -> (body bytes, next cursor)
+collection_search_cache = TTLCache(SEARCH_CACHE_SIZE, SEARCH_CACHE_TTL)
+search_timeouts = 0
+
+async def search_collections_text(query: dict, q: str, cursor: Optional[str], limit: int) -> tuple:
+    """Rank matches by text score (title > organizer > description); returns (rows, next cursor)"""
+    pipeline = [
+        {"$match": {**query, "$text": {"$search": q}}},
+        {"$project": {**COLLECTION_CARD_PROJECTION, "score": {"$meta": "textScore"}}},
+    ]
+    if cursor:
+        score, item_id = decode_search_cursor(cursor, float)
+        pipeline.append({"$match": {"$or": [{"score": {"$lt": score}}, {"score": score, "id": {"$lt": item_id}}]}})
+    pipeline += [{"$sort": {"score": -1, "id": -1}}, {"$limit": limit}]
+    rows = await db.collections.aggregate(pipeline, maxTimeMS=SEARCH_MAX_TIME_MS).to_list(length=limit)
+    next_cursor = encode_search_cursor(rows[-1]["score"], rows[-1]["id"]) if len(rows) == limit else None
+    return rows, next_cursor
+
+async def search_collections_prefix(query: dict, q: str, cursor: Optional[str], limit: int) -> tuple:
+    """Autocomplete: titles starting with the normalized query, in title order; returns (rows, next cursor)"""
+    prefix = normalize_search_text(q)
+    if not prefix:
+        # Only punctuation: "^" would match every active collection
+        return [], None
+    # An anchored, case-sensitive regex on a normalized field is answered from the index bounds
+    query = {**query, "title_normalized": {"$regex": f"^{re.escape(prefix)}"}}
+    if cursor:
+        title, item_id = decode_search_cursor(cursor, str)
+        query["$or"] = [{"title_normalized": {"$gt": title}}, {"title_normalized": title, "id": {"$gt": item_id}}]
+    projection = {**COLLECTION_CARD_PROJECTION, "title_normalized": 1}
+    rows = await db.collections.find(query, projection).sort([("title_normalized", 1), ("id", 1)]) \
+        .limit(limit).max_time_ms(SEARCH_MAX_TIME_MS).to_list(length=limit)
+    next_cursor = encode_search_cursor(rows[-1]["title_normalized"], rows[-1]["id"]) if len(rows) == limit else None
+    return rows, next_cursor
+
+@api_router.get("/collections/search", response_model=List[CollectionCard])
+async def search_collections(
+    q: str = Query(..., min_length=1, max_length=100),
+    mode: str = Query("text", pattern="^(text|prefix)$"),
+    category: Optional[str] = Query(None),
+    cursor: Optional[str] = Query(None),
+    limit: int = Query(20, ge=1, le=50)
+):
+    """Search active public collections.
+    
+    `mode=text` ranks full-text matches over title, organizer name and description by
+    relevance; `mode=prefix` autocompletes on the start of the title. Pass the
+    X-Next-Cursor response header back as `cursor` to fetch the next page.
+    """
+    global search_timeouts
+    try:
+        q = " ".join(q.split())
+        if not q:
+            raise HTTPException(status_code=400, detail="Search query is empty")
+        cache_key = (mode, q.lower(), category, cursor, limit)
+        cached = collection_search_cache.get(cache_key)
+        if cached is None:
+            query = {"status": CollectionStatus.ACTIVE.value, "visibility": CollectionVisibility.PUBLIC.value}
+            if category:
+                query["category"] = category
+            
+            if mode == "prefix":
+                collections, next_cursor = await search_collections_prefix(query, q, cursor, limit)
+            else:
+                collections, next_cursor = await search_collections_text(query, q, cursor, limit)
+            await apply_counter_shards(collections)
+            
+            cached = (serialize_collection_cards(collection_card_adapter, collections), next_cursor)
+            collection_search_cache.set(cache_key, cached)
+        
+        body, next_cursor = cached
+        headers = {"X-Next-Cursor": next_cursor} if next_cursor else {}
+        return Response(content=body, media_type="application/json", headers=headers)
+    except HTTPException:
+        raise
+    except ExecutionTimeout:
+        search_timeouts += 1
+        raise HTTPException(status_code=503, detail="Search took too long, please refine your query")
+    except Exception as e:
+        logger.error(f"Error searching collections: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @api_router.get("/collections/{collection_id}", response_model=CollectionResponse)
 async def get_collection(collection_id: str):
     """Get a single collection by ID (works for both public and private)"""
@@ -653,6 +1770,7 @@ async def get_collection(collection_id: str):
         doc = await db.collections.find_one({"id": collection_id}, {"_id": 0})
         if not doc:
             raise HTTPException(status_code=404, detail="Collection not found")
+        await apply_counter_shards([doc])
         # Add available_amount calculation
         doc["withdrawn_amount"] = doc.get("withdrawn_amount", 0.0)
         doc["available_amount"] = doc.get("current_amount", 0.0) - doc["withdrawn_amount"]
@@ -666,22 +1784,26 @@ async def get_collection(collection_id: str):
 @api_router.get("/collections/{collection_id}/donations", response_model=List[DonationResponse])
 async def get_collection_donations(
     collection_id: str,
+    response: Response,
+    cursor: Optional[str] = Query(None),
     skip: int = Query(0, ge=0),
     limit: int = Query(50, ge=1, le=100)
 ):
-    """Get donations for a collection"""
+    """Get donations for a collection (keyset-paginated via `cursor` / X-Next-Cursor)"""
     try:
         # Verify collection exists
         collection = await db.collections.find_one({"id": collection_id}, {"_id": 0})
         if not collection:
             raise HTTPException(status_code=404, detail="Collection not found")
         
-        cursor = db.donations.find(
-            {"collection_id": collection_id, "status": PaymentStatus.SUCCESS.value},
-            {"_id": 0}
-        ).skip(skip).limit(limit).sort("created_at", -1)
+        query = {"collection_id": collection_id, "status": PaymentStatus.SUCCESS.value}
+        if cursor:
+            query = apply_page_cursor(query, cursor)
+            skip = 0
         
-        donations = await cursor.to_list(length=limit)
+        donations = await db.donations.find(query, {"_id": 0}).sort(PAGE_SORT).skip(skip).limit(limit).to_list(length=limit)
+        if len(donations) == limit:
+            response.headers["X-Next-Cursor"] = encode_page_cursor(donations[-1])
         
         # Mask donor name for anonymous donations
         for d in donations:
@@ -711,31 +1833,447 @@ async def get_categories():
         ]
     }
 
-@api_router.get("/my-collections", response_model=List[CollectionResponse])
+@api_router.get("/my-collections", response_model=List[MyCollectionCard])
 async def get_my_collections(
     current_user: dict = Depends(get_required_user),
+    cursor: Optional[str] = Query(None),
     skip: int = Query(0, ge=0),
     limit: int = Query(20, ge=1, le=100)
 ):
-    """Get collections created by the current user"""
+    """Get collections created by the current user (keyset-paginated via `cursor` / X-Next-Cursor)"""
     try:
-        cursor = db.collections.find(
-            {"user_id": current_user["id"]}, 
-            {"_id": 0}
-        ).skip(skip).limit(limit).sort("created_at", -1)
-        collections = await cursor.to_list(length=limit)
-        
-        # Add available_amount calculation
-        for c in collections:
-            c["withdrawn_amount"] = c.get("withdrawn_amount", 0.0)
-            c["available_amount"] = c.get("current_amount", 0.0) - c["withdrawn_amount"]
-        
-        return [CollectionResponse(**c) for c in collections]
+        query = {"user_id": current_user["id"]}
+        if cursor:
+            query = apply_page_cursor(query, cursor)
+            skip = 0
+        
+        collections = await db.collections.find(query, MY_COLLECTION_CARD_PROJECTION).sort(PAGE_SORT).skip(skip).limit(limit).to_list(length=limit)
+        headers = {}
+        if len(collections) == limit:
+            headers["X-Next-Cursor"] = encode_page_cursor(collections[-1])
+        await apply_counter_shards(collections)
+        
+        body = serialize_collection_cards(my_collection_card_adapter, collections)
+        return Response(content=body, media_type="application/json", headers=headers)
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error fetching user collections: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+# ==================== PAYMENT EVENTS ====================
+class PaymentEventHub:
+    """In-process pub/sub of donation status changes, keyed by order_id"""
+
+    def __init__(self):
+        self._subscribers: Dict[str, set] = {}
+        self.published = 0
+        self.delivered = 0
+
+    def subscribe(self, order_id: str) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=1)
+        self._subscribers.setdefault(order_id, set()).add(queue)
+        return queue
+
+    def unsubscribe(self, order_id: str, queue: asyncio.Queue):
+        subscribers = self._subscribers.get(order_id)
+        if subscribers:
+            subscribers.discard(queue)
+            if not subscribers:
+                del self._subscribers[order_id]
+
+    def publish(self, order_id: str, event: dict):
+        self.published += 1
+        for queue in self._subscribers.get(order_id, ()):
+            if queue.empty():
+                queue.put_nowait(event)
+                self.delivered += 1
+
+    def metrics(self) -> dict:
+        return {
+            "orders": len(self._subscribers),
+            "subscribers": sum(len(s) for s in self._subscribers.values()),
+            "published": self.published,
+            "delivered": self.delivered
+        }
+
+
+payment_events = PaymentEventHub()
+
+def sse_message(data: dict, event: str = "status") -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+def payment_status_event(donation: dict, razorpay_status: Optional[str] = None) -> dict:
+    """Shape a donation into the status payload returned by verify and the events stream"""
+    status = donation.get("status")
+    if razorpay_status is None and status in [PaymentStatus.SUCCESS.value, PaymentStatus.FAILED.value]:
+        razorpay_status = "paid" if status == PaymentStatus.SUCCESS.value else "failed"
+    return {
+        "order_id": donation.get("order_id"),
+        "status": status,
+        "razorpay_status": razorpay_status,
+        "amount": donation.get("amount"),
+        "collection_id": donation.get("collection_id")
+    }
+
+
+# ==================== COLLECTION LIVE EVENTS ====================
+class CollectionEventBroker:
+    """Fans out live donation events per collection.
+
+    Each event is serialized once and the same message is queued to every subscriber.
+    Captures in this process are published directly; while a collection has subscribers,
+    one poller per process picks up donations captured by other processes.
+    """
+
+    def __init__(self, queue_size: int, poll_interval: float, seen_size: int = 1000):
+        self.queue_size = queue_size
+        self.poll_interval = poll_interval
+        self.seen_size = seen_size
+        self._subscribers: Dict[str, set] = {}
+        self._seen: Dict[str, OrderedDict] = {}
+        self._pollers: Dict[str, asyncio.Task] = {}
+        self.published = 0
+        self.delivered = 0
+        self.dropped = 0
+
+    def subscribe(self, collection_id: str) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers.setdefault(collection_id, set()).add(queue)
+        if self.poll_interval > 0 and collection_id not in self._pollers:
+            self._pollers[collection_id] = asyncio.create_task(self._poll(collection_id))
+        return queue
+
+    def unsubscribe(self, collection_id: str, queue: asyncio.Queue):
+        subscribers = self._subscribers.get(collection_id)
+        if subscribers is None:
+            return
+        subscribers.discard(queue)
+        if not subscribers:
+            del self._subscribers[collection_id]
+            self._seen.pop(collection_id, None)
+            poller = self._pollers.pop(collection_id, None)
+            if poller:
+                poller.cancel()
+
+    def publish_donation(self, donation: dict):
+        """Push a newly successful donation to the collection's subscribers (at most once per donation)"""
+        collection_id = donation["collection_id"]
+        subscribers = self._subscribers.get(collection_id)
+        if not subscribers:
+            return
+        seen = self._seen.setdefault(collection_id, OrderedDict())
+        if donation["id"] in seen:
+            return
+        seen[donation["id"]] = True
+        while len(seen) > self.seen_size:
+            seen.popitem(last=False)
+        
+        try:
+            public = DonationResponse(**donation).model_dump()
+        except Exception as e:
+            logger.error(f"Error publishing live donation {donation['id']}: {str(e)}")
+            return
+        if public["anonymous"]:
+            public["donor_name"] = "Anonymous"
+        message = sse_message(
+            {"amount_delta": donation["amount"], "donor_delta": 1, "donation": public},
+            event="donation"
+        )
+        self.published += 1
+        for queue in subscribers:
+            try:
+                queue.put_nowait(message)
+                self.delivered += 1
+            except asyncio.QueueFull:
+                # Slow consumer: it misses this delta and resyncs from the snapshot on reconnect
+                self.dropped += 1
+
+    async def _poll(self, collection_id: str):
+        since = datetime.now(timezone.utc).isoformat()
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            try:
+                donations = await db.donations.find(
+                    {"collection_id": collection_id, "status": PaymentStatus.SUCCESS.value, "updated_at": {"$gt": since}},
+                    {"_id": 0}
+                ).sort("updated_at", 1).limit(100).to_list(length=100)
+                for donation in donations:
+                    since = donation["updated_at"]
+                    self.publish_donation(donation)
+            except Exception as e:
+                logger.error(f"Error polling live donations for {collection_id}: {str(e)}")
+
+    async def stop(self):
+        pollers = list(self._pollers.values())
+        self._pollers.clear()
+        for poller in pollers:
+            poller.cancel()
+        await asyncio.gather(*pollers, return_exceptions=True)
+
+    def metrics(self) -> dict:
+        return {
+            "collections": len(self._subscribers),
+            "subscribers": sum(len(s) for s in self._subscribers.values()),
+            "published": self.published,
+            "delivered": self.delivered,
+            "dropped": self.dropped
+        }
+
+
+collection_events = CollectionEventBroker(LIVE_EVENTS_QUEUE_SIZE, LIVE_EVENTS_POLL_INTERVAL)
+
+async def collection_event_stream(collection: dict, queue: asyncio.Queue):
+    """Yield a progress snapshot, then every donation event, until the client disconnects"""
+    try:
+        yield f"retry: {int(PAYMENT_EVENTS_HEARTBEAT * 1000)}\n"
+        yield sse_message(
+            {"current_amount": collection.get("current_amount", 0.0), "donor_count": collection.get("donor_count", 0)},
+            event="progress"
+        )
+        while True:
+            try:
+                yield await asyncio.wait_for(queue.get(), timeout=PAYMENT_EVENTS_HEARTBEAT)
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"
+    finally:
+        collection_events.unsubscribe(collection["id"], queue)
+
+@api_router.get("/collections/{collection_id}/events")
+async def collection_events_stream(collection_id: str):
+    """Server-sent events stream of a collection's progress.
+    
+    Starts with a `progress` snapshot (current_amount, donor_count), then sends a
+    `donation` event with the amount/donor deltas and the public donation for every
+    successful donation.
+    """
+    # Subscribe before the snapshot read so no donation falls in between
+    queue = collection_events.subscribe(collection_id)
+    try:
+        collection = await db.collections.find_one(
+            {"id": collection_id}, {"_id": 0, "id": 1, "current_amount": 1, "donor_count": 1, "counter_shards": 1}
+        )
+        if collection:
+            await apply_counter_shards([collection])
+    except Exception as e:
+        collection_events.unsubscribe(collection_id, queue)
+        logger.error(f"Error opening collection events: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+    if not collection:
+        collection_events.unsubscribe(collection_id, queue)
+        raise HTTPException(status_code=404, detail="Collection not found")
+    
+    return StreamingResponse(
+        collection_event_stream(collection, queue),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+# ==================== DONATION CAPTURE ====================
+class DonationCaptureService:
+    """Single write path for crediting a successful donation.
+
+    `capture` moves a PENDING donation to SUCCESS with one conditional
+    find_one_and_update and credits its collection,
+    inside a transaction when the deployment supports one. `record` does the same
+    for donations that arrive already paid (Smart Collect bank transfers): they are
+    inserted with `credited: False`, and without transactions a recorded donation whose
+    credit was interrupted is finished by a redelivery or by `finish_pending_credits`.
+    """
+
+    def __init__(self, transactions: str):
+        self.transactions = transactions
+        self._transactions_supported = None if transactions == "auto" else False
+        self.metrics_by_source: Dict[str, dict] = {}
+
+    def _metrics(self, source: str) -> dict:
+        return self.metrics_by_source.setdefault(
+            source, {"captured": 0, "failed": 0, "skipped": 0, "errors": 0, "amount": 0.0, "total_ms": 0.0}
+        )
+
+    async def _credit_collection(self, donation: dict, now: str, session=None):
+        await increment_collection_counters(donation["collection_id"], donation["amount"], now, session)
+
+    async def _transition(self, query: dict, fields: dict, now: str, session=None) -> Optional[dict]:
+        update = {**fields, "status": PaymentStatus.SUCCESS.value, "updated_at": now}
+        donation = await db.donations.find_one_and_update(
+            {**query, "status": PaymentStatus.PENDING.value},
+            {"$set": update},
+            projection={"_id": 0},
+            session=session
+        )
+        if not donation:
+            return None
+        # The pre-image plus our own $set is exactly the stored post-image
+        donation.update(update)
+        await self._credit_collection(donation, now, session)
+        return donation
+
+    async def _credit_recorded(self, donation: dict, session=None) -> bool:
+        """Credit a recorded donation to its collection at most once and mark it credited.
+        
+        The collection remembers recent credited order ids, so finishing an interrupted
+        credit never adds it twice. Returns True for the call that marked it credited.
+        """
+        await db.collections.update_one(
+            {"id": donation["collection_id"], "credited_donations": {"$ne": donation["order_id"]}},
+            {
+                "$inc": {"current_amount": donation["amount"], "donor_count": 1},
+                "$set": {"updated_at": donation["updated_at"]},
+                "$push": {"credited_donations": {"$each": [donation["order_id"]], "$slice": -100}}
+            },
+            session=session
+        )
+        marked = await db.donations.update_one(
+            {"order_id": donation["order_id"], "credited": False}, {"$set": {"credited": True}}, session=session
+        )
+        return bool(marked.modified_count)
+
+    async def _record(self, donation_doc: dict, session=None) -> bool:
+        # Conditional upsert: only the call that inserts the order credits it, with or without
+        # the order_id unique index (which still turns a concurrent duplicate into DuplicateKeyError)
+        result = await db.donations.update_one(
+            {"order_id": donation_doc["order_id"]},
+            {"$setOnInsert": {**donation_doc, "credited": False}},
+            upsert=True,
+            session=session
+        )
+        if result.upserted_id is None:
+            return False
+        return await self._credit_recorded(donation_doc, session)
+
+    async def _in_transaction(self, operation) -> tuple:
+        """Run `operation(session)` in a transaction. Returns (handled, result); handled is False if transactions are unavailable"""
+        try:
+            async with await client.start_session() as session:
+                result = {}
+
+                async def callback(s):
+                    result["value"] = await operation(s)
+
+                await session.with_transaction(callback)
+                self._transactions_supported = True
+                return True, result.get("value")
+        except OperationFailure as e:
+            # Standalone mongod: "Transaction numbers are only allowed on a replica set member or mongos"
+            if self._transactions_supported is None and (e.code == 20 or "Transaction numbers" in str(e)):
+                self._transactions_supported = False
+                logger.info("MongoDB transactions unavailable, capturing donations without them")
+                return False, None
+            raise
+
+    async def _after_capture(self, donation: dict, source: str, started: float):
+        await record_successful_donation(donation["amount"])
+        invalidate_collection_listings()
+        metrics = self._metrics(source)
+        metrics["captured"] += 1
+        metrics["amount"] += donation["amount"]
+        metrics["total_ms"] += (time.perf_counter() - started) * 1000
+        payment_events.publish(donation["order_id"], payment_status_event(donation))
+        collection_events.publish_donation(donation)
+
+    async def capture(self, source: str, query: dict, fields: dict = None) -> Optional[dict]:
+        """Move the PENDING donation matching `query` to SUCCESS and credit its collection.
+        
+        Returns the updated donation, or None if no PENDING donation matched
+        (unknown order, or already captured / failed by another path).
+        """
+        started = time.perf_counter()
+        now = datetime.now(timezone.utc).isoformat()
+        try:
+            handled, donation = False, None
+            if self._transactions_supported is not False:
+                handled, donation = await self._in_transaction(
+                    lambda session: self._transition(query, fields or {}, now, session=session)
+                )
+            if not handled:
+                donation = await self._transition(query, fields or {}, now)
+        except Exception:
+            self._metrics(source)["errors"] += 1
+            raise
+        if not donation:
+            self._metrics(source)["skipped"] += 1
+            return None
+        await self._after_capture(donation, source, started)
+        logger.info(f"Donation {donation['order_id']} captured via {source}: ₹{donation['amount']}")
+        return donation
+
+    async def fail(self, source: str, query: dict) -> Optional[dict]:
+        """Move the PENDING donation matching `query` to FAILED. Returns it, or None if nothing matched."""
+        donation = await db.donations.find_one_and_update(
+            {**query, "status": PaymentStatus.PENDING.value},
+            {"$set": {"status": PaymentStatus.FAILED.value, "updated_at": datetime.now(timezone.utc).isoformat()}},
+            projection={"_id": 0}
+        )
+        if not donation:
+            return None
+        donation["status"] = PaymentStatus.FAILED.value
+        self._metrics(source)["failed"] += 1
+        payment_events.publish(donation["order_id"], payment_status_event(donation))
+        return donation
+
+    async def record(self, source: str, donation_doc: dict) -> Optional[dict]:
+        """Insert an already-paid donation and credit its collection. Returns None if it was already recorded."""
+        started = time.perf_counter()
+        try:
+            handled, credited = False, False
+            if self._transactions_supported is not False:
+                handled, credited = await self._in_transaction(lambda session: self._record(donation_doc, session))
+            if not handled:
+                credited = await self._record(donation_doc)
+            if not credited:
+                # Already recorded: finish its credit if an earlier delivery was interrupted
+                stored = await db.donations.find_one(
+                    {"order_id": donation_doc["order_id"], "credited": False}, {"_id": 0}
+                )
+                credited = bool(stored) and await self._credit_recorded(stored)
+                donation_doc = stored or donation_doc
+        except DuplicateKeyError:
+            credited = False
+        except Exception:
+            self._metrics(source)["errors"] += 1
+            raise
+        if not credited:
+            self._metrics(source)["skipped"] += 1
+            return None
+        donation_doc.pop("_id", None)
+        donation_doc["credited"] = True
+        await self._after_capture(donation_doc, source, started)
+        return donation_doc
+
+    async def finish_pending_credits(self, source: str, limit: int) -> int:
+        """Credit recorded donations whose credit was interrupted (standalone deployments)"""
+        stale = (datetime.now(timezone.utc) - timedelta(seconds=60)).isoformat()
+        pending = await db.donations.find(
+            # Leave a minute for record() calls still in flight
+            {"credited": False, "updated_at": {"$lt": stale}}, {"_id": 0}
+        ).limit(limit).to_list(length=limit)
+        finished = 0
+        for donation in pending:
+            if await self._credit_recorded(donation):
+                donation["credited"] = True
+                await self._after_capture(donation, source, time.perf_counter())
+                finished += 1
+        return finished
+
+    def metrics(self) -> dict:
+        return {
+            "transactions": self._transactions_supported,
+            "sources": {
+                source: {
+                    **{k: v for k, v in m.items() if k != "total_ms"},
+                    "avg_ms": round(m["total_ms"] / m["captured"], 2) if m["captured"] else 0
+                }
+                for source, m in self.metrics_by_source.items()
+            }
+        }
+
+
+donation_capture = DonationCaptureService(DONATION_CAPTURE_TRANSACTIONS)
+
+
 # ==================== PAYMENT ENDPOINTS ====================
 @api_router.post("/payments/create-order", response_model=PaymentOrderResponse)
 async def create_payment_order(payment: PaymentOrderCreate):
@@ -756,7 +2294,7 @@ async def create_payment_order(payment: PaymentOrderCreate):
         amount_paise = int(payment.amount * 100)
         
         # Create order via Razorpay
-        razorpay_order = razorpay_client.order.create({
+        razorpay_order, order_error = await create_razorpay_order({
             "amount": amount_paise,
             "currency": "INR",
             "receipt": order_id[:40],  # Receipt must be <= 40 chars
@@ -767,6 +2305,8 @@ async def create_payment_order(payment: PaymentOrderCreate):
                 "donor_email": payment.donor_email
             }
         })
+        if order_error:
+            raise HTTPException(status_code=502, detail=f"Payment gateway error: {order_error}")
         
         razorpay_order_id = razorpay_order.get("id")
         
@@ -804,6 +2344,27 @@ async def create_payment_order(payment: PaymentOrderCreate):
         logger.error(f"Error creating payment order: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+async def sync_payment_status(donation: dict) -> dict:
+    """Check a pending donation against the gateway and apply any final status"""
+    razorpay_order, fetch_error = await fetch_razorpay_order(donation.get("razorpay_order_id"))
+    razorpay_status = razorpay_order.get("status") if razorpay_order else None
+    if not razorpay_status:
+        logger.error(f"Error fetching order from Razorpay: {fetch_error}")
+        return {"status": donation.get("status"), "message": "Unable to verify with payment gateway"}
+    
+    # Both transitions are conditional on PENDING, so a concurrent webhook cannot double-apply
+    updated = None
+    if razorpay_status == "paid":
+        updated = await donation_capture.capture("verify", {"order_id": donation["order_id"]})
+    elif razorpay_status in ["expired", "cancelled"]:
+        updated = await donation_capture.fail("verify", {"order_id": donation["order_id"]})
+    else:
+        return payment_status_event(donation, razorpay_status)
+    if not updated:
+        # Another path (webhook, sweeper) settled it first: report what is actually stored
+        updated = await db.donations.find_one({"order_id": donation["order_id"]}, {"_id": 0}) or donation
+    return payment_status_event(updated, razorpay_status)
+
 @api_router.get("/payments/verify/{order_id}")
 async def verify_payment(order_id: str):
     """Verify payment status from Razorpay"""
@@ -815,60 +2376,9 @@ async def verify_payment(order_id: str):
         
         # If already processed, just return current status
         if donation.get("status") in [PaymentStatus.SUCCESS.value, PaymentStatus.FAILED.value]:
-            return {
-                "order_id": order_id,
-                "status": donation.get("status"),
-                "razorpay_status": "paid" if donation.get("status") == PaymentStatus.SUCCESS.value else "failed",
-                "amount": donation.get("amount"),
-                "collection_id": donation.get("collection_id")
-            }
-        
-        # Fetch order from Razorpay to verify status
-        razorpay_order_id = donation.get("razorpay_order_id")
-        razorpay_status = None
+            return payment_status_event(donation)
         
-        try:
-            razorpay_order = razorpay_client.order.fetch(razorpay_order_id)
-            razorpay_status = razorpay_order.get("status")
-        except Exception as e:
-            logger.error(f"Error fetching order from Razorpay: {e}")
-        
-        if not razorpay_status:
-            return {"status": donation.get("status"), "message": "Unable to verify with payment gateway"}
-        
-        # Update local record if status changed
-        new_status = donation.get("status")
-        if razorpay_status == "paid":
-            new_status = PaymentStatus.SUCCESS.value
-        elif razorpay_status in ["expired", "cancelled"]:
-            new_status = PaymentStatus.FAILED.value
-        
-        if new_status != donation.get("status"):
-            # Use findOneAndUpdate to prevent race conditions
-            result = await db.donations.find_one_and_update(
-                {"order_id": order_id, "status": PaymentStatus.PENDING.value},
-                {"$set": {"status": new_status, "updated_at": datetime.now(timezone.utc).isoformat()}},
-                return_document=False
-            )
-            
-            # Only update collection if we actually changed the status (result is not None)
-            if result and new_status == PaymentStatus.SUCCESS.value:
-                await db.collections.update_one(
-                    {"id": donation["collection_id"]},
-                    {
-                        "$inc": {"current_amount": donation["amount"], "donor_count": 1},
-                        "$set": {"updated_at": datetime.now(timezone.utc).isoformat()}
-                    }
-                )
-                logger.info(f"Payment successful for order {order_id} (via verify)")
-        
-        return {
-            "order_id": order_id,
-            "status": new_status,
-            "razorpay_status": razorpay_status,
-            "amount": donation.get("amount"),
-            "collection_id": donation.get("collection_id")
-        }
+        return await sync_payment_status(donation)
         
     except HTTPException:
         raise
@@ -877,256 +2387,475 @@ async def verify_payment(order_id: str):
         raise HTTPException(status_code=500, detail=str(e))
 
 
-# ==================== WEBHOOK ENDPOINT ====================
-@api_router.post("/webhooks/payment")
-async def payment_webhook(request: Request):
-    """Handle Razorpay payment webhooks"""
+async def payment_event_stream(donation: dict, queue: asyncio.Queue):
+    """Yield SSE messages until the donation reaches a final status or the stream times out"""
+    order_id = donation["order_id"]
+    terminal = [PaymentStatus.SUCCESS.value, PaymentStatus.FAILED.value]
     try:
-        body = await request.body()
-        payload = json.loads(body)
-        
-        logger.info(f"Razorpay webhook received: {payload.get('event')}")
-        
-        event_type = payload.get("event")
+        yield f"retry: {int(PAYMENT_EVENTS_HEARTBEAT * 1000)}\n"
+        yield sse_message(payment_status_event(donation))
+        if donation.get("status") in terminal:
+            return
+        
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + PAYMENT_EVENTS_TIMEOUT
+        poll_interval = PAYMENT_EVENTS_GATEWAY_POLL
+        next_poll = loop.time() + poll_interval
+        while loop.time() < deadline:
+            wait = min(PAYMENT_EVENTS_HEARTBEAT, next_poll - loop.time(), deadline - loop.time())
+            try:
+                event = await asyncio.wait_for(queue.get(), timeout=max(wait, 0))
+                yield sse_message(event)
+                return
+            except asyncio.TimeoutError:
+                pass
+            
+            if loop.time() >= next_poll:
+                # Fallback for captures applied by another process: re-read, then ask the gateway
+                current = await db.donations.find_one({"order_id": order_id}, {"_id": 0})
+                event = payment_status_event(current) if current and current.get("status") in terminal \
+                    else await sync_payment_status(current or donation)
+                if event.get("status") in terminal:
+                    yield sse_message(event)
+                    return
+                poll_interval = min(poll_interval * 2, PAYMENT_EVENTS_GATEWAY_POLL_MAX)
+                next_poll = loop.time() + poll_interval
+            yield ": keepalive\n\n"
+        
+        yield sse_message({"order_id": order_id, "status": PaymentStatus.PENDING.value}, event="timeout")
+    finally:
+        payment_events.unsubscribe(order_id, queue)
+
+@api_router.get("/payments/{order_id}/events")
+async def payment_events_stream(order_id: str):
+    """Server-sent events stream that pushes the donation's status as soon as it is final.
+    
+    Sends the current status immediately, then a single `status` event when a webhook or
+    verify call settles the payment (or a `timeout` event after PAYMENT_EVENTS_TIMEOUT).
+    """
+    # Subscribe before reading so a capture landing in between is not missed
+    queue = payment_events.subscribe(order_id)
+    try:
+        donation = await db.donations.find_one({"order_id": order_id}, {"_id": 0})
+    except Exception as e:
+        payment_events.unsubscribe(order_id, queue)
+        logger.error(f"Error opening payment events: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+    if not donation:
+        payment_events.unsubscribe(order_id, queue)
+        raise HTTPException(status_code=404, detail="Order not found")
+    
+    return StreamingResponse(
+        payment_event_stream(donation, queue),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+# ==================== WEBHOOK ENDPOINT ====================
+async def process_payment_event(payload: dict) -> dict:
+    """Apply a Razorpay payment webhook event"""
+    logger.info(f"Razorpay webhook received: {payload.get('event')}")
+    
+    event_type = payload.get("event")
+    payment_entity = payload.get("payload", {}).get("payment", {}).get("entity", {})
+    
+    razorpay_order_id = payment_entity.get("order_id")
+    razorpay_payment_id = payment_entity.get("id")
+    
+    if not razorpay_order_id:
+        return {"status": "ignored", "reason": "No order_id in payload"}
+    
+    if event_type == "payment.captured":
+        # Only transitions a still-pending donation, so redeliveries and verify races are no-ops
+        donation = await donation_capture.capture(
+            "webhook",
+            {"razorpay_order_id": razorpay_order_id},
+            {"razorpay_payment_id": razorpay_payment_id, "payment_method": payment_entity.get("method")}
+        )
+        if donation:
+            return {"status": "processed"}
+    elif event_type == "payment.failed":
+        if await donation_capture.fail("webhook", {"razorpay_order_id": razorpay_order_id}):
+            logger.info(f"Payment webhook: FAILED for razorpay order {razorpay_order_id}")
+            return {"status": "processed"}
+    
+    # Nothing changed: tell unknown orders apart from already-processed ones
+    donation = await db.donations.find_one({"razorpay_order_id": razorpay_order_id}, {"_id": 0, "order_id": 1, "status": 1})
+    if not donation:
+        logger.warning(f"Webhook for unknown razorpay order: {razorpay_order_id}")
+        return {"status": "ignored", "reason": "Order not found"}
+    if donation.get("status") in [PaymentStatus.SUCCESS.value, PaymentStatus.FAILED.value]:
+        logger.info(f"Webhook for already processed order: {donation.get('order_id')}")
+        return {"status": "already_processed"}
+    return {"status": "processed"}
+
+
+# ==================== SMART COLLECT WEBHOOK ====================
+async def process_smart_collect_event(payload: dict) -> dict:
+    """Apply a Razorpay Smart Collect (virtual account) webhook event"""
+    event_type = payload.get("event")
+    logger.info(f"Smart Collect webhook received: {event_type}")
+    
+    # Handle virtual_account.credited event
+    if event_type == "virtual_account.credited":
+        va_entity = payload.get("payload", {}).get("virtual_account", {}).get("entity", {})
         payment_entity = payload.get("payload", {}).get("payment", {}).get("entity", {})
         
-        razorpay_order_id = payment_entity.get("order_id")
-        razorpay_payment_id = payment_entity.get("id")
+        virtual_account_id = va_entity.get("id")
+        amount_paise = payment_entity.get("amount", 0)
+        amount = amount_paise / 100  # Convert to rupees
+        payment_id = payment_entity.get("id")
         
-        if not razorpay_order_id:
-            return {"status": "ignored", "reason": "No order_id in payload"}
+        # Get collection notes to find collection_id
+        notes = va_entity.get("notes", {})
+        collection_id = notes.get("collection_id")
         
-        # Get donation record by razorpay_order_id
-        donation = await db.donations.find_one({"razorpay_order_id": razorpay_order_id}, {"_id": 0})
-        if not donation:
-            logger.warning(f"Webhook for unknown razorpay order: {razorpay_order_id}")
-            return {"status": "ignored", "reason": "Order not found"}
+        if not collection_id:
+            # Try to find collection by virtual_account.id
+            collection = await db.collections.find_one(
+                {"virtual_account.id": virtual_account_id}, 
+                {"_id": 0}
+            )
+            if collection:
+                collection_id = collection.get("id")
         
-        # Skip if already processed
-        if donation.get("status") in [PaymentStatus.SUCCESS.value, PaymentStatus.FAILED.value]:
-            logger.info(f"Webhook for already processed order: {donation.get('order_id')}")
-            return {"status": "already_processed"}
+        if not collection_id:
+            logger.warning(f"Smart Collect payment for unknown virtual account: {virtual_account_id}")
+            return {"status": "ignored", "reason": "Collection not found"}
         
         now = datetime.now(timezone.utc).isoformat()
         
-        if event_type == "payment.captured":
-            # Use findOneAndUpdate to prevent race conditions - only update if still pending
-            result = await db.donations.find_one_and_update(
-                {"razorpay_order_id": razorpay_order_id, "status": PaymentStatus.PENDING.value},
-                {
-                    "$set": {
-                        "status": PaymentStatus.SUCCESS.value,
-                        "razorpay_payment_id": razorpay_payment_id,
-                        "payment_method": payment_entity.get("method"),
-                        "updated_at": now
-                    }
-                },
-                return_document=False
-            )
-            
-            # Only update collection if we actually changed the status
-            if result:
-                await db.collections.update_one(
-                    {"id": donation["collection_id"]},
-                    {
-                        "$inc": {"current_amount": donation["amount"], "donor_count": 1},
-                        "$set": {"updated_at": now}
-                    }
-                )
-                logger.info(f"Payment webhook: SUCCESS for order {donation.get('order_id')}")
-            else:
-                logger.info(f"Payment webhook: order {donation.get('order_id')} already processed")
-            
-        elif event_type == "payment.failed":
-            await db.donations.update_one(
-                {"razorpay_order_id": razorpay_order_id, "status": PaymentStatus.PENDING.value},
-                {"$set": {"status": PaymentStatus.FAILED.value, "updated_at": now}}
-            )
-            logger.info(f"Payment webhook: FAILED for order {donation.get('order_id')}")
+        # Extract payer details
+        payer_bank = payment_entity.get("bank", "Unknown")
+        payer_account = payment_entity.get("bank_reference") or payment_entity.get("acquirer_data", {}).get("bank_transaction_id", "")
+        method = payment_entity.get("method", "bank_transfer")
         
-        return {"status": "processed"}
+        # Create donation record
+        donation_doc = {
+            "id": str(uuid.uuid4()),
+            "collection_id": collection_id,
+            "order_id": f"sc_{payment_id[-12:]}",  # Smart Collect order ID
+            "razorpay_payment_id": payment_id,
+            "donor_name": f"Bank Transfer ({payer_bank})",
+            "donor_email": None,
+            "donor_phone": None,
+            "amount": amount,
+            "message": f"Via {method.upper()} - Ref: {payer_account}",
+            "anonymous": True,  # Bank transfers are anonymous
+            "status": PaymentStatus.SUCCESS.value,
+            "payment_method": method,
+            "payment_type": "smart_collect",
+            "created_at": now,
+            "updated_at": now
+        }
         
-    except Exception as e:
-        logger.error(f"Webhook error: {str(e)}")
-        return {"status": "error", "message": str(e)}
+        # record() only inserts (and credits) an order_id it has not seen before
+        if not await donation_capture.record("smart_collect", donation_doc):
+            logger.info(f"Smart Collect payment already processed: {payment_id}")
+            return {"status": "already_processed"}
+        
+        logger.info(f"Smart Collect payment SUCCESS: ₹{amount} for collection {collection_id}")
+        return {"status": "processed", "amount": amount, "collection_id": collection_id}
+    
+    return {"status": "ignored", "reason": f"Unhandled event: {event_type}"}
 
 
-# ==================== SMART COLLECT WEBHOOK ====================
-@api_router.post("/webhooks/smart-collect")
-async def smart_collect_webhook(request: Request):
-    """Handle Razorpay Smart Collect Virtual Account payment webhooks"""
-    try:
-        body = await request.body()
-        payload = json.loads(body)
+# ==================== RAZORPAYX PAYOUT WEBHOOK ====================
+async def process_payout_event(payload: dict) -> dict:
+    """Apply a RazorpayX payout status webhook event"""
+    event_type = payload.get("event")
+    logger.info(f"RazorpayX Payout webhook received: {event_type}")
+    
+    # Handle payout events
+    if event_type in ["payout.processed", "payout.reversed", "payout.failed", "payout.rejected", "payout.queued"]:
+        payout_entity = payload.get("payload", {}).get("payout", {}).get("entity", {})
+        
+        payout_id = payout_entity.get("id")
+        payout_status = payout_entity.get("status")
+        reference_id = payout_entity.get("reference_id")  # This is our withdrawal_id
+        
+        logger.info(f"Payout {payout_id} status: {payout_status}, reference: {reference_id}")
+        
+        if not reference_id:
+            logger.warning(f"Payout webhook: No reference_id in payload")
+            return {"status": "ok", "message": "No reference_id"}
+        
+        # Find withdrawal by razorpay_payout_id or by reference_id (withdrawal_id)
+        withdrawal = await db.withdrawals.find_one({
+            "$or": [
+                {"razorpay_payout_id": payout_id},
+                {"id": reference_id}
+            ]
+        }, {"_id": 0})
         
-        event_type = payload.get("event")
-        logger.info(f"Smart Collect webhook received: {event_type}")
+        if not withdrawal:
+            logger.warning(f"Payout webhook: Withdrawal not found for payout {payout_id}")
+            return {"status": "ok", "message": "Withdrawal not found"}
         
-        # Handle virtual_account.credited event
-        if event_type == "virtual_account.credited":
-            va_entity = payload.get("payload", {}).get("virtual_account", {}).get("entity", {})
-            payment_entity = payload.get("payload", {}).get("payment", {}).get("entity", {})
-            
-            virtual_account_id = va_entity.get("id")
-            amount_paise = payment_entity.get("amount", 0)
-            amount = amount_paise / 100  # Convert to rupees
-            payment_id = payment_entity.get("id")
-            
-            # Get collection notes to find collection_id
-            notes = va_entity.get("notes", {})
-            collection_id = notes.get("collection_id")
-            
-            if not collection_id:
-                # Try to find collection by virtual_account.id
-                collection = await db.collections.find_one(
-                    {"virtual_account.id": virtual_account_id}, 
-                    {"_id": 0}
+        withdrawal_id = withdrawal["id"]
+        now = datetime.now(timezone.utc).isoformat()
+        # The in-flight attempt that created this payout: one that started before the payout
+        # existed (allowing a minute of clock skew), never a later attempt after an old payout
+        attempt_query = None
+        if payout_entity.get("created_at"):
+            created = datetime.fromtimestamp(payout_entity["created_at"] + 60, timezone.utc).isoformat()
+            attempt_query = {
+                "id": withdrawal_id,
+                "status": WithdrawalStatus.PROCESSING.value,
+                "razorpay_payout_id": None,
+                "payout_attempt.started_at": {"$lte": created}
+            }
+        query = {"razorpay_payout_id": payout_id}
+        if attempt_query:
+            query = {"$or": [query, attempt_query]}
+        
+        update_data = payout_final_update(payout_entity, now)
+        if update_data:
+            update_data["razorpay_payout_id"] = payout_id
+            # Conditional transition: a redelivered or retried event, or one racing the
+            # reconciler or a manual sync, refunds and counts at most once
+            if await settle_withdrawal(query, update_data):
+                logger.info(f"Withdrawal {withdrawal_id} {update_data['status']} via webhook ({payout_status})")
+            else:
+                logger.info(f"Withdrawal {withdrawal_id} already settled, ignoring payout {payout_status}")
+        elif payout_status in ["queued", "processing"]:
+            # Still in flight (queued means low balance): just record the payout id if it is new
+            if attempt_query:
+                await db.withdrawals.update_one(
+                    attempt_query,
+                    {"$set": {"razorpay_payout_id": payout_id, "updated_at": now}, "$unset": {"payout_attempt": ""}}
                 )
-                if collection:
-                    collection_id = collection.get("id")
-            
-            if not collection_id:
-                logger.warning(f"Smart Collect payment for unknown virtual account: {virtual_account_id}")
-                return {"status": "ignored", "reason": "Collection not found"}
-            
-            now = datetime.now(timezone.utc).isoformat()
-            
-            # Extract payer details
-            payer_bank = payment_entity.get("bank", "Unknown")
-            payer_account = payment_entity.get("bank_reference") or payment_entity.get("acquirer_data", {}).get("bank_transaction_id", "")
-            method = payment_entity.get("method", "bank_transfer")
-            
-            # Check if this payment already exists (prevent duplicates)
-            existing = await db.donations.find_one({"razorpay_payment_id": payment_id})
-            if existing:
-                logger.info(f"Smart Collect payment already processed: {payment_id}")
-                return {"status": "already_processed"}
-            
-            # Create donation record
-            donation_doc = {
-                "id": str(uuid.uuid4()),
-                "collection_id": collection_id,
-                "order_id": f"sc_{payment_id[-12:]}",  # Smart Collect order ID
-                "razorpay_payment_id": payment_id,
-                "donor_name": f"Bank Transfer ({payer_bank})",
-                "donor_email": None,
-                "donor_phone": None,
-                "amount": amount,
-                "message": f"Via {method.upper()} - Ref: {payer_account}",
-                "anonymous": True,  # Bank transfers are anonymous
-                "status": PaymentStatus.SUCCESS.value,
-                "payment_method": method,
-                "payment_type": "smart_collect",
-                "created_at": now,
+            logger.info(f"Withdrawal {withdrawal_id} payout is {payout_status}")
+        
+        return {"status": "ok", "message": f"Payout {payout_status}"}
+    
+    return {"status": "ok", "message": "Event not handled"}
+
+
+# ==================== WEBHOOK INBOX ====================
+class WebhookInbox:
+    """Durable inbox for Razorpay webhooks.
+
+    Endpoints only persist the raw body (keyed by source + Razorpay event id, so
+    redeliveries are dropped by the unique index) and ack. Worker tasks claim
+    pending events, run the matching processor, retry failures with exponential
+    backoff and dead-letter events that keep failing.
+    """
+
+    def __init__(self, processors: dict, workers: int, max_attempts: int, lock_timeout: float, poll_interval: float):
+        self.processors = processors
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.lock_timeout = lock_timeout
+        self.poll_interval = poll_interval
+        self._tasks = []
+        self._wakeup = asyncio.Event()
+        # Metrics
+        self.accepted = 0
+        self.rejected = 0
+        self.duplicates = 0
+        self.processed = 0
+        self.retried = 0
+        self.dead_lettered = 0
+
+    async def accept(self, source: str, event_id: str, body: bytes) -> bool:
+        """Persist an incoming event. Returns False if it was already received."""
+        now = datetime.now(timezone.utc).isoformat()
+        try:
+            await db.webhook_events.insert_one({
+                "event_id": f"{source}:{event_id}",
+                "source": source,
+                "body": body.decode("utf-8", errors="replace"),
+                "status": "pending",
+                "attempts": 0,
+                "next_attempt_at": now,
+                "last_error": None,
+                "received_at": now,
                 "updated_at": now
-            }
-            
-            await db.donations.insert_one(donation_doc)
-            
-            # Update collection amount
-            await db.collections.update_one(
-                {"id": collection_id},
-                {
-                    "$inc": {"current_amount": amount, "donor_count": 1},
-                    "$set": {"updated_at": now}
-                }
+            })
+        except DuplicateKeyError:
+            self.duplicates += 1
+            return False
+        self.accepted += 1
+        self._wakeup.set()
+        return True
+
+    def start(self):
+        self._wakeup = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _claim(self) -> Optional[dict]:
+        now = datetime.now(timezone.utc)
+        stale_before = (now - timedelta(seconds=self.lock_timeout)).isoformat()
+        now = now.isoformat()
+        return await db.webhook_events.find_one_and_update(
+            {"$or": [
+                {"status": "pending", "next_attempt_at": {"$lte": now}},
+                # Reclaim events whose worker died mid-processing
+                {"status": "processing", "locked_at": {"$lte": stale_before}}
+            ]},
+            {"$set": {"status": "processing", "locked_at": now, "updated_at": now}, "$inc": {"attempts": 1}},
+            sort=[("received_at", 1)],
+            projection={"_id": 0},
+            return_document=ReturnDocument.AFTER
+        )
+
+    async def _worker(self):
+        while True:
+            try:
+                event = await self._claim()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Webhook inbox claim error: {str(e)}")
+                event = None
+            if event is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            try:
+                await self._process(event)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Recording the outcome failed; the event stays "processing" and is reclaimed once its lock is stale
+                logger.error(f"Webhook inbox error processing {event['event_id']}: {str(e)}")
+
+    async def _process(self, event: dict):
+        event_id = event["event_id"]
+        try:
+            processor = self.processors[event["source"]]
+            result = await processor(json.loads(event["body"]))
+            processed_at = datetime.now(timezone.utc)
+            now = processed_at.isoformat()
+            await db.webhook_events.update_one(
+                {"event_id": event_id},
+                # processed_at is a BSON date so the TTL index can expire done events
+                {"$set": {"status": "done", "result": result, "last_error": None, "processed_at": processed_at, "updated_at": now}}
             )
-            
-            logger.info(f"Smart Collect payment SUCCESS: ₹{amount} for collection {collection_id}")
-            return {"status": "processed", "amount": amount, "collection_id": collection_id}
-        
-        return {"status": "ignored", "reason": f"Unhandled event: {event_type}"}
-        
+            self.processed += 1
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            now = datetime.now(timezone.utc)
+            update = {"last_error": str(e), "updated_at": now.isoformat()}
+            if event["attempts"] >= self.max_attempts:
+                update["status"] = "dead"
+                self.dead_lettered += 1
+                logger.error(f"Webhook {event_id} dead-lettered after {event['attempts']} attempts: {str(e)}")
+            else:
+                backoff = min(2 ** event["attempts"], 300)
+                update["status"] = "pending"
+                update["next_attempt_at"] = (now + timedelta(seconds=backoff)).isoformat()
+                self.retried += 1
+                logger.warning(f"Webhook {event_id} failed (attempt {event['attempts']}), retrying in {backoff}s: {str(e)}")
+            await db.webhook_events.update_one({"event_id": event_id}, {"$set": update})
+
+    def metrics(self) -> dict:
+        return {
+            "workers": len(self._tasks),
+            "accepted": self.accepted,
+            "rejected_signature": self.rejected,
+            "duplicates": self.duplicates,
+            "processed": self.processed,
+            "retried": self.retried,
+            "dead_lettered": self.dead_lettered
+        }
+
+
+webhook_inbox = WebhookInbox(
+    {
+        "payment": process_payment_event,
+        "smart_collect": process_smart_collect_event,
+        "payout": process_payout_event
+    },
+    workers=WEBHOOK_WORKERS,
+    max_attempts=WEBHOOK_MAX_ATTEMPTS,
+    lock_timeout=WEBHOOK_LOCK_TIMEOUT,
+    poll_interval=WEBHOOK_POLL_INTERVAL
+)
+
+async def accept_webhook(request: Request, source: str) -> dict:
+    """Verify a webhook delivery's signature on the raw body, persist it to the inbox and ack it.
+    
+    The body is not parsed here; the inbox worker parses it exactly once.
+    """
+    body = await request.body()
+    if not RAZORPAY_WEBHOOK_SECRET:
+        # Without a secret nothing can be verified, and an unsigned payment event credits money
+        webhook_inbox.rejected += 1
+        logger.error(f"Rejected {source} webhook: RAZORPAY_WEBHOOK_SECRET is not set")
+        raise HTTPException(status_code=503, detail="Webhooks are not configured")
+    if not verify_webhook_signature(body, request.headers.get("x-razorpay-signature")):
+        webhook_inbox.rejected += 1
+        logger.warning(f"Rejected {source} webhook with missing or invalid signature")
+        raise HTTPException(status_code=401, detail="Invalid webhook signature")
+    try:
+        event_id = request.headers.get("x-razorpay-event-id") or hashlib.sha256(body).hexdigest()
+        accepted = await webhook_inbox.accept(source, event_id, body)
+        return {"status": "accepted" if accepted else "duplicate"}
     except Exception as e:
-        logger.error(f"Smart Collect webhook error: {str(e)}")
-        return {"status": "error", "message": str(e)}
+        # Non-2xx makes Razorpay redeliver, which is what we want if the event was not stored
+        logger.error(f"Webhook inbox error ({source}): {str(e)}")
+        raise HTTPException(status_code=500, detail="Could not store webhook")
 
+@api_router.post("/webhooks/payment")
+async def payment_webhook(request: Request):
+    """Handle Razorpay payment webhooks"""
+    return await accept_webhook(request, "payment")
+
+@api_router.post("/webhooks/smart-collect")
+async def smart_collect_webhook(request: Request):
+    """Handle Razorpay Smart Collect Virtual Account payment webhooks"""
+    return await accept_webhook(request, "smart_collect")
 
-# ==================== RAZORPAYX PAYOUT WEBHOOK ====================
 @api_router.post("/webhooks/payout")
 async def payout_webhook(request: Request):
     """Handle RazorpayX Payout status webhooks"""
+    return await accept_webhook(request, "payout")
+
+@api_router.get("/admin/webhooks")
+async def get_webhook_events(
+    status: Optional[str] = Query("dead"),
+    admin_user: dict = Depends(get_admin_user)
+):
+    """List webhook inbox events, dead-lettered ones by default (admin only)"""
     try:
-        body = await request.body()
-        payload = await request.json()
-        
-        event_type = payload.get("event")
-        logger.info(f"RazorpayX Payout webhook received: {event_type}")
-        
-        # Handle payout events
-        if event_type in ["payout.processed", "payout.reversed", "payout.failed", "payout.rejected", "payout.queued"]:
-            payout_entity = payload.get("payload", {}).get("payout", {}).get("entity", {})
-            
-            payout_id = payout_entity.get("id")
-            payout_status = payout_entity.get("status")
-            reference_id = payout_entity.get("reference_id")  # This is our withdrawal_id
-            failure_reason = payout_entity.get("failure_reason")
-            utr = payout_entity.get("utr")  # Unique Transaction Reference
-            
-            logger.info(f"Payout {payout_id} status: {payout_status}, reference: {reference_id}")
-            
-            if not reference_id:
-                logger.warning(f"Payout webhook: No reference_id in payload")
-                return {"status": "ok", "message": "No reference_id"}
-            
-            # Find withdrawal by razorpay_payout_id or by reference_id (withdrawal_id)
-            withdrawal = await db.withdrawals.find_one({
-                "$or": [
-                    {"razorpay_payout_id": payout_id},
-                    {"id": reference_id}
-                ]
-            }, {"_id": 0})
-            
-            if not withdrawal:
-                logger.warning(f"Payout webhook: Withdrawal not found for payout {payout_id}")
-                return {"status": "ok", "message": "Withdrawal not found"}
-            
-            withdrawal_id = withdrawal["id"]
-            now = datetime.now(timezone.utc).isoformat()
-            
-            # Map RazorpayX status to our withdrawal status
-            update_data = {"updated_at": now}
-            
-            if payout_status == "processed":
-                update_data["status"] = WithdrawalStatus.COMPLETED.value
-                update_data["processed_at"] = now
-                update_data["utr"] = utr
-                update_data["failure_reason"] = None
-                logger.info(f"Withdrawal {withdrawal_id} completed via webhook. UTR: {utr}")
-                
-            elif payout_status in ["failed", "rejected", "reversed"]:
-                update_data["status"] = WithdrawalStatus.FAILED.value
-                update_data["failure_reason"] = failure_reason or f"Payout {payout_status}"
-                
-                # Refund the reserved amount back to collection
-                await db.collections.update_one(
-                    {"id": withdrawal["collection_id"]},
-                    {"$inc": {"withdrawn_amount": -withdrawal["amount"]}}
-                )
-                logger.info(f"Withdrawal {withdrawal_id} failed via webhook: {failure_reason}")
-                
-            elif payout_status == "queued":
-                # Keep as processing - payout is queued due to low balance
-                update_data["status"] = WithdrawalStatus.PROCESSING.value
-                logger.info(f"Withdrawal {withdrawal_id} queued (low balance)")
-            
-            elif payout_status == "processing":
-                update_data["status"] = WithdrawalStatus.PROCESSING.value
-                logger.info(f"Withdrawal {withdrawal_id} is processing")
-            
-            # Update the withdrawal
-            await db.withdrawals.update_one(
-                {"id": withdrawal_id},
-                {"$set": update_data}
-            )
-            
-            return {"status": "ok", "message": f"Payout {payout_status}"}
-        
-        return {"status": "ok", "message": "Event not handled"}
-        
+        query = {"status": status} if status else {}
+        cursor = db.webhook_events.find(query, {"_id": 0}).sort("received_at", -1)
+        return await cursor.to_list(100)
+    except Exception as e:
+        logger.error(f"Error fetching webhook events: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@api_router.post("/admin/webhooks/{event_id}/retry")
+async def retry_webhook_event(event_id: str, admin_user: dict = Depends(get_admin_user)):
+    """Requeue a dead-lettered webhook event (admin only)"""
+    try:
+        now = datetime.now(timezone.utc).isoformat()
+        result = await db.webhook_events.update_one(
+            {"event_id": event_id, "status": "dead"},
+            {"$set": {"status": "pending", "attempts": 0, "next_attempt_at": now, "updated_at": now}}
+        )
+        if not result.matched_count:
+            raise HTTPException(status_code=404, detail="Dead-lettered event not found")
+        webhook_inbox._wakeup.set()
+        return {"status": "success", "message": "Webhook event requeued"}
+    except HTTPException:
+        raise
     except Exception as e:
-        logger.error(f"Payout webhook error: {str(e)}")
-        return {"status": "error", "message": str(e)}
+        logger.error(f"Error retrying webhook event: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
 
 
 # ==================== VIRTUAL ACCOUNT ENDPOINT ====================
@@ -1205,64 +2934,29 @@ async def verify_razorpay_payment(payment_data: RazorpayPaymentVerify):
         logger.info(f"Verifying Razorpay payment: order={payment_data.razorpay_order_id}, payment={payment_data.razorpay_payment_id}")
         
         # Verify signature
-        params_dict = {
-            'razorpay_order_id': payment_data.razorpay_order_id,
-            'razorpay_payment_id': payment_data.razorpay_payment_id,
-            'razorpay_signature': payment_data.razorpay_signature
-        }
-        
-        try:
-            razorpay_client.utility.verify_payment_signature(params_dict)
-            logger.info(f"Signature verification successful for order {payment_data.razorpay_order_id}")
-        except razorpay.errors.SignatureVerificationError as sig_error:
-            logger.error(f"Razorpay signature verification failed for order {payment_data.razorpay_order_id}: {str(sig_error)}")
+        if not verify_razorpay_signature(
+            payment_data.razorpay_order_id,
+            payment_data.razorpay_payment_id,
+            payment_data.razorpay_signature
+        ):
+            logger.error(f"Razorpay signature verification failed for order {payment_data.razorpay_order_id}")
             raise HTTPException(status_code=400, detail="Payment signature verification failed")
-        except Exception as verify_error:
-            logger.error(f"Unexpected error during signature verification: {str(verify_error)}")
-            raise HTTPException(status_code=400, detail=f"Verification error: {str(verify_error)}")
-        
-        # Get donation record
-        donation = await db.donations.find_one(
-            {"razorpay_order_id": payment_data.razorpay_order_id}, 
-            {"_id": 0}
-        )
-        if not donation:
-            raise HTTPException(status_code=404, detail="Order not found")
-        
-        # If already processed, return current status
-        if donation.get("status") == PaymentStatus.SUCCESS.value:
-            return {
-                "order_id": donation.get("order_id"),
-                "status": "success",
-                "amount": donation.get("amount"),
-                "collection_id": donation.get("collection_id")
-            }
-        
-        now = datetime.now(timezone.utc).isoformat()
+        logger.info(f"Signature verification successful for order {payment_data.razorpay_order_id}")
         
-        # Update donation status
-        result = await db.donations.find_one_and_update(
-            {"razorpay_order_id": payment_data.razorpay_order_id, "status": PaymentStatus.PENDING.value},
-            {
-                "$set": {
-                    "status": PaymentStatus.SUCCESS.value,
-                    "razorpay_payment_id": payment_data.razorpay_payment_id,
-                    "updated_at": now
-                }
-            },
-            return_document=False
+        # Capture the pending donation; the post-image carries everything the response needs
+        donation = await donation_capture.capture(
+            "checkout",
+            {"razorpay_order_id": payment_data.razorpay_order_id},
+            {"razorpay_payment_id": payment_data.razorpay_payment_id}
         )
-        
-        # Update collection if status actually changed
-        if result:
-            await db.collections.update_one(
-                {"id": donation["collection_id"]},
-                {
-                    "$inc": {"current_amount": donation["amount"], "donor_count": 1},
-                    "$set": {"updated_at": now}
-                }
+        if not donation:
+            # Already processed (or unknown) - read it for the response
+            donation = await db.donations.find_one(
+                {"razorpay_order_id": payment_data.razorpay_order_id},
+                {"_id": 0}
             )
-            logger.info(f"Razorpay payment verified: SUCCESS for order {donation.get('order_id')}")
+            if not donation:
+                raise HTTPException(status_code=404, detail="Order not found")
         
         return {
             "order_id": donation.get("order_id"),
@@ -1329,14 +3023,19 @@ async def submit_kyc(kyc_data: KYCSubmit, current_user: dict = Depends(get_requi
         
         if existing_kyc:
             await db.kyc.update_one({"id": kyc_id}, {"$set": kyc_doc})
+            payout_fields = ["bank_account_number", "bank_ifsc", "bank_account_holder", "upi_id"]
+            if any(existing_kyc.get(f) != kyc_doc[f] for f in payout_fields):
+                await invalidate_payout_beneficiaries(current_user["id"])
         else:
             await db.kyc.insert_one(kyc_doc)
+        await bump_platform_counters("kyc", existing_kyc.get("status") if existing_kyc else None, KYCStatus.PENDING.value)
         
         # Update user's KYC status
         await db.users.update_one(
             {"id": current_user["id"]},
             {"$set": {"kyc_status": KYCStatus.PENDING.value}}
         )
+        invalidate_user_cache(current_user["id"])
         
         logger.info(f"KYC submitted for user {current_user['id']}")
         
@@ -1392,8 +3091,6 @@ async def get_kyc_status(current_user: dict = Depends(get_required_user)):
 async def create_razorpayx_contact(name: str, email: str, phone: str = None, contact_type: str = "vendor") -> tuple:
     """Create a RazorpayX contact for payouts"""
     try:
-        url = f"{RAZORPAY_API_URL}/contacts"
-        
         payload = {
             "name": name,
             "email": email,
@@ -1405,26 +3102,18 @@ async def create_razorpayx_contact(name: str, email: str, phone: str = None, con
         if phone:
             payload["contact"] = phone
         
-        async with aiohttp.ClientSession() as session:
-            auth_string = base64.b64encode(f"{RAZORPAY_KEY_ID}:{RAZORPAY_KEY_SECRET}".encode()).decode()
-            headers = {
-                "Content-Type": "application/json",
-                "Authorization": f"Basic {auth_string}"
-            }
+        status, result = await razorpay_http.post("/contacts", json_body=payload)
+        
+        if status in [200, 201]:
+            contact_id = result.get("id")
+            logger.info(f"RazorpayX contact created: {contact_id}")
+            return contact_id, None
+        else:
+            error = result.get("error", {})
+            error_msg = error.get("description", "Failed to create contact")
+            logger.error(f"RazorpayX contact creation failed: {result}")
+            return None, error_msg
             
-            async with session.post(url, json=payload, headers=headers) as resp:
-                result = await resp.json()
-                
-                if resp.status in [200, 201]:
-                    contact_id = result.get("id")
-                    logger.info(f"RazorpayX contact created: {contact_id}")
-                    return contact_id, None
-                else:
-                    error = result.get("error", {})
-                    error_msg = error.get("description", "Failed to create contact")
-                    logger.error(f"RazorpayX contact creation failed: {result}")
-                    return None, error_msg
-                    
     except Exception as e:
         logger.error(f"RazorpayX contact error: {str(e)}")
         return None, str(e)
@@ -1433,8 +3122,6 @@ async def create_razorpayx_contact(name: str, email: str, phone: str = None, con
 async def create_razorpayx_fund_account(contact_id: str, payout_mode: str, kyc: dict) -> tuple:
     """Create a RazorpayX fund account (bank or VPA) for a contact"""
     try:
-        url = f"{RAZORPAY_API_URL}/fund_accounts"
-        
         if payout_mode == "upi":
             # Get UPI ID from KYC - handle different possible field names
             upi_address = kyc.get("upi_id") or kyc.get("upi", {}).get("vpa") or kyc.get("upi", {}).get("address")
@@ -1472,80 +3159,117 @@ async def create_razorpayx_fund_account(contact_id: str, payout_mode: str, kyc:
             }
             logger.info(f"Creating bank fund account: XXXX{account_number[-4:]} ({ifsc})")
         
-        async with aiohttp.ClientSession() as session:
-            auth_string = base64.b64encode(f"{RAZORPAY_KEY_ID}:{RAZORPAY_KEY_SECRET}".encode()).decode()
-            headers = {
-                "Content-Type": "application/json",
-                "Authorization": f"Basic {auth_string}"
-            }
+        status, result = await razorpay_http.post("/fund_accounts", json_body=payload)
+        
+        if status in [200, 201]:
+            fund_account_id = result.get("id")
+            logger.info(f"RazorpayX fund account created: {fund_account_id}")
+            return fund_account_id, None
+        else:
+            error = result.get("error", {})
+            error_msg = error.get("description", "Failed to create fund account")
+            logger.error(f"RazorpayX fund account creation failed: {result}")
+            return None, error_msg
             
-            async with session.post(url, json=payload, headers=headers) as resp:
-                result = await resp.json()
-                
-                if resp.status in [200, 201]:
-                    fund_account_id = result.get("id")
-                    logger.info(f"RazorpayX fund account created: {fund_account_id}")
-                    return fund_account_id, None
-                else:
-                    error = result.get("error", {})
-                    error_msg = error.get("description", "Failed to create fund account")
-                    logger.error(f"RazorpayX fund account creation failed: {result}")
-                    return None, error_msg
-                    
     except Exception as e:
         logger.error(f"RazorpayX fund account error: {str(e)}")
         return None, str(e)
 
 
-async def process_razorpayx_payout(withdrawal_id: str, net_amount: float, payout_mode: str, kyc: dict, beneficiary_name: str, user_id: str):
-    """Process payout via RazorpayX Payouts API"""
+def payout_beneficiary_fingerprint(payout_mode: str, kyc: dict, contact_name: str) -> str:
+    """Hash of the payout destination and beneficiary name, so cached ids never outlive a KYC change"""
+    if payout_mode == "upi":
+        destination = [kyc.get("upi_id") or kyc.get("upi", {}).get("vpa") or kyc.get("upi", {}).get("address")]
+    else:
+        destination = [
+            kyc.get("bank_account_number") or kyc.get("bank_account", {}).get("number"),
+            kyc.get("bank_ifsc") or kyc.get("bank_account", {}).get("ifsc"),
+            kyc.get("bank_account_holder") or kyc.get("bank_account", {}).get("holder_name")
+        ]
+    raw = json.dumps([payout_mode, *destination, contact_name], separators=(",", ":"))
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+async def get_payout_fund_account(user_id: str, payout_mode: str, kyc: dict, contact_name: str, email: str, phone: str = None) -> tuple:
+    """Return (fund_account_id, fingerprint, error), creating the RazorpayX contact and fund account only on first use"""
+    fingerprint = payout_beneficiary_fingerprint(payout_mode, kyc, contact_name)
+    cached = await db.payout_beneficiaries.find_one(
+        {"user_id": user_id, "fingerprint": fingerprint}, {"_id": 0, "fund_account_id": 1}
+    )
+    if cached:
+        return cached["fund_account_id"], fingerprint, None
+    
+    contact_id, contact_error = await create_razorpayx_contact(name=contact_name, email=email, phone=phone)
+    if contact_error:
+        return None, fingerprint, f"Contact creation failed: {contact_error}"
+    
+    fund_account_id, fa_error = await create_razorpayx_fund_account(contact_id=contact_id, payout_mode=payout_mode, kyc=kyc)
+    if fa_error:
+        return None, fingerprint, f"Fund account creation failed: {fa_error}"
+    
+    await db.payout_beneficiaries.update_one(
+        {"user_id": user_id, "fingerprint": fingerprint},
+        {"$set": {
+            "payout_mode": payout_mode,
+            "contact_id": contact_id,
+            "fund_account_id": fund_account_id,
+            "created_at": datetime.now(timezone.utc).isoformat()
+        }},
+        upsert=True
+    )
+    return fund_account_id, fingerprint, None
+
+
+async def invalidate_payout_beneficiaries(user_id: str):
+    """Forget cached RazorpayX contacts/fund accounts after the user's payout details change"""
+    await db.payout_beneficiaries.delete_many({"user_id": user_id})
+
+
+def payout_idempotency_key(withdrawal_id: str, attempt: int) -> str:
+    """Stable key for one payout attempt, so RazorpayX dedupes any resend of it (max 36 chars)"""
+    return f"po{withdrawal_id.replace('-', '')[:32]}{attempt % 100:02d}"
+
+async def process_razorpayx_payout(withdrawal_id: str, net_amount: float, payout_mode: str, kyc: dict, beneficiary_name: str,
+                                   user_id: str, idempotency_key: str):
+    """Process payout via RazorpayX Payouts API.
+    
+    Returns (payout_id, error, uncertain); `uncertain` is True when the request may have
+    created a payout even though no payout id came back (timeout, 5xx).
+    """
+    sent = False
     try:
         if not RAZORPAY_KEY_ID or not RAZORPAY_KEY_SECRET:
             logger.warning("Razorpay keys not configured, skipping actual payout")
-            return None, "Razorpay keys not configured"
+            return None, "Razorpay keys not configured", False
         
         # Get user details
         user_doc = await db.users.find_one({"id": user_id}, {"_id": 0})
         if not user_doc:
-            return None, "User not found"
+            return None, "User not found", False
         
         # Get user email (required field, should always exist)
         user_email = user_doc.get("email")
         if not user_email:
-            return None, "User email not found"
+            return None, "User email not found", False
         
         # Get phone - try user profile first, then KYC (phone is optional)
         user_phone = user_doc.get("phone") or kyc.get("phone")
         
-        # Step 1: Create Contact
+        # Steps 1-2: Contact and Fund Account (reused from payout_beneficiaries when the KYC details match)
         contact_name = beneficiary_name or kyc.get("bank_account_holder", user_doc.get("name", "User"))
-        contact_id, contact_error = await create_razorpayx_contact(
-            name=contact_name,
+        fund_account_id, fingerprint, fa_error = await get_payout_fund_account(
+            user_id=user_id,
+            payout_mode=payout_mode,
+            kyc=kyc,
+            contact_name=contact_name,
             email=user_email,
             phone=user_phone  # Can be None - RazorpayX contact creation handles optional phone
         )
         
-        if contact_error:
-            return None, f"Contact creation failed: {contact_error}"
-        
-        # Step 2: Create Fund Account
-        fund_account_id, fa_error = await create_razorpayx_fund_account(
-            contact_id=contact_id,
-            payout_mode=payout_mode,
-            kyc=kyc
-        )
-        
         if fa_error:
-            return None, f"Fund account creation failed: {fa_error}"
+            return None, fa_error, False
         
         # Step 3: Create Payout
-        url = f"{RAZORPAY_API_URL}/payouts"
-        
-        # Generate unique idempotency key (max 36 chars)
-        import time
-        ts = int(time.time()) % 10000  # Last 4 digits of timestamp
-        idempotency_key = f"po{withdrawal_id[:28]}{ts}"  # 2 + 28 + 4 = 34 chars
-        
         # Amount in paise
         amount_paise = int(net_amount * 100)
         
@@ -1564,36 +3288,52 @@ async def process_razorpayx_payout(withdrawal_id: str, net_amount: float, payout
             "narration": "FundFlow Payout"
         }
         
-        async with aiohttp.ClientSession() as session:
-            auth_string = base64.b64encode(f"{RAZORPAY_KEY_ID}:{RAZORPAY_KEY_SECRET}".encode()).decode()
-            headers = {
-                "Content-Type": "application/json",
-                "Authorization": f"Basic {auth_string}",
-                "X-Payout-Idempotency": idempotency_key
-            }
+        sent = True
+        resp_status, result = await razorpay_http.post(
+            "/payouts",
+            json_body=payload,
+            headers={"X-Payout-Idempotency": idempotency_key}
+        )
+        logger.info(f"RazorpayX Payout response for {withdrawal_id}: {result}")
+        
+        if resp_status in [200, 201]:
+            payout_id = result.get("id")
+            status = result.get("status")
+            
+            if status in ["processing", "processed", "queued"]:
+                logger.info(f"RazorpayX payout initiated: {payout_id} - Status: {status}")
+                return payout_id, None, False
+            else:
+                return payout_id, f"Payout status: {status}", False
+        else:
+            error = result.get("error", {})
+            error_msg = error.get("description", "Payout failed")
+            logger.error(f"RazorpayX payout failed: {result}")
+            if error.get("field") == "fund_account_id":
+                # Cached fund account is no longer usable; the next attempt creates a fresh one
+                await db.payout_beneficiaries.delete_one({"user_id": user_id, "fingerprint": fingerprint})
+            # A 5xx may have been raised after the payout was created
+            return None, error_msg, resp_status >= 500
             
-            async with session.post(url, json=payload, headers=headers) as resp:
-                result = await resp.json()
-                logger.info(f"RazorpayX Payout response for {withdrawal_id}: {result}")
-                
-                if resp.status in [200, 201]:
-                    payout_id = result.get("id")
-                    status = result.get("status")
-                    
-                    if status in ["processing", "processed", "queued"]:
-                        logger.info(f"RazorpayX payout initiated: {payout_id} - Status: {status}")
-                        return payout_id, None
-                    else:
-                        return payout_id, f"Payout status: {status}"
-                else:
-                    error = result.get("error", {})
-                    error_msg = error.get("description", "Payout failed")
-                    logger.error(f"RazorpayX payout failed: {result}")
-                    return None, error_msg
-                    
     except Exception as e:
         logger.error(f"RazorpayX Payout error: {str(e)}")
+        return None, str(e), sent
+
+async def find_razorpayx_payout_by_reference(withdrawal_id: str) -> tuple:
+    """Look up a live (not failed) RazorpayX payout created for a withdrawal. Returns (payout or None, error)."""
+    try:
+        status, result = await razorpay_http.get("/payouts", params={
+            "account_number": RAZORPAYX_ACCOUNT_NUMBER,
+            "reference_id": withdrawal_id[:36]
+        })
+    except Exception as e:
         return None, str(e)
+    if status != 200:
+        return None, result.get("error", {}).get("description", f"Payout lookup failed ({status})")
+    for payout in result.get("items", []):
+        if payout.get("status") not in ["failed", "rejected", "reversed", "cancelled"]:
+            return payout, None
+    return None, None
 
 
 @api_router.post("/withdrawals/request", response_model=WithdrawalResponse)
@@ -1611,6 +3351,7 @@ async def request_withdrawal(request: WithdrawalRequest, current_user: dict = De
         )
         if not collection:
             raise HTTPException(status_code=404, detail="Collection not found or not owned by you")
+        await apply_counter_shards([collection])
         
         # Calculate available amount (total raised - already withdrawn)
         withdrawn_amount = collection.get("withdrawn_amount", 0)
@@ -1623,8 +3364,7 @@ async def request_withdrawal(request: WithdrawalRequest, current_user: dict = De
             raise HTTPException(status_code=400, detail=f"Insufficient balance. Available: ₹{available_amount}")
         
         # Get platform fee
-        settings = await db.settings.find_one({"key": "platform"}, {"_id": 0})
-        fee_percentage = settings.get("platform_fee_percentage", 2.5) if settings else 2.5
+        fee_percentage = platform_settings.fee_percentage
         
         platform_fee = round(request.amount * fee_percentage / 100, 2)
         net_amount = round(request.amount - platform_fee, 2)
@@ -1661,12 +3401,14 @@ async def request_withdrawal(request: WithdrawalRequest, current_user: dict = De
         }
         
         await db.withdrawals.insert_one(withdrawal_doc)
+        await bump_platform_counters("withdrawals", None, withdrawal_doc["status"])
         
         # Reserve the amount (update collection's withdrawn amount)
         await db.collections.update_one(
             {"id": request.collection_id},
             {"$inc": {"withdrawn_amount": request.amount}}
         )
+        invalidate_collection_listings()
         
         logger.info(f"Withdrawal requested: {withdrawal_id} for ₹{request.amount} - pending admin approval")
         
@@ -1733,19 +3475,18 @@ async def check_withdrawal_status(withdrawal_id: str, current_user: dict = Depen
                     elif cf_status in ["PENDING", "PROCESSING", "RECEIVED"]:
                         new_status = WithdrawalStatus.PROCESSING.value
                     
-                    # Update if status changed
-                    if new_status != withdrawal["status"]:
-                        await db.withdrawals.update_one(
-                            {"id": withdrawal_id},
-                            {"$set": {"status": new_status, "updated_at": datetime.now(timezone.utc).isoformat()}}
+                    # Update if status changed (final states refund and count only once)
+                    now = datetime.now(timezone.utc).isoformat()
+                    if new_status in WITHDRAWAL_SETTLE_FROM:
+                        if not await settle_withdrawal({"id": withdrawal_id}, {"status": new_status, "updated_at": now}):
+                            new_status = (await db.withdrawals.find_one({"id": withdrawal_id}, {"_id": 0, "status": 1}))["status"]
+                    elif new_status != withdrawal["status"]:
+                        moved = await db.withdrawals.update_one(
+                            {"id": withdrawal_id, "status": withdrawal["status"]},
+                            {"$set": {"status": new_status, "updated_at": now}}
                         )
-                        
-                        # If failed, refund the withdrawn amount
-                        if new_status == WithdrawalStatus.FAILED.value:
-                            await db.collections.update_one(
-                                {"id": withdrawal["collection_id"]},
-                                {"$inc": {"withdrawn_amount": -withdrawal["amount"]}}
-                            )
+                        if moved.matched_count:
+                            await bump_withdrawal_counters(withdrawal, new_status)
                     
                     return {"status": new_status, "cf_status": cf_status, "cf_description": cf_response.get("status_description")}
                 else:
@@ -1777,7 +3518,7 @@ async def admin_login(credentials: UserLogin):
                 "id": admin_id,
                 "name": "Admin",
                 "email": ADMIN_EMAIL.lower(),
-                "password": get_password_hash(ADMIN_PASSWORD),
+                "password": await get_password_hash(ADMIN_PASSWORD),
                 "phone": None,
                 "is_admin": True,
                 "kyc_status": KYCStatus.APPROVED.value,
@@ -1787,7 +3528,7 @@ async def admin_login(credentials: UserLogin):
             await db.users.insert_one(admin_user)
         
         # Verify password
-        if not verify_password(credentials.password, admin_user["password"]):
+        if not await verify_password(credentials.password, admin_user["password"], admin_user["id"]):
             raise HTTPException(status_code=401, detail="Invalid admin credentials")
         
         access_token = create_access_token(data={"sub": admin_user["id"]})
@@ -1824,10 +3565,11 @@ async def get_kyc_requests(
         cursor = db.kyc.find(query, {"_id": 0}).sort("created_at", -1)
         kyc_list = await cursor.to_list(100)
         
-        # Get user details for each KYC
+        # Get user details for all KYC records in one query
+        users = await fetch_docs_by_field(db.users, "id", [k["user_id"] for k in kyc_list], {"name": 1, "email": 1})
         result = []
         for kyc in kyc_list:
-            user = await db.users.find_one({"id": kyc["user_id"]}, {"_id": 0, "password": 0})
+            user = users.get(kyc["user_id"])
             result.append({
                 **kyc,
                 "user_name": user["name"] if user else "Unknown",
@@ -1878,6 +3620,8 @@ async def review_kyc(
             {"id": kyc["user_id"]},
             {"$set": {"kyc_status": review.status}}
         )
+        invalidate_user_cache(kyc["user_id"])
+        await bump_platform_counters("kyc", kyc.get("status"), review.status)
         
         logger.info(f"KYC {kyc_id} {review.status} by admin {admin_user['id']}")
         
@@ -1892,10 +3636,7 @@ async def review_kyc(
 async def get_platform_settings(admin_user: dict = Depends(get_admin_user)):
     """Get platform settings (admin only)"""
     try:
-        settings = await db.settings.find_one({"key": "platform"}, {"_id": 0})
-        if not settings:
-            return {"platform_fee_percentage": 2.5}
-        return {"platform_fee_percentage": settings.get("platform_fee_percentage", 2.5)}
+        return {"platform_fee_percentage": platform_settings.fee_percentage}
     except Exception as e:
         logger.error(f"Error fetching settings: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -1910,16 +3651,9 @@ async def update_platform_settings(
         if settings.platform_fee_percentage < 0 or settings.platform_fee_percentage > 100:
             raise HTTPException(status_code=400, detail="Fee percentage must be between 0 and 100")
         
-        await db.settings.update_one(
-            {"key": "platform"},
-            {
-                "$set": {
-                    "platform_fee_percentage": settings.platform_fee_percentage,
-                    "updated_at": datetime.now(timezone.utc).isoformat(),
-                    "updated_by": admin_user["id"]
-                }
-            },
-            upsert=True
+        await platform_settings.update(
+            {"platform_fee_percentage": settings.platform_fee_percentage},
+            updated_by=admin_user["id"]
         )
         
         logger.info(f"Platform fee updated to {settings.platform_fee_percentage}% by admin {admin_user['id']}")
@@ -1945,12 +3679,18 @@ async def get_all_withdrawals(
         cursor = db.withdrawals.find(query, {"_id": 0}).sort("created_at", -1)
         withdrawals = await cursor.to_list(100)
         
-        # Enrich with user and collection details
+        # Enrich with user and collection details (one batched query per collection)
+        user_ids = [w["user_id"] for w in withdrawals]
+        users, collections, kyc_records = await asyncio.gather(
+            fetch_docs_by_field(db.users, "id", user_ids, {"name": 1, "email": 1}),
+            fetch_docs_by_field(db.collections, "id", [w["collection_id"] for w in withdrawals], {"title": 1}),
+            fetch_docs_by_field(db.kyc, "user_id", user_ids, {"bank_account_number": 1, "bank_ifsc": 1, "upi_id": 1})
+        )
         result = []
         for w in withdrawals:
-            user = await db.users.find_one({"id": w["user_id"]}, {"_id": 0, "password": 0})
-            collection = await db.collections.find_one({"id": w["collection_id"]}, {"_id": 0})
-            kyc = await db.kyc.find_one({"user_id": w["user_id"]}, {"_id": 0})
+            user = users.get(w["user_id"])
+            collection = collections.get(w["collection_id"])
+            kyc = kyc_records.get(w["user_id"])
             
             result.append({
                 **w,
@@ -1969,6 +3709,288 @@ async def get_all_withdrawals(
         logger.error(f"Error fetching withdrawals: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+class AsyncRateLimiter:
+    """Spaces operations out to at most `rate` starts per second (0 disables the limit)"""
+
+    def __init__(self, rate: float):
+        self.interval = 1 / rate if rate > 0 else 0
+        self._next_slot = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self):
+        if not self.interval:
+            return
+        async with self._lock:
+            now = asyncio.get_running_loop().time()
+            delay = self._next_slot - now
+            self._next_slot = max(now, self._next_slot) + self.interval
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+payout_slots = None
+payout_rate_limiter = None
+bulk_withdrawal_tasks = set()
+
+
+def start_payout_dispatch():
+    """Create this process's payout concurrency slots and rate limiter"""
+    global payout_slots, payout_rate_limiter
+    payout_slots = asyncio.Semaphore(PAYOUT_CONCURRENCY)
+    payout_rate_limiter = AsyncRateLimiter(PAYOUT_RATE_LIMIT)
+
+# Statuses a withdrawal may leave for each final payout status. A processed payout can
+# still be reversed, so COMPLETED -> FAILED is allowed; FAILED is terminal.
+WITHDRAWAL_SETTLE_FROM = {
+    WithdrawalStatus.COMPLETED.value: [WithdrawalStatus.PROCESSING.value],
+    WithdrawalStatus.FAILED.value: [WithdrawalStatus.PROCESSING.value, WithdrawalStatus.COMPLETED.value],
+}
+
+def withdrawal_refund(withdrawal: dict) -> UpdateOne:
+    """Collection update returning a failed withdrawal's amount, a no-op if already applied"""
+    return UpdateOne(
+        {"id": withdrawal["collection_id"], "refunded_withdrawals": {"$ne": withdrawal["id"]}},
+        {
+            "$inc": {"withdrawn_amount": -withdrawal["amount"]},
+            # Recent refunds only need remembering until their refund_pending flag is cleared
+            "$push": {"refunded_withdrawals": {"$each": [withdrawal["id"]], "$slice": -100}}
+        }
+    )
+
+async def refund_withdrawals(withdrawals: List[dict]):
+    """Return failed withdrawals' reserved amounts to their collections, at most once per withdrawal"""
+    if not withdrawals:
+        return
+    await db.collections.bulk_write([withdrawal_refund(w) for w in withdrawals], ordered=False)
+    await db.withdrawals.update_many(
+        {"id": {"$in": [w["id"] for w in withdrawals]}}, {"$unset": {"refund_pending": ""}}
+    )
+    invalidate_collection_listings()
+
+async def refund_withdrawal(withdrawal: dict):
+    """Return a failed withdrawal's reserved amount to its collection, at most once per withdrawal"""
+    await refund_withdrawals([withdrawal])
+
+def settle_fields(update_data: dict) -> dict:
+    """The $set for a final status; FAILED carries refund_pending so an interrupted refund is finished later"""
+    fields = dict(update_data)
+    if update_data["status"] == WithdrawalStatus.FAILED.value:
+        fields["refund_pending"] = True
+    return fields
+
+async def settle_withdrawal(query: dict, update_data: dict) -> Optional[dict]:
+    """Move the withdrawal matching `query` to the final status in `update_data`.
+    
+    Webhooks, manual syncs and the reconciler all go through this one conditional
+    find_one_and_update: only the caller whose update matched bumps the counters and
+    refunds. Returns the withdrawal as it was before the update, or None if nothing moved.
+    """
+    new_status = update_data["status"]
+    before = await db.withdrawals.find_one_and_update(
+        {**query, "status": {"$in": WITHDRAWAL_SETTLE_FROM[new_status]}},
+        {"$set": settle_fields(update_data), "$unset": {"payout_attempt": ""}},
+        projection={"_id": 0}
+    )
+    if before:
+        await bump_withdrawal_counters(before, new_status)
+    pending = before if before and new_status == WithdrawalStatus.FAILED.value else \
+        await db.withdrawals.find_one({**query, "refund_pending": True}, {"_id": 0})
+    if pending:
+        await refund_withdrawal(pending)
+    return before
+
+async def finish_pending_refunds() -> int:
+    """Complete refunds whose withdrawal failed but whose refund was interrupted"""
+    pending = await db.withdrawals.find({"refund_pending": True}, {"_id": 0}).to_list(None)
+    await refund_withdrawals(pending)
+    return len(pending)
+
+async def claim_withdrawals(withdrawal_ids: List[str], claim_id: str) -> List[dict]:
+    """Atomically lock the still-pending withdrawals among `withdrawal_ids` for one processor.
+    
+    Withdrawals whose previous claim went stale are marked `reclaimed`, so approval checks
+    RazorpayX for a payout the earlier processor may already have created.
+    """
+    now = datetime.now(timezone.utc)
+    stale = (now - timedelta(seconds=WITHDRAWAL_CLAIM_TIMEOUT)).isoformat()
+    pending = {"id": {"$in": withdrawal_ids}, "status": WithdrawalStatus.PENDING.value}
+    claim = {"claim_id": claim_id, "claimed_at": now.isoformat()}
+    await db.withdrawals.update_many({**pending, "claim_id": None}, {"$set": {**claim, "reclaimed": False}})
+    await db.withdrawals.update_many(
+        {**pending, "claim_id": {"$nin": [None, claim_id]}, "claimed_at": {"$lt": stale}},
+        {"$set": {**claim, "reclaimed": True}}
+    )
+    return await db.withdrawals.find({"claim_id": claim_id}, {"_id": 0}).to_list(None)
+
+async def release_withdrawal(withdrawal: dict, update_data: dict) -> bool:
+    """Apply the outcome of a claimed PENDING withdrawal and drop its claim. Returns False if the claim was lost."""
+    result = await db.withdrawals.update_one(
+        {"id": withdrawal["id"], "claim_id": withdrawal["claim_id"], "status": WithdrawalStatus.PENDING.value},
+        {"$set": update_data, "$unset": {"claim_id": "", "claimed_at": "", "reclaimed": ""}}
+    )
+    if not result.matched_count:
+        return False
+    if update_data.get("status"):
+        await bump_withdrawal_counters(withdrawal, update_data["status"])
+    return True
+
+async def finish_payout_attempt(withdrawal: dict, key: str, update: dict) -> bool:
+    """Record the outcome of the payout attempt `key`, unless something else already did"""
+    result = await db.withdrawals.update_one(
+        {"id": withdrawal["id"], "status": WithdrawalStatus.PROCESSING.value, "payout_attempt.key": key},
+        update
+    )
+    return bool(result.matched_count)
+
+async def approve_withdrawal(withdrawal: dict, admin_id: str) -> tuple:
+    """Send a claimed withdrawal to RazorpayX and record the outcome.
+    
+    Returns (update_data, error). Once a payout slot and rate-limit token are held, the
+    withdrawal moves to PROCESSING with a payout attempt marker, *before* RazorpayX is
+    called, so no other processor can claim it while the payout is in flight and the
+    attempt's age only counts time actually spent on RazorpayX. An attempt whose outcome
+    is unknown keeps the marker and is resolved by recover_payout_attempts. update_data
+    is empty if the claim was lost.
+    """
+    now = datetime.now(timezone.utc).isoformat()
+    
+    # Get user's KYC details for payout
+    kyc = await db.kyc.find_one({"user_id": withdrawal["user_id"]}, {"_id": 0})
+    if not kyc:
+        update_data = {"updated_at": now}
+        return (update_data if await release_withdrawal(withdrawal, update_data) else {}), "User KYC not found"
+    
+    def approved_at(now: str) -> dict:
+        return {
+            "status": WithdrawalStatus.PROCESSING.value,
+            "failure_reason": None,
+            "approved_by": admin_id,
+            "approved_at": now,
+            "updated_at": now
+        }
+    
+    # An earlier attempt or an expired claim may already have created a payout: adopt it
+    if withdrawal.get("payout_attempts") or withdrawal.get("reclaimed"):
+        existing, lookup_error = await find_razorpayx_payout_by_reference(withdrawal["id"])
+        if lookup_error:
+            update_data = {"updated_at": now}
+            error = f"Could not check RazorpayX for an existing payout: {lookup_error}"
+            return (update_data if await release_withdrawal(withdrawal, update_data) else {}), error
+        if existing:
+            update_data = {**approved_at(now), "razorpay_payout_id": existing["id"]}
+            if not await release_withdrawal(withdrawal, update_data):
+                return {}, "Withdrawal is no longer claimed by this request"
+            logger.info(f"Withdrawal {withdrawal['id']} adopted existing RazorpayX payout {existing['id']}")
+            return update_data, None
+    
+    attempt = withdrawal.get("payout_attempts", 0) + 1
+    key = payout_idempotency_key(withdrawal["id"], attempt)
+    user = await db.users.find_one({"id": withdrawal["user_id"]}, {"_id": 0, "name": 1})
+    
+    # Call RazorpayX Payout API within the process-wide concurrency and rate limits
+    async with payout_slots:
+        await payout_rate_limiter.wait()
+        # Start the attempt only now: a withdrawal still queued for a slot stays PENDING and
+        # claimed, so recovery never resets it while this task is about to send its payout
+        now = datetime.now(timezone.utc).isoformat()
+        approved = approved_at(now)
+        started = await db.withdrawals.update_one(
+            {"id": withdrawal["id"], "claim_id": withdrawal["claim_id"], "status": WithdrawalStatus.PENDING.value},
+            {
+                "$set": {**approved, "payout_attempt": {"key": key, "started_at": now}},
+                "$inc": {"payout_attempts": 1},
+                "$unset": {"claim_id": "", "claimed_at": "", "reclaimed": ""}
+            }
+        )
+        if not started.matched_count:
+            return {}, "Withdrawal is no longer claimed by this request"
+        await bump_withdrawal_counters(withdrawal, WithdrawalStatus.PROCESSING.value)
+        payout_id, payout_error, uncertain = await process_razorpayx_payout(
+            withdrawal_id=withdrawal["id"],
+            net_amount=withdrawal["net_amount"],
+            payout_mode=withdrawal["payout_mode"],
+            kyc=kyc,
+            beneficiary_name=user.get("name") if user else "User",
+            user_id=withdrawal["user_id"],
+            idempotency_key=key
+        )
+    now = datetime.now(timezone.utc).isoformat()
+    
+    if payout_id:
+        await finish_payout_attempt(withdrawal, key, {
+            "$set": {"razorpay_payout_id": payout_id, "updated_at": now},
+            "$unset": {"payout_attempt": ""}
+        })
+        logger.info(f"Withdrawal {withdrawal['id']} approved and sent to RazorpayX: {payout_id}")
+        return {**approved, "razorpay_payout_id": payout_id}, None
+    
+    logger.error(f"Withdrawal {withdrawal['id']} payout failed: {payout_error}")
+    if uncertain:
+        # Keep PROCESSING and the attempt marker: recover_payout_attempts checks RazorpayX later
+        failure_reason = f"Payout outcome unknown, will be reconciled: {payout_error}"
+        await finish_payout_attempt(withdrawal, key, {"$set": {"failure_reason": failure_reason, "updated_at": now}})
+        return {"status": WithdrawalStatus.PROCESSING.value, "failure_reason": failure_reason}, failure_reason
+    
+    # RazorpayX rejected the request, so no payout exists: back to pending with the error
+    update_data = {"status": WithdrawalStatus.PENDING.value, "failure_reason": f"Payout failed: {payout_error}", "updated_at": now}
+    if await finish_payout_attempt(withdrawal, key, {
+        "$set": update_data,
+        "$unset": {"payout_attempt": "", "approved_by": "", "approved_at": ""}
+    }):
+        await bump_withdrawal_counters({**withdrawal, "status": WithdrawalStatus.PROCESSING.value}, WithdrawalStatus.PENDING.value)
+    return update_data, f"Payout failed: {payout_error}"
+
+async def reject_withdrawal(withdrawal: dict, admin_id: str, failure_reason: Optional[str]) -> tuple:
+    """Reject a claimed withdrawal and refund its reserved amount. Returns (update_data, error)."""
+    now = datetime.now(timezone.utc).isoformat()
+    update_data = {
+        "status": WithdrawalStatus.FAILED.value,
+        "failure_reason": failure_reason or "Rejected by admin",
+        "rejected_by": admin_id,
+        "rejected_at": now,
+        "updated_at": now
+    }
+    # Refund only once the claim-conditional transition matched, so a lost claim never refunds
+    if not await release_withdrawal(withdrawal, {**update_data, "refund_pending": True}):
+        return {}, "Withdrawal is no longer claimed by this request"
+    await refund_withdrawal(withdrawal)
+    logger.info(f"Withdrawal {withdrawal['id']} rejected by admin {admin_id}")
+    return update_data, None
+
+async def recover_payout_attempts() -> dict:
+    """Resolve payout attempts whose outcome stayed unknown past WITHDRAWAL_CLAIM_TIMEOUT.
+    
+    RazorpayX is asked for a payout with the withdrawal's reference_id: a live one is
+    recorded on the withdrawal, otherwise the withdrawal goes back to PENDING.
+    """
+    stale = (datetime.now(timezone.utc) - timedelta(seconds=WITHDRAWAL_CLAIM_TIMEOUT)).isoformat()
+    stuck = await db.withdrawals.find(
+        {"status": WithdrawalStatus.PROCESSING.value, "payout_attempt.started_at": {"$lt": stale}}, {"_id": 0}
+    ).limit(100).to_list(100)
+    totals = {"adopted": 0, "reset": 0}
+    for withdrawal in stuck:
+        payout, lookup_error = await find_razorpayx_payout_by_reference(withdrawal["id"])
+        if lookup_error:
+            logger.warning(f"Payout lookup for withdrawal {withdrawal['id']} failed: {lookup_error}")
+            continue
+        now = datetime.now(timezone.utc).isoformat()
+        key = withdrawal["payout_attempt"]["key"]
+        if payout:
+            if await finish_payout_attempt(withdrawal, key, {
+                "$set": {"razorpay_payout_id": payout["id"], "failure_reason": None, "updated_at": now},
+                "$unset": {"payout_attempt": ""}
+            }):
+                totals["adopted"] += 1
+        elif await finish_payout_attempt(withdrawal, key, {
+            "$set": {"status": WithdrawalStatus.PENDING.value, "failure_reason": "Payout was not created", "updated_at": now},
+            "$unset": {"payout_attempt": "", "approved_by": "", "approved_at": ""}
+        }):
+            await bump_withdrawal_counters(withdrawal, WithdrawalStatus.PENDING.value)
+            totals["reset"] += 1
+    if totals["adopted"] or totals["reset"]:
+        logger.info(f"Recovered payout attempts: {totals}")
+    return totals
+
 @api_router.post("/admin/withdrawals/{withdrawal_id}/process")
 async def process_withdrawal(
     withdrawal_id: str,
@@ -1978,77 +4000,26 @@ async def process_withdrawal(
 ):
     """Process withdrawal - approve (sends to RazorpayX) or reject (admin only)"""
     try:
-        withdrawal = await db.withdrawals.find_one({"id": withdrawal_id}, {"_id": 0})
-        if not withdrawal:
-            raise HTTPException(status_code=404, detail="Withdrawal not found")
-        
-        if withdrawal["status"] not in [WithdrawalStatus.PENDING.value]:
+        claimed = await claim_withdrawals([withdrawal_id], str(uuid.uuid4()))
+        if not claimed:
+            withdrawal = await db.withdrawals.find_one({"id": withdrawal_id}, {"_id": 0, "status": 1})
+            if not withdrawal:
+                raise HTTPException(status_code=404, detail="Withdrawal not found")
+            if withdrawal["status"] == WithdrawalStatus.PENDING.value:
+                raise HTTPException(status_code=409, detail="Withdrawal is already being processed")
             raise HTTPException(status_code=400, detail="Only pending withdrawals can be processed")
-        
-        now = datetime.now(timezone.utc).isoformat()
+        withdrawal = claimed[0]
         
         if action == "approve":
-            # Get user's KYC details for payout
-            kyc = await db.kyc.find_one({"user_id": withdrawal["user_id"]}, {"_id": 0})
-            if not kyc:
-                raise HTTPException(status_code=400, detail="User KYC not found")
-            
-            user = await db.users.find_one({"id": withdrawal["user_id"]}, {"_id": 0})
-            
-            # Call RazorpayX Payout API
-            payout_id, payout_error = await process_razorpayx_payout(
-                withdrawal_id=withdrawal_id,
-                net_amount=withdrawal["net_amount"],
-                payout_mode=withdrawal["payout_mode"],
-                kyc=kyc,
-                beneficiary_name=user.get("name") if user else "User",
-                user_id=withdrawal["user_id"]
-            )
-            
-            if payout_id:
-                new_status = WithdrawalStatus.PROCESSING.value
-                update_data = {
-                    "status": new_status,
-                    "razorpay_payout_id": payout_id,
-                    "failure_reason": None,
-                    "approved_by": admin_user["id"],
-                    "approved_at": now,
-                    "updated_at": now
-                }
-                logger.info(f"Withdrawal {withdrawal_id} approved and sent to RazorpayX: {payout_id}")
-            else:
-                # Payout failed - keep as pending with error message
-                update_data = {
-                    "failure_reason": f"Payout failed: {payout_error}",
-                    "updated_at": now
-                }
-                logger.error(f"Withdrawal {withdrawal_id} payout failed: {payout_error}")
-                
-                await db.withdrawals.update_one({"id": withdrawal_id}, {"$set": update_data})
-                raise HTTPException(status_code=500, detail=f"Payout failed: {payout_error}")
+            update_data, error = await approve_withdrawal(withdrawal, admin_user["id"])
         else:
-            # Reject withdrawal
-            new_status = WithdrawalStatus.FAILED.value
-            if not failure_reason:
-                failure_reason = "Rejected by admin"
-            
-            update_data = {
-                "status": new_status,
-                "failure_reason": failure_reason,
-                "rejected_by": admin_user["id"],
-                "rejected_at": now,
-                "updated_at": now
-            }
-            
-            # Refund the reserved amount back to collection
-            await db.collections.update_one(
-                {"id": withdrawal["collection_id"]},
-                {"$inc": {"withdrawn_amount": -withdrawal["amount"]}}
-            )
-            
-            logger.info(f"Withdrawal {withdrawal_id} rejected by admin {admin_user['id']}")
+            update_data, error = await reject_withdrawal(withdrawal, admin_user["id"], failure_reason)
         
-        await db.withdrawals.update_one({"id": withdrawal_id}, {"$set": update_data})
+        if error:
+            # Lost claim (409); a failed payout is recorded on the withdrawal (500); anything else is a bad request
+            if not update_data:
+                raise HTTPException(status_code=409, detail=error)
+            raise HTTPException(status_code=500 if "failure_reason" in update_data else 400, detail=error)
         
         return {"status": "success", "message": f"Withdrawal {action}d successfully"}
     except HTTPException:
@@ -2057,6 +4028,102 @@ async def process_withdrawal(
         logger.error(f"Error processing withdrawal: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+async def run_bulk_withdrawal_job(job_id: str, withdrawals: List[dict], action: str, admin_id: str, failure_reason: Optional[str]):
+    """Process claimed withdrawals with a pool of PAYOUT_CONCURRENCY workers, recording each outcome on the job"""
+    async def process_one(withdrawal: dict):
+        try:
+            if action == "approve":
+                update_data, error = await approve_withdrawal(withdrawal, admin_id)
+            else:
+                update_data, error = await reject_withdrawal(withdrawal, admin_id, failure_reason)
+        except Exception as e:
+            logger.error(f"Error processing withdrawal {withdrawal['id']} in job {job_id}: {str(e)}")
+            update_data, error = {}, str(e)
+        result = {"status": update_data.get("status", WithdrawalStatus.PENDING.value)}
+        if error:
+            result["error"] = error
+        if update_data.get("razorpay_payout_id"):
+            result["razorpay_payout_id"] = update_data["razorpay_payout_id"]
+        await db.withdrawal_jobs.update_one(
+            {"id": job_id},
+            {"$set": {f"results.{withdrawal['id']}": result}, "$inc": {"failed" if error else "succeeded": 1}}
+        )
+    
+    async def worker(queue):
+        for withdrawal in queue:
+            await process_one(withdrawal)
+    
+    try:
+        # A fixed pool pulling from one iterator, so a large job never has every
+        # withdrawal's coroutine and DB writes in flight at once
+        queue = iter(withdrawals)
+        await asyncio.gather(*(worker(queue) for _ in range(max(1, min(PAYOUT_CONCURRENCY, len(withdrawals))))))
+    finally:
+        await db.withdrawal_jobs.update_one(
+            {"id": job_id},
+            {"$set": {"status": "completed", "finished_at": datetime.now(timezone.utc).isoformat()}}
+        )
+        logger.info(f"Bulk withdrawal job {job_id} finished ({len(withdrawals)} withdrawals)")
+
+@api_router.post("/admin/withdrawals/bulk", status_code=202)
+async def bulk_process_withdrawals(request: BulkWithdrawalAction, admin_user: dict = Depends(get_admin_user)):
+    """Approve or reject many pending withdrawals in one background job (admin only).
+    
+    Pending withdrawals are claimed atomically, so ids that are not pending or are
+    being processed elsewhere come back in `skipped`. Poll
+    GET /admin/withdrawals/bulk/{job_id} for per-withdrawal results.
+    """
+    try:
+        job_id = str(uuid.uuid4())
+        withdrawal_ids = list(dict.fromkeys(request.withdrawal_ids))
+        claimed = await claim_withdrawals(withdrawal_ids, job_id)
+        claimed_ids = {w["id"] for w in claimed}
+        skipped = [wid for wid in withdrawal_ids if wid not in claimed_ids]
+        
+        job = {
+            "id": job_id,
+            "action": request.action,
+            "status": "running" if claimed else "completed",
+            "total": len(claimed),
+            "succeeded": 0,
+            "failed": 0,
+            "skipped": skipped,
+            "results": {},
+            "created_by": admin_user["id"],
+            "created_at": datetime.now(timezone.utc).isoformat()
+        }
+        await db.withdrawal_jobs.insert_one(job)
+        job.pop("_id", None)
+        
+        if claimed:
+            task = asyncio.create_task(
+                run_bulk_withdrawal_job(job_id, claimed, request.action, admin_user["id"], request.failure_reason)
+            )
+            bulk_withdrawal_tasks.add(task)
+            task.add_done_callback(bulk_withdrawal_tasks.discard)
+        logger.info(f"Bulk withdrawal job {job_id}: {request.action} {len(claimed)} claimed, {len(skipped)} skipped")
+        
+        return job
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error starting bulk withdrawal job: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@api_router.get("/admin/withdrawals/bulk/{job_id}")
+async def get_bulk_withdrawal_job(job_id: str, admin_user: dict = Depends(get_admin_user)):
+    """Get the progress and per-withdrawal results of a bulk job (admin only)"""
+    try:
+        job = await db.withdrawal_jobs.find_one({"id": job_id}, {"_id": 0})
+        if not job:
+            raise HTTPException(status_code=404, detail="Job not found")
+        return job
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error fetching bulk withdrawal job: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @api_router.post("/admin/withdrawals/{withdrawal_id}/sync")
 async def sync_withdrawal_status(withdrawal_id: str, admin_user: dict = Depends(get_admin_user)):
     """Sync withdrawal status from RazorpayX API"""
@@ -2070,63 +4137,34 @@ async def sync_withdrawal_status(withdrawal_id: str, admin_user: dict = Depends(
             raise HTTPException(status_code=400, detail="No RazorpayX payout ID found for this withdrawal")
         
         # Fetch payout status from RazorpayX
-        url = f"{RAZORPAY_API_URL}/payouts/{payout_id}"
+        payout_data, fetch_error = await fetch_razorpay_payout(payout_id)
+        if fetch_error:
+            raise HTTPException(status_code=502, detail=fetch_error)
+        
+        payout_status = payout_data.get("status")
+        utr = payout_data.get("utr")
+        
+        logger.info(f"Synced payout {payout_id} status: {payout_status}")
+        
+        now = datetime.now(timezone.utc).isoformat()
+        update_data = payout_final_update(payout_data, now)
+        withdrawal_status = withdrawal["status"]
+        if update_data:
+            if await settle_withdrawal({"id": withdrawal_id, "razorpay_payout_id": payout_id}, update_data):
+                withdrawal_status = update_data["status"]
+            else:
+                # Settled concurrently (webhook or reconciler): report what is stored now
+                current = await db.withdrawals.find_one({"id": withdrawal_id}, {"_id": 0, "status": 1})
+                withdrawal_status = (current or withdrawal)["status"]
+        
+        return {
+            "status": "success",
+            "razorpay_status": payout_status,
+            "withdrawal_status": withdrawal_status,
+            "utr": utr,
+            "message": f"Payout status: {payout_status}"
+        }
         
-        async with aiohttp.ClientSession() as session:
-            auth_string = base64.b64encode(f"{RAZORPAY_KEY_ID}:{RAZORPAY_KEY_SECRET}".encode()).decode()
-            headers = {
-                "Content-Type": "application/json",
-                "Authorization": f"Basic {auth_string}"
-            }
-            
-            async with session.get(url, headers=headers) as resp:
-                if resp.status != 200:
-                    error_data = await resp.json()
-                    raise HTTPException(status_code=resp.status, detail=error_data.get("error", {}).get("description", "Failed to fetch payout"))
-                
-                payout_data = await resp.json()
-                payout_status = payout_data.get("status")
-                failure_reason = payout_data.get("failure_reason")
-                utr = payout_data.get("utr")
-                
-                logger.info(f"Synced payout {payout_id} status: {payout_status}")
-                
-                now = datetime.now(timezone.utc).isoformat()
-                update_data = {"updated_at": now}
-                status_changed = False
-                
-                if payout_status == "processed" and withdrawal["status"] != WithdrawalStatus.COMPLETED.value:
-                    update_data["status"] = WithdrawalStatus.COMPLETED.value
-                    update_data["processed_at"] = now
-                    update_data["utr"] = utr
-                    update_data["failure_reason"] = None
-                    status_changed = True
-                    
-                elif payout_status in ["failed", "rejected", "reversed"] and withdrawal["status"] != WithdrawalStatus.FAILED.value:
-                    update_data["status"] = WithdrawalStatus.FAILED.value
-                    update_data["failure_reason"] = failure_reason or f"Payout {payout_status}"
-                    status_changed = True
-                    
-                    # Refund the reserved amount back to collection
-                    await db.collections.update_one(
-                        {"id": withdrawal["collection_id"]},
-                        {"$inc": {"withdrawn_amount": -withdrawal["amount"]}}
-                    )
-                
-                if status_changed or update_data:
-                    await db.withdrawals.update_one(
-                        {"id": withdrawal_id},
-                        {"$set": update_data}
-                    )
-                
-                return {
-                    "status": "success",
-                    "razorpay_status": payout_status,
-                    "withdrawal_status": update_data.get("status", withdrawal["status"]),
-                    "utr": utr,
-                    "message": f"Payout status: {payout_status}"
-                }
-                
     except HTTPException:
         raise
     except Exception as e:
@@ -2140,6 +4178,13 @@ class CollectionReview(BaseModel):
     status: str  # "approved" or "rejected"
     rejection_reason: Optional[str] = None
 
+# Fields AdminPage renders for a collection (plus the amounts the list endpoint derives);
+# internal bookkeeping such as counter_folds or refunded_withdrawals never leaves the server
+ADMIN_COLLECTION_PROJECTION = {
+    "_id": 0, "id": 1, "user_id": 1, "title": 1, "description": 1, "category": 1, "cover_image": 1,
+    "goal_amount": 1, "status": 1, "rejection_reason": 1, "created_at": 1
+}
+
 @api_router.get("/admin/collections")
 async def get_admin_collections(
     status: Optional[str] = Query(None),
@@ -2151,16 +4196,20 @@ async def get_admin_collections(
         if status:
             query["status"] = status
         
-        cursor = db.collections.find(query, {"_id": 0}).sort("created_at", -1)
-        collections = await cursor.to_list(length=100)
+        projection = {**ADMIN_COLLECTION_PROJECTION, "current_amount": 1, "donor_count": 1,
+                      "withdrawn_amount": 1, "counter_shards": 1}
+        cursor = db.collections.find(query, projection).sort("created_at", -1)
+        collections = await apply_counter_shards(await cursor.to_list(length=100))
         
         # Enrich with user info
+        users = await fetch_docs_by_field(db.users, "id", [c.get("user_id") for c in collections], {"name": 1, "email": 1})
         for c in collections:
-            user = await db.users.find_one({"id": c.get("user_id")}, {"_id": 0, "name": 1, "email": 1})
+            user = users.get(c.get("user_id"))
             c["user_name"] = user.get("name") if user else "Unknown"
             c["user_email"] = user.get("email") if user else "Unknown"
             c["withdrawn_amount"] = c.get("withdrawn_amount", 0.0)
             c["available_amount"] = c.get("current_amount", 0.0) - c["withdrawn_amount"]
+            c.pop("counter_shards", None)
         
         return collections
     except Exception as e:
@@ -2172,14 +4221,15 @@ async def get_pending_collections(admin_user: dict = Depends(get_admin_user)):
     """Get collections pending approval"""
     try:
         cursor = db.collections.find(
-            {"status": CollectionStatus.PENDING_APPROVAL.value}, 
-            {"_id": 0}
+            {"status": CollectionStatus.PENDING_APPROVAL.value},
+            ADMIN_COLLECTION_PROJECTION
         ).sort("created_at", -1)
         collections = await cursor.to_list(length=100)
         
         # Enrich with user info
+        users = await fetch_docs_by_field(db.users, "id", [c.get("user_id") for c in collections], {"name": 1, "email": 1})
         for c in collections:
-            user = await db.users.find_one({"id": c.get("user_id")}, {"_id": 0, "name": 1, "email": 1})
+            user = users.get(c.get("user_id"))
             c["user_name"] = user.get("name") if user else "Unknown"
             c["user_email"] = user.get("email") if user else "Unknown"
         
@@ -2229,6 +4279,8 @@ async def review_collection(
             raise HTTPException(status_code=400, detail="Invalid status. Use 'approved' or 'rejected'")
         
         await db.collections.update_one({"id": collection_id}, {"$set": update_data})
+        await bump_platform_counters("collections", collection["status"], update_data["status"])
+        invalidate_collection_listings()
         
         return {"status": "success", "message": f"Collection {review.status} successfully"}
     except HTTPException:
@@ -2242,86 +4294,515 @@ async def review_collection(
 async def get_admin_dashboard(admin_user: dict = Depends(get_admin_user)):
     """Get admin dashboard stats"""
     try:
-        # Total users
-        total_users = await db.users.count_documents({"is_admin": {"$ne": True}})
-        
-        # Collection stats
-        pending_collections = await db.collections.count_documents({"status": CollectionStatus.PENDING_APPROVAL.value})
-        active_collections = await db.collections.count_documents({"status": CollectionStatus.ACTIVE.value})
-        
-        # KYC stats
-        pending_kyc = await db.kyc.count_documents({"status": KYCStatus.PENDING.value})
-        approved_kyc = await db.kyc.count_documents({"status": KYCStatus.APPROVED.value})
-        
-        # Withdrawal stats
-        pending_withdrawals = await db.withdrawals.count_documents({"status": WithdrawalStatus.PENDING.value})
-        
-        # Total amounts
-        pipeline = [
-            {"$match": {"status": WithdrawalStatus.COMPLETED.value}},
-            {"$group": {"_id": None, "total": {"$sum": "$net_amount"}, "fees": {"$sum": "$platform_fee"}}}
-        ]
-        withdrawal_stats = await db.withdrawals.aggregate(pipeline).to_list(1)
-        total_withdrawn = withdrawal_stats[0]["total"] if withdrawal_stats else 0
-        total_fees = withdrawal_stats[0]["fees"] if withdrawal_stats else 0
+        counters = await get_platform_counters()
+        current_fee = platform_settings.fee_percentage
         
-        # Get current settings
-        settings = await db.settings.find_one({"key": "platform"}, {"_id": 0})
-        current_fee = settings.get("platform_fee_percentage", 2.5) if settings else 2.5
+        collections = counters.get("collections", {})
+        kyc = counters.get("kyc", {})
+        withdrawals = counters.get("withdrawals", {})
+        totals = counters.get("totals", {})
         
         return {
-            "total_users": total_users,
-            "pending_collections": pending_collections,
-            "active_collections": active_collections,
-            "pending_kyc": pending_kyc,
-            "approved_kyc": approved_kyc,
-            "pending_withdrawals": pending_withdrawals,
-            "total_withdrawn": total_withdrawn,
-            "total_platform_fees": total_fees,
+            "total_users": counters.get("users", {}).get("total", 0),
+            "pending_collections": collections.get(CollectionStatus.PENDING_APPROVAL.value, 0),
+            "active_collections": collections.get(CollectionStatus.ACTIVE.value, 0),
+            "pending_kyc": kyc.get(KYCStatus.PENDING.value, 0),
+            "approved_kyc": kyc.get(KYCStatus.APPROVED.value, 0),
+            "pending_withdrawals": withdrawals.get(WithdrawalStatus.PENDING.value, 0),
+            "total_withdrawn": totals.get("withdrawn", 0),
+            "total_platform_fees": totals.get("platform_fees", 0),
             "current_fee_percentage": current_fee
         }
     except Exception as e:
         logger.error(f"Error fetching admin dashboard: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@api_router.post("/admin/dashboard/reconcile")
+async def reconcile_admin_dashboard(
+    fix: bool = Query(True),
+    admin_user: dict = Depends(get_admin_user)
+):
+    """Verify the dashboard counters against a full recount, rebuilding them if they drifted (admin only)"""
+    try:
+        return await reconcile_platform_counters(fix=fix)
+    except Exception as e:
+        logger.error(f"Error reconciling dashboard counters: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+# ==================== METRICS ENDPOINT ====================
+@api_router.get("/admin/metrics")
+async def get_runtime_metrics(admin_user: dict = Depends(get_admin_user)):
+    """Get in-process runtime metrics for capacity tuning (admin only)"""
+    return {
+        "razorpay_http": razorpay_http.metrics(),
+        "user_cache": user_cache.metrics(),
+        "token_cache": token_cache.metrics(),
+        "password_hasher": password_hasher.metrics(),
+        "stats_cache": stats_cache.metrics(),
+        "collection_list_cache": {**collection_list_cache.metrics(), "not_modified": listing_not_modified},
+        "collection_search_cache": {**collection_search_cache.metrics(), "timeouts": search_timeouts},
+        "webhook_inbox": webhook_inbox.metrics(),
+        "donation_capture": donation_capture.metrics(),
+        "payment_events": payment_events.metrics(),
+        "collection_events": collection_events.metrics(),
+        "platform_settings": platform_settings.metrics(),
+        "payout_reconciler": payout_reconciler_metrics,
+        "donation_sweeper": donation_sweeper_metrics,
+        "gateway_lookups": {
+            "orders": razorpay_order_lookups.metrics(),
+            "payouts": razorpay_payout_lookups.metrics()
+        },
+        "counter_shards": {**counter_shard_metrics, "active": len(sharded_collections)}
+    }
+
 
 # ==================== STATS ENDPOINT ====================
+stats_cache = SingleFlightCache(ttl=STATS_CACHE_TTL, maxsize=1)
+
+async def load_platform_stats() -> dict:
+    """Read the public stats from the materialized counters"""
+    counters = await get_platform_counters()
+    return {
+        "total_collections": counters.get("collections", {}).get(CollectionStatus.ACTIVE.value, 0),
+        "total_donations": counters.get("donations", {}).get(PaymentStatus.SUCCESS.value, 0),
+        "total_raised": counters.get("totals", {}).get("raised", 0)
+    }
+
 @api_router.get("/stats")
 async def get_platform_stats():
     """Get platform statistics"""
     try:
-        total_collections = await db.collections.count_documents({"status": CollectionStatus.ACTIVE.value})
-        total_donations = await db.donations.count_documents({"status": PaymentStatus.SUCCESS.value})
-        
-        # Aggregate total amount raised
-        pipeline = [
-            {"$match": {"status": PaymentStatus.SUCCESS.value}},
-            {"$group": {"_id": None, "total": {"$sum": "$amount"}}}
-        ]
-        result = await db.donations.aggregate(pipeline).to_list(1)
-        total_raised = result[0]["total"] if result else 0
-        
-        return {
-            "total_collections": total_collections,
-            "total_donations": total_donations,
-            "total_raised": total_raised
-        }
+        return await stats_cache.get("platform", load_platform_stats)
     except Exception as e:
         logger.error(f"Error fetching stats: {str(e)}")
         return {"total_collections": 0, "total_donations": 0, "total_raised": 0}
 
 
-# Include the router in the main app
-app.include_router(api_router)
+# ==================== PAYOUT RECONCILER ====================
+# Withdrawals otherwise only leave PROCESSING through the payout webhook or a manual sync.
+# The reconciler lists RazorpayX payouts created since the oldest PROCESSING withdrawal was
+# approved, oldest slice first, and applies every final status it finds in bulk.
+PAYOUT_LIST_PAGE_SIZE = 100  # RazorpayX maximum `count`
+payout_reconciler_metrics = {
+    "runs": 0,
+    "last_run_at": None,
+    "last_window_start": None,
+    "pages": 0,
+    "scanned": 0,
+    "completed": 0,
+    "failed": 0,
+    "processing": 0,
+    "lag_seconds": 0
+}
+
+def payout_final_update(payout: dict, now: str) -> Optional[dict]:
+    """Withdrawal fields for a payout in a final state, or None while it is still in flight"""
+    payout_status = payout.get("status")
+    if payout_status == "processed":
+        return {
+            "status": WithdrawalStatus.COMPLETED.value,
+            "processed_at": now,
+            "utr": payout.get("utr"),
+            "failure_reason": None,
+            "updated_at": now
+        }
+    if payout_status in ["failed", "rejected", "reversed", "cancelled"]:
+        return {
+            "status": WithdrawalStatus.FAILED.value,
+            "failure_reason": payout.get("failure_reason") or f"Payout {payout_status}",
+            "updated_at": now
+        }
+    return None
+
+async def list_razorpayx_payouts(window_start: int, window_end: int):
+    """Yield pages of RazorpayX payouts created in [window_start, window_end] (unix seconds).
+    
+    RazorpayX lists newest first, so the window is walked in PAYOUT_RECONCILE_SLICE slices
+    from the oldest; when PAYOUT_RECONCILE_MAX_PAGES runs out it is the newest payouts that
+    wait for the next run, not the oldest stuck ones.
+    """
+    pages = 0
+    slice_start = window_start
+    while slice_start <= window_end:
+        slice_end = min(slice_start + PAYOUT_RECONCILE_SLICE - 1, window_end)
+        for page in range(PAYOUT_RECONCILE_MAX_PAGES):
+            if pages >= PAYOUT_RECONCILE_MAX_PAGES:
+                logger.warning(f"Payout reconciler stopped after {PAYOUT_RECONCILE_MAX_PAGES} pages")
+                return
+            pages += 1
+            status, result = await razorpay_http.get("/payouts", params={
+                "account_number": RAZORPAYX_ACCOUNT_NUMBER,
+                "from": slice_start,
+                "to": slice_end,
+                "count": PAYOUT_LIST_PAGE_SIZE,
+                "skip": page * PAYOUT_LIST_PAGE_SIZE
+            })
+            if status != 200:
+                raise RuntimeError(result.get("error", {}).get("description", f"Payout list failed ({status})"))
+            items = result.get("items", [])
+            yield items
+            if len(items) < PAYOUT_LIST_PAGE_SIZE:
+                break
+        slice_start = slice_end + 1
+
+async def apply_payout_updates(payouts: List[dict], run_id: str) -> dict:
+    """Move withdrawals whose payout reached a final state, refunding failed ones.
+    
+    One indexed read finds the withdrawals a page can still move and one bulk_write
+    applies them, each update conditional on the status that read saw. A second read
+    by run id then tells which updates matched, so a withdrawal settled concurrently by
+    a webhook or manual sync is neither counted nor refunded twice.
+    """
+    now = datetime.now(timezone.utc).isoformat()
+    updates = {}
+    for payout in payouts:
+        update = payout_final_update(payout, now)
+        if update:
+            updates[payout["id"]] = {**update, "reconciled_by": run_id}
+    totals = {"completed": 0, "failed": 0}
+    if not updates:
+        return totals
+    
+    candidates = [
+        w for w in await db.withdrawals.find(
+            {"razorpay_payout_id": {"$in": list(updates)}},
+            {"_id": 0, "id": 1, "razorpay_payout_id": 1, "status": 1, "collection_id": 1,
+             "amount": 1, "net_amount": 1, "platform_fee": 1}
+        ).to_list(None)
+        if w["status"] in WITHDRAWAL_SETTLE_FROM[updates[w["razorpay_payout_id"]]["status"]]
+    ]
+    if not candidates:
+        return totals
+    await db.withdrawals.bulk_write([
+        UpdateOne(
+            {"id": w["id"], "razorpay_payout_id": w["razorpay_payout_id"], "status": w["status"]},
+            {"$set": settle_fields(updates[w["razorpay_payout_id"]]), "$unset": {"payout_attempt": ""}}
+        )
+        for w in candidates
+    ], ordered=False)
+    moved = {
+        w["id"] for w in await db.withdrawals.find(
+            {"razorpay_payout_id": {"$in": [w["razorpay_payout_id"] for w in candidates]}, "reconciled_by": run_id},
+            {"_id": 0, "id": 1}
+        ).to_list(None)
+    }
+    
+    refunds = []
+    for withdrawal in candidates:
+        if withdrawal["id"] not in moved:
+            continue
+        new_status = updates[withdrawal["razorpay_payout_id"]]["status"]
+        await bump_withdrawal_counters(withdrawal, new_status)
+        if new_status == WithdrawalStatus.FAILED.value:
+            refunds.append(withdrawal)
+            totals["failed"] += 1
+        else:
+            totals["completed"] += 1
+    await refund_withdrawals(refunds)
+    return totals
+
+async def reconcile_payouts() -> dict:
+    """Bring PROCESSING withdrawals up to date with RazorpayX in one paged list scan"""
+    metrics = payout_reconciler_metrics
+    metrics["runs"] += 1
+    metrics["last_run_at"] = datetime.now(timezone.utc).isoformat()
+    await recover_payout_attempts()
+    await finish_pending_refunds()
+    
+    oldest = await db.withdrawals.find_one(
+        {"status": WithdrawalStatus.PROCESSING.value, "razorpay_payout_id": {"$ne": None}},
+        {"_id": 0, "approved_at": 1, "updated_at": 1},
+        sort=[("approved_at", 1)]
+    )
+    if not oldest:
+        metrics.update({"processing": 0, "lag_seconds": 0})
+        return {"scanned": 0, "completed": 0, "failed": 0}
+    
+    # Payouts are listed by creation time: start a little before the oldest approval
+    approved_at = datetime.fromisoformat(oldest.get("approved_at") or oldest["updated_at"])
+    window_start = int(approved_at.timestamp()) - 60
+    window_end = int(time.time())
+    run_id = str(uuid.uuid4())
+    totals = {"scanned": 0, "completed": 0, "failed": 0}
+    async for payouts in list_razorpayx_payouts(window_start, window_end):
+        metrics["pages"] += 1
+        totals["scanned"] += len(payouts)
+        applied = await apply_payout_updates(payouts, run_id)
+        totals["completed"] += applied["completed"]
+        totals["failed"] += applied["failed"]
+    
+    # Lag: how long the oldest withdrawal still in flight has been waiting
+    remaining, still_oldest = await asyncio.gather(
+        db.withdrawals.count_documents({"status": WithdrawalStatus.PROCESSING.value}),
+        db.withdrawals.find_one(
+            {"status": WithdrawalStatus.PROCESSING.value}, {"_id": 0, "approved_at": 1}, sort=[("approved_at", 1)]
+        )
+    )
+    lag = 0
+    if still_oldest and still_oldest.get("approved_at"):
+        lag = (datetime.now(timezone.utc) - datetime.fromisoformat(still_oldest["approved_at"])).total_seconds()
+    metrics.update({
+        "last_window_start": datetime.fromtimestamp(window_start, timezone.utc).isoformat(),
+        "scanned": metrics["scanned"] + totals["scanned"],
+        "completed": metrics["completed"] + totals["completed"],
+        "failed": metrics["failed"] + totals["failed"],
+        "processing": remaining,
+        "lag_seconds": round(lag)
+    })
+    if totals["completed"] or totals["failed"]:
+        logger.info(f"Payout reconciler: {totals}")
+    return totals
+
+
+# ==================== STALE DONATION SWEEPER ====================
+# Every opened checkout inserts a PENDING donation; abandoned ones would otherwise stay in
+# the hot donations collection forever.
+donation_sweeper_metrics = {
+    "runs": 0,
+    "last_run_at": None,
+    "checked": 0,
+    "captured": 0,
+    "expired": 0,
+    "archived": 0,
+    "credited": 0,
+    "errors": 0
+}
+
+async def sweep_pending_donation(donation: dict, abandon_before: str) -> Optional[str]:
+    """Settle one stale PENDING donation from its Razorpay order. Returns "captured", "expired" or None."""
+    razorpay_status = None
+    if donation.get("razorpay_order_id"):
+        razorpay_order, fetch_error = await fetch_razorpay_order(donation["razorpay_order_id"])
+        if fetch_error:
+            donation_sweeper_metrics["errors"] += 1
+            return None
+        razorpay_status = razorpay_order.get("status")
+    
+    if razorpay_status == "paid":
+        if await donation_capture.capture("sweeper", {"order_id": donation["order_id"]}):
+            return "captured"
+    elif donation["created_at"] < abandon_before or razorpay_status in ["expired", "cancelled"]:
+        if await donation_capture.fail("sweeper", {"order_id": donation["order_id"]}):
+            return "expired"
+    return None
+
+async def archive_failed_donations(archive_before: str) -> int:
+    """Move FAILED donations created before `archive_before` into donations_archive"""
+    donations = await db.donations.find(
+        {"status": PaymentStatus.FAILED.value, "created_at": {"$lt": archive_before}}, {"_id": 0}
+    ).sort("created_at", 1).limit(DONATION_SWEEP_BATCH).to_list(length=DONATION_SWEEP_BATCH)
+    if not donations:
+        return 0
+    try:
+        await db.donations_archive.insert_many(donations, ordered=False)
+    except BulkWriteError as e:
+        # Rows already copied by an interrupted earlier run
+        if any(err.get("code") != 11000 for err in e.details.get("writeErrors", [])):
+            raise
+    result = await db.donations.delete_many(
+        {"id": {"$in": [d["id"] for d in donations]}, "status": PaymentStatus.FAILED.value}
+    )
+    return result.deleted_count
+
+async def sweep_stale_donations() -> dict:
+    """Settle old PENDING donations against Razorpay and archive old FAILED ones"""
+    metrics = donation_sweeper_metrics
+    metrics["runs"] += 1
+    metrics["last_run_at"] = datetime.now(timezone.utc).isoformat()
+    now = datetime.now(timezone.utc)
+    check_before = (now - timedelta(seconds=DONATION_PENDING_CHECK_AFTER)).isoformat()
+    abandon_before = (now - timedelta(seconds=DONATION_ABANDON_AFTER)).isoformat()
+    archive_before = (now - timedelta(seconds=DONATION_ARCHIVE_AFTER)).isoformat()
+    
+    pending = await db.donations.find(
+        {"status": PaymentStatus.PENDING.value, "created_at": {"$lt": check_before}},
+        {"_id": 0, "order_id": 1, "razorpay_order_id": 1, "created_at": 1}
+    ).sort("created_at", 1).limit(DONATION_SWEEP_BATCH).to_list(length=DONATION_SWEEP_BATCH)
+    
+    slots = asyncio.Semaphore(DONATION_SWEEP_CONCURRENCY)
+    async def check(donation: dict):
+        async with slots:
+            try:
+                return await sweep_pending_donation(donation, abandon_before)
+            except Exception as e:
+                metrics["errors"] += 1
+                logger.error(f"Error sweeping donation {donation['order_id']}: {str(e)}")
+                return None
+    outcomes = await asyncio.gather(*(check(d) for d in pending))
+    
+    totals = {
+        "checked": len(pending),
+        "captured": outcomes.count("captured"),
+        "expired": outcomes.count("expired"),
+        "archived": await archive_failed_donations(archive_before),
+        "credited": await donation_capture.finish_pending_credits("sweeper", DONATION_SWEEP_BATCH)
+    }
+    for key, value in totals.items():
+        metrics[key] += value
+    if totals["captured"] or totals["expired"] or totals["archived"] or totals["credited"]:
+        logger.info(f"Donation sweeper: {totals}")
+    return totals
+
+
+# ==================== BACKGROUND JOBS ====================
+def job_lease_owner() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+async def acquire_job_lease(name: str, ttl: float) -> bool:
+    """Take (or renew) the cluster-wide lease for a periodic job so only one worker runs it per interval.
+    
+    The lease document's _id is the job name, so two workers can never both hold it:
+    the loser's upsert collides on _id even if no other index exists.
+    """
+    now = datetime.now(timezone.utc)
+    owner = job_lease_owner()
+    lease_id = f"job_lease:{name}"
+    try:
+        await db.settings.update_one(
+            {"_id": lease_id, "$or": [{"owner": owner}, {"expires_at": {"$lte": now.isoformat()}}]},
+            {"$set": {"key": lease_id, "owner": owner, "expires_at": (now + timedelta(seconds=ttl)).isoformat()}},
+            upsert=True
+        )
+        return True
+    except DuplicateKeyError:
+        # The lease document exists and is held by another live worker. A lease written before
+        # leases were keyed by _id holds the same key; drop it once expired so the next try wins.
+        await db.settings.delete_one({"key": lease_id, "_id": {"$ne": lease_id}, "expires_at": {"$lte": now.isoformat()}})
+        return False
+
+async def release_job_lease(name: str, until: datetime):
+    """Hand back a job lease we hold, keeping other workers off it until `until`"""
+    await db.settings.update_one(
+        {"_id": f"job_lease:{name}", "owner": job_lease_owner()},
+        {"$set": {"expires_at": until.isoformat()}}
+    )
+
+async def renew_job_lease(name: str):
+    """Keep renewing a held job lease while its job runs"""
+    while True:
+        await asyncio.sleep(JOB_LEASE_TTL / 3)
+        if not await acquire_job_lease(name, JOB_LEASE_TTL):
+            logger.warning(f"Background job {name} lost its lease while running")
+            return
+
+async def run_job_once(name: str, interval: float, job) -> bool:
+    """Run `job()` if this worker gets its lease. Returns False if another worker holds it."""
+    started = datetime.now(timezone.utc)
+    if not await acquire_job_lease(name, JOB_LEASE_TTL):
+        return False
+    heartbeat = asyncio.create_task(renew_job_lease(name))
+    try:
+        await job()
+    finally:
+        heartbeat.cancel()
+        # Keep the lease until this run's interval is over so no other worker repeats the run
+        await release_job_lease(name, started + timedelta(seconds=interval))
+    return True
+
+async def run_periodically(name: str, interval: float, job):
+    """Run `job()` at startup and then every `interval` seconds until cancelled, logging (not raising) failures"""
+    while True:
+        try:
+            await run_job_once(name, interval, job)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Background job {name} failed: {str(e)}")
+        await asyncio.sleep(interval)
+
+def start_background_jobs() -> list:
+    """Start the periodic maintenance jobs for this process (each run is gated by a job lease)"""
+    jobs = []
+    if COUNTERS_RECONCILE_INTERVAL > 0:
+        jobs.append(("reconcile_platform_counters", COUNTERS_RECONCILE_INTERVAL, reconcile_platform_counters))
+    if PAYOUT_RECONCILE_INTERVAL > 0 and RAZORPAYX_ACCOUNT_NUMBER:
+        jobs.append(("reconcile_payouts", PAYOUT_RECONCILE_INTERVAL, reconcile_payouts))
+    if DONATION_SWEEP_INTERVAL > 0:
+        jobs.append(("sweep_stale_donations", DONATION_SWEEP_INTERVAL, sweep_stale_donations))
+    if COUNTER_FOLD_INTERVAL > 0:
+        jobs.append(("fold_counter_shards", COUNTER_FOLD_INTERVAL, fold_counter_shards))
+    return [asyncio.create_task(run_periodically(name, interval, job)) for name, interval, job in jobs]
+
+async def stop_background_jobs(tasks: list):
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
 
-app.add_middleware(
-    CORSMiddleware,
-    allow_credentials=True,
-    allow_origins=os.environ.get('CORS_ORIGINS', '*').split(','),
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
 
-@app.on_event("shutdown")
-async def shutdown_db_client():
+def connect_mongo():
+    """Open this process's MongoDB client and connection pool"""
+    global client, db
+    client = AsyncIOMotorClient(MONGO_URL, maxPoolSize=MONGO_MAX_POOL_SIZE, minPoolSize=MONGO_MIN_POOL_SIZE)
+    db = client[DB_NAME]
+
+def reset_process_caches():
+    """Drop cached entries so a worker never serves state inherited from its parent process"""
+    for cache in (user_cache, token_cache, collection_list_cache, collection_search_cache):
+        cache.clear()
+    for cache in (stats_cache, razorpay_order_lookups, razorpay_payout_lookups):
+        cache.invalidate()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Build this process's resources (Mongo client, HTTP pool, caches, workers) and release them on shutdown"""
+    connect_mongo()
+    password_hasher.start()
+    start_payout_dispatch()
+    reset_process_caches()
+    if not RAZORPAY_WEBHOOK_SECRET:
+        logger.warning("RAZORPAY_WEBHOOK_SECRET is not set - all webhook deliveries will be rejected")
+    if AUTO_APPLY_INDEXES:
+        try:
+            await apply_index_migrations(db)
+        except Exception as e:
+            logger.error(f"Error applying index migrations: {str(e)}")
+    try:
+        # Build the counters before serving so no reader ever sees a partial document
+        await get_platform_counters()
+    except Exception as e:
+        logger.error(f"Error loading platform counters: {str(e)}")
+    await razorpay_http.start()
+    await platform_settings.start()
+    background_tasks = start_background_jobs()
+    webhook_inbox.start()
+    yield
+    await webhook_inbox.stop()
+    await collection_events.stop()
+    await platform_settings.stop()
+    # Interrupted bulk withdrawal jobs leave their claims to expire after WITHDRAWAL_CLAIM_TIMEOUT;
+    # payouts already in flight keep their attempt marker for recover_payout_attempts
+    await stop_background_jobs(list(bulk_withdrawal_tasks))
+    await stop_background_jobs(background_tasks)
+    await razorpay_http.close()
+    password_hasher.shutdown()
     client.close()
+
+
+def create_app() -> FastAPI:
+    """Build the FastAPI app; per-process resources are opened by its lifespan, not at import"""
+    app = FastAPI(title="FundFlow API", version="1.0.0", lifespan=lifespan)
+
+    # Include the router in the main app
+    app.include_router(api_router)
+
+    app.add_middleware(
+        CORSMiddleware,
+        allow_credentials=True,
+        allow_origins=os.environ.get('CORS_ORIGINS', '*').split(','),
+        allow_methods=["*"],
+        allow_headers=["*"],
+        expose_headers=["X-Next-Cursor", "ETag"],
+    )
+    return app
+
+
+# Kept for `uvicorn server:app`; multi-worker deployments use `uvicorn --factory server:create_app`
+app = create_app()
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    uvicorn.run("server:create_app", factory=True, host=HOST, port=PORT, workers=WEB_CONCURRENCY)
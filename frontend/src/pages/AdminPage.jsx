@@ -60,6 +60,7 @@ export default function AdminPage() {
   const [failureReason, setFailureReason] = useState("");
   const [collectionRejectionReason, setCollectionRejectionReason] = useState("");
   const [syncingId, setSyncingId] = useState(null);
+  const [bulkJob, setBulkJob] = useState(null);
 
   useEffect(() => {
     if (adminToken) {
@@ -182,6 +183,41 @@ export default function AdminPage() {
     }
   };
 
+  const approveAllPendingWithdrawals = async () => {
+    const pendingIds = withdrawals.filter((w) => w.status === "pending").map((w) => w.id);
+    if (pendingIds.length === 0) return;
+
+    try {
+      const response = await axios.post(
+        `${API}/admin/withdrawals/bulk`,
+        { withdrawal_ids: pendingIds, action: "approve" },
+        { headers: getAuthHeader() }
+      );
+      setBulkJob(response.data);
+      pollBulkJob(response.data.id);
+    } catch (error) {
+      toast.error(error.response?.data?.detail || "Failed to start bulk approval");
+    }
+  };
+
+  const pollBulkJob = async (jobId) => {
+    try {
+      const response = await axios.get(`${API}/admin/withdrawals/bulk/${jobId}`, { headers: getAuthHeader() });
+      const job = response.data;
+      if (job.status === "completed") {
+        setBulkJob(null);
+        toast.success(`Bulk approval finished: ${job.succeeded} sent, ${job.failed} failed, ${job.skipped.length} skipped`);
+        fetchAllData();
+      } else {
+        setBulkJob(job);
+        setTimeout(() => pollBulkJob(jobId), 2000);
+      }
+    } catch (error) {
+      setBulkJob(null);
+      toast.error(error.response?.data?.detail || "Failed to fetch bulk approval progress");
+    }
+  };
+
   const updatePlatformFee = async () => {
     setLoading(true);
     try {
@@ -625,9 +661,31 @@ export default function AdminPage() {
           {/* Withdrawals Tab */}
           <TabsContent value="withdrawals">
             <Card>
-              <CardHeader>
-                <CardTitle style={{ fontFamily: 'Bricolage Grotesque' }}>Withdrawal Requests</CardTitle>
-                <CardDescription>Process user withdrawal requests</CardDescription>
+              <CardHeader className="flex flex-row items-start justify-between gap-4">
+                <div>
+                  <CardTitle style={{ fontFamily: 'Bricolage Grotesque' }}>Withdrawal Requests</CardTitle>
+                  <CardDescription>Process user withdrawal requests</CardDescription>
+                </div>
+                {withdrawals.some((w) => w.status === "pending") && (
+                  <Button
+                    size="sm"
+                    className="bg-emerald-600 hover:bg-emerald-700 text-white rounded-full"
+                    onClick={approveAllPendingWithdrawals}
+                    disabled={!!bulkJob}
+                    data-testid="approve-all-withdrawals"
+                  >
+                    {bulkJob ? (
+                      <>
+                        <Loader2 className="w-4 h-4 mr-1 animate-spin" />
+                        {bulkJob.succeeded + bulkJob.failed}/{bulkJob.total} processed
+                      </>
+                    ) : (
+                      <>
+                        <CheckCircle2 className="w-4 h-4 mr-1" /> Approve All Pending
+                      </>
+                    )}
+                  </Button>
+                )}
               </CardHeader>
               <CardContent>
                 {withdrawals.length > 0 ? (
@@ -33,15 +33,24 @@ export default function BrowseCollections() {
   const [loading, setLoading] = useState(true);
   const [category, setCategory] = useState("all");
   const [searchTerm, setSearchTerm] = useState("");
+  const [query, setQuery] = useState("");
+
+  // Search on the server once typing pauses
+  useEffect(() => {
+    const timer = setTimeout(() => setQuery(searchTerm.trim()), 300);
+    return () => clearTimeout(timer);
+  }, [searchTerm]);
 
   useEffect(() => {
     fetchCollections();
-  }, [category]);
+  }, [category, query]);
 
   const fetchCollections = async () => {
     setLoading(true);
     try {
-      let url = `${API}/collections?limit=50`;
+      let url = query
+        ? `${API}/collections/search?q=${encodeURIComponent(query)}&limit=50`
+        : `${API}/collections?limit=50`;
       if (category && category !== "all") {
         url += `&category=${category}`;
       }
@@ -54,11 +63,6 @@ export default function BrowseCollections() {
     }
   };
 
-  const filteredCollections = collections.filter((c) =>
-    c.title.toLowerCase().includes(searchTerm.toLowerCase()) ||
-    c.description.toLowerCase().includes(searchTerm.toLowerCase())
-  );
-
   return (
     <div className="py-8 md:py-12 pb-24 md:pb-12">
       <div className="container-main">
@@ -99,13 +103,13 @@ export default function BrowseCollections() {
           <div className="flex items-center justify-center py-20">
             <Loader2 className="w-8 h-8 text-[#FF5F00] animate-spin" />
           </div>
-        ) : filteredCollections.length > 0 ? (
+        ) : collections.length > 0 ? (
           <>
             <p className="text-sm text-zinc-500 mb-6">
-              Showing {filteredCollections.length} collection{filteredCollections.length !== 1 ? 's' : ''}
+              Showing {collections.length} collection{collections.length !== 1 ? 's' : ''}
             </p>
             <div className="grid grid-cols-1 sm:grid-cols-2 lg:grid-cols-3 gap-6">
-              {filteredCollections.map((collection, index) => (
+              {collections.map((collection, index) => (
                 <div 
                   key={collection.id}
                   className="animate-fade-in"
@@ -70,11 +70,33 @@ export default function CollectionDetails() {
     fetchCollection();
   }, [id]);
 
+  // Live progress: the server pushes a snapshot, then a delta for every new donation
+  useEffect(() => {
+    if (typeof window.EventSource === "undefined") return;
+    const source = new EventSource(`${API}/collections/${id}/events`);
+
+    source.addEventListener("progress", (event) => {
+      const { current_amount, donor_count } = JSON.parse(event.data);
+      setCollection((prev) => (prev ? { ...prev, current_amount, donor_count } : prev));
+    });
+    source.addEventListener("donation", (event) => {
+      const { amount_delta, donor_delta, donation } = JSON.parse(event.data);
+      setCollection((prev) => (prev ? {
+        ...prev,
+        current_amount: prev.current_amount + amount_delta,
+        donor_count: prev.donor_count + donor_delta,
+      } : prev));
+      setDonations((prev) => (prev.some((d) => d.id === donation.id) ? prev : [donation, ...prev]));
+    });
+
+    return () => source.close();
+  }, [id]);
+
   useEffect(() => {
     if (collection && activeTab === "donors") {
       fetchDonations();
     }
-  }, [collection, activeTab]);
+  }, [collection?.id, activeTab]);
 
   const fetchCollection = async () => {
     try {
@@ -21,6 +21,7 @@ export default function PaymentCallback() {
   const [status, setStatus] = useState("loading");
   const [paymentData, setPaymentData] = useState(null);
   const retryCount = useRef(0);
+  const eventSource = useRef(null);
   const maxRetries = 10;
 
   const orderId = searchParams.get("order_id");
@@ -37,13 +38,53 @@ export default function PaymentCallback() {
         setStatus("failed");
         fetchOrderDetails();
       } else {
-        verifyPayment();
+        listenForStatus();
       }
     } else {
       setStatus("error");
     }
+    return () => eventSource.current?.close();
   }, [orderId]);
 
+  const applyStatus = (data) => {
+    setPaymentData(data);
+    if (data.status === "success") {
+      setStatus("success");
+    } else if (data.status === "failed") {
+      setStatus("failed");
+    } else {
+      setStatus("pending");
+    }
+  };
+
+  // The server pushes the final status the moment a webhook or verify settles the payment
+  const listenForStatus = () => {
+    if (typeof window.EventSource === "undefined") {
+      verifyPayment();
+      return;
+    }
+    eventSource.current?.close();
+    const source = new EventSource(`${API}/payments/${orderId}/events`);
+    eventSource.current = source;
+
+    source.addEventListener("status", (event) => {
+      const data = JSON.parse(event.data);
+      applyStatus(data);
+      if (data.status === "success" || data.status === "failed") {
+        source.close();
+      }
+    });
+    source.addEventListener("timeout", () => {
+      source.close();
+      setStatus("pending_timeout");
+    });
+    source.onerror = () => {
+      // Stream unavailable (proxy, network): fall back to polling verify
+      source.close();
+      verifyPayment();
+    };
+  };
+
   const fetchOrderDetails = async () => {
     try {
       const response = await axios.get(`${API}/payments/verify/${orderId}`);
@@ -174,7 +215,7 @@ export default function PaymentCallback() {
                   onClick={() => {
                     retryCount.current = 0;
                     setStatus("loading");
-                    verifyPayment();
+                    listenForStatus();
                   }}
                 >
                   Check Again
@@ -0,0 +1,25 @@
+"""Shared fixtures: the backend runs against an in-memory MongoDB (mongomock-motor)"""
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "fundflow_test")
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+mongomock_motor = pytest.importorskip("mongomock_motor")
+
+import server  # noqa: E402
+
+
+@pytest.fixture
+def db(monkeypatch):
+    """A fresh in-memory database wired into the server module"""
+    client = mongomock_motor.AsyncMongoMockClient()
+    database = client["fundflow_test"]
+    monkeypatch.setattr(server, "client", client)
+    monkeypatch.setattr(server, "db", database)
+    server.reset_process_caches()
+    return database
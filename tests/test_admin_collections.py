@@ -0,0 +1,31 @@
+import asyncio
+
+import server
+
+INTERNAL_FIELDS = {"counter_shards", "counter_folds", "refunded_withdrawals", "credited_donations", "title_normalized"}
+
+
+async def seed(db):
+    await db.users.insert_one({"id": "user_1", "name": "Asha", "email": "asha@example.com"})
+    await db.collections.insert_one({
+        "id": "col_1", "user_id": "user_1", "title": "Fund", "description": "d", "category": "medical",
+        "status": server.CollectionStatus.PENDING_APPROVAL.value, "created_at": "2026-01-01T00:00:00+00:00",
+        "current_amount": 100.0, "withdrawn_amount": 40.0, "donor_count": 2, "counter_shards": 2,
+        "counter_folds": ["f1"], "refunded_withdrawals": ["w1"], "credited_donations": ["o1"],
+        "title_normalized": "fund"
+    })
+
+
+def test_admin_collection_lists_omit_internal_fields(db):
+    async def scenario():
+        await seed(db)
+        admin = {"id": "admin"}
+        return (
+            await server.get_admin_collections(status=None, admin_user=admin),
+            await server.get_pending_collections(admin_user=admin)
+        )
+
+    (listed,), (pending,) = asyncio.run(scenario())
+    assert not INTERNAL_FIELDS & set(listed) and not INTERNAL_FIELDS & set(pending)
+    assert listed["available_amount"] == 60.0 and listed["user_name"] == "Asha"
+    assert pending["title"] == "Fund" and pending["user_email"] == "asha@example.com"
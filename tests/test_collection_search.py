@@ -0,0 +1,22 @@
+import asyncio
+import json
+
+import server
+
+
+def test_punctuation_only_prefix_matches_nothing(db):
+    async def scenario():
+        await db.collections.insert_one({
+            "id": "col_1", "title": "Fund", "title_normalized": "fund",
+            "status": server.CollectionStatus.ACTIVE.value, "visibility": server.CollectionVisibility.PUBLIC.value
+        })
+        response = await server.search_collections(q="!!!", mode="prefix", category=None, cursor=None, limit=20)
+        return json.loads(response.body)
+
+    assert asyncio.run(scenario()) == []
+
+
+def test_reset_process_caches_drops_search_results():
+    server.collection_search_cache.set(("prefix", "fund", None, None, 20), (b"[]", None))
+    server.reset_process_caches()
+    assert server.collection_search_cache.get(("prefix", "fund", None, None, 20)) is None
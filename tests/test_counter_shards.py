@@ -0,0 +1,83 @@
+import asyncio
+
+import pytest
+
+import server
+
+
+async def seed(db):
+    await db.collections.insert_one({"id": "col_1", "current_amount": 100.0, "donor_count": 1, "counter_shards": 2})
+    await db.collection_counter_shards.insert_many([
+        {"collection_id": "col_1", "shard": 0, "amount": 50.0, "donors": 2},
+        {"collection_id": "col_1", "shard": 1, "amount": 25.0, "donors": 1},
+    ])
+
+
+async def totals(db):
+    collection = await db.collections.find_one({"id": "col_1"}, {"_id": 0})
+    return (await server.apply_counter_shards([collection]))[0]
+
+
+def test_fold_moves_shard_totals_into_the_parent(db):
+    async def scenario():
+        await seed(db)
+        folded = await server.fold_counter_shards()
+        again = await server.fold_counter_shards()
+        parent = await db.collections.find_one({"id": "col_1"})
+        return folded, again, parent, await totals(db)
+
+    folded, again, parent, combined = asyncio.run(scenario())
+    assert (folded, again) == (2, 0)
+    assert (parent["current_amount"], parent["donor_count"]) == (175.0, 4)
+    assert (combined["current_amount"], combined["donor_count"]) == (175.0, 4)
+
+
+def test_interrupted_fold_is_finished_once_by_the_next_run(db, monkeypatch):
+    async def scenario():
+        await seed(db)
+        original = server.apply_shard_fold
+
+        async def crash(shard, fold):
+            raise ConnectionError("lost connection after claiming the fold")
+
+        monkeypatch.setattr(server, "apply_shard_fold", crash)
+        with pytest.raises(ConnectionError):
+            await server.fold_counter_shards()
+        monkeypatch.setattr(server, "apply_shard_fold", original)
+
+        # Replaying an already-applied fold must not add it twice
+        shard = await db.collection_counter_shards.find_one({"folding": {"$exists": True}}, {"_id": 0})
+        await server.apply_shard_fold(shard, shard["folding"])
+        await db.collection_counter_shards.update_one(
+            {"shard": shard["shard"]}, {"$set": {"folding": shard["folding"]}}
+        )
+        await server.fold_counter_shards()
+        return await db.collections.find_one({"id": "col_1"}), await db.collection_counter_shards.count_documents(
+            {"folding": {"$exists": True}}
+        )
+
+    parent, pending = asyncio.run(scenario())
+    assert (parent["current_amount"], parent["donor_count"]) == (175.0, 4)
+    assert pending == 0
+
+
+def test_claimed_fold_is_still_counted_until_it_reaches_the_parent(db, monkeypatch):
+    async def scenario():
+        await seed(db)
+        seen = []
+        original = server.apply_shard_fold
+
+        async def observe(shard, fold):
+            # Between the claim and the parent update, and again right after it
+            seen.append(await totals(db))
+            await original(shard, fold)
+            collection = await db.collections.find_one({"id": "col_1"}, {"_id": 0, "id": 1, "current_amount": 1,
+                                                                         "donor_count": 1, "counter_shards": 1})
+            seen.append((await server.apply_counter_shards([collection]))[0])
+
+        monkeypatch.setattr(server, "apply_shard_fold", observe)
+        await server.fold_counter_shards()
+        return seen
+
+    seen = asyncio.run(scenario())
+    assert [(c["current_amount"], c["donor_count"]) for c in seen] == [(175.0, 4)] * 4
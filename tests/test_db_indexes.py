@@ -0,0 +1,35 @@
+import asyncio
+
+import db_indexes
+
+
+def test_backfill_walks_collections_once_in_batches(db):
+    async def scenario():
+        await db.collections.insert_many([{"id": f"c{i}", "title": f"Café  Fund {i}!"} for i in range(5)])
+        await db.collections.insert_one({"id": "done", "title": "Other", "title_normalized": "kept"})
+        updated = await db_indexes.backfill_title_normalized(db, batch_size=2)
+        docs = await db.collections.find({}, {"_id": 0, "id": 1, "title_normalized": 1}).to_list(None)
+        return updated, {d["id"]: d["title_normalized"] for d in docs}
+
+    updated, titles = asyncio.run(scenario())
+    assert updated == 5
+    assert titles["c3"] == "cafe fund 3" and titles["done"] == "kept"
+
+
+def test_backfill_runs_with_its_migration_only(db, monkeypatch):
+    runs = []
+
+    async def backfill(db):
+        runs.append(True)
+        return 0
+
+    monkeypatch.setattr(db_indexes, "INDEX_MIGRATIONS", {9: {}, 10: {}})
+    monkeypatch.setattr(db_indexes, "INDEX_BACKFILLS", {10: backfill})
+
+    async def scenario():
+        await db_indexes.apply_index_migrations(db, 10)
+        await db_indexes.apply_index_migrations(db, 10)
+        return await db_indexes.get_applied_index_version(db)
+
+    assert asyncio.run(scenario()) == 10
+    assert runs == [True]
@@ -0,0 +1,110 @@
+import asyncio
+
+import server
+
+
+def pending_donation(order_id="order_1", amount=100.0):
+    return {
+        "id": f"don_{order_id}",
+        "collection_id": "col_1",
+        "order_id": order_id,
+        "razorpay_order_id": f"rzp_{order_id}",
+        "amount": amount,
+        "status": server.PaymentStatus.PENDING.value,
+        "created_at": "2026-01-01T00:00:00+00:00",
+        "updated_at": "2026-01-01T00:00:00+00:00"
+    }
+
+
+async def seed_collection(db):
+    await db.collections.insert_one({"id": "col_1", "current_amount": 0.0, "donor_count": 0})
+
+
+async def collection_totals(db):
+    collection = await db.collections.find_one({"id": "col_1"})
+    return collection["current_amount"], collection["donor_count"]
+
+
+def test_capture_credits_a_donation_once(db):
+    async def scenario():
+        await seed_collection(db)
+        await db.donations.insert_one(pending_donation())
+        capture = server.DonationCaptureService("off")
+        first = await capture.capture("webhook", {"order_id": "order_1"}, {"razorpay_payment_id": "pay_1"})
+        second = await capture.capture("verify", {"order_id": "order_1"}, {"razorpay_payment_id": "pay_1"})
+        return first, second, await collection_totals(db)
+
+    first, second, totals = asyncio.run(scenario())
+    assert first["status"] == server.PaymentStatus.SUCCESS.value
+    assert first["razorpay_payment_id"] == "pay_1"
+    assert second is None
+    assert totals == (100.0, 1)
+
+
+def test_capture_skips_a_failed_donation(db):
+    async def scenario():
+        await seed_collection(db)
+        await db.donations.insert_one(pending_donation())
+        capture = server.DonationCaptureService("off")
+        failed = await capture.fail("sweeper", {"order_id": "order_1"})
+        captured = await capture.capture("webhook", {"order_id": "order_1"})
+        return failed, captured, await collection_totals(db)
+
+    failed, captured, totals = asyncio.run(scenario())
+    assert failed["status"] == server.PaymentStatus.FAILED.value
+    assert captured is None
+    assert totals == (0.0, 0)
+
+
+def test_smart_collect_redelivery_is_credited_once_without_unique_index(db):
+    async def scenario():
+        await seed_collection(db)
+        capture = server.DonationCaptureService("off")
+        doc = {**pending_donation("sc_abc"), "status": server.PaymentStatus.SUCCESS.value}
+        first = await capture.record("smart_collect", dict(doc))
+        second = await capture.record("smart_collect", dict(doc))
+        return first, second, await db.donations.count_documents({"order_id": "sc_abc"}), await collection_totals(db)
+
+    first, second, stored, totals = asyncio.run(scenario())
+    assert first is not None and second is None
+    assert stored == 1
+    assert totals == (100.0, 1)
+
+
+def test_interrupted_smart_collect_credit_is_finished_by_redelivery(db):
+    async def scenario():
+        await seed_collection(db)
+        capture = server.DonationCaptureService("off")
+        doc = {**pending_donation("sc_abc"), "status": server.PaymentStatus.SUCCESS.value}
+        # The first delivery stored the donation, then the process died before crediting
+        await db.donations.insert_one({**doc, "credited": False})
+        retried = await capture.record("smart_collect", dict(doc))
+        again = await capture.record("smart_collect", dict(doc))
+        stored = await db.donations.find_one({"order_id": "sc_abc"})
+        return retried, again, stored["credited"], await collection_totals(db)
+
+    retried, again, credited, totals = asyncio.run(scenario())
+    assert retried["order_id"] == "sc_abc" and again is None
+    assert credited is True
+    assert totals == (100.0, 1)
+
+
+def test_sweep_marks_a_credited_donation_without_crediting_it_again(db):
+    async def scenario():
+        await seed_collection(db)
+        capture = server.DonationCaptureService("off")
+        pending = {**pending_donation("sc_abc"), "status": server.PaymentStatus.SUCCESS.value, "credited": False}
+        credited = {**pending_donation("sc_def"), "status": server.PaymentStatus.SUCCESS.value, "credited": False}
+        await db.donations.insert_many([pending, credited])
+        # sc_def reached the collection before the process died; sc_abc did not
+        await db.collections.update_one(
+            {"id": "col_1"}, {"$inc": {"current_amount": 100.0, "donor_count": 1}, "$set": {"credited_donations": ["sc_def"]}}
+        )
+        finished = await capture.finish_pending_credits("sweeper", 10)
+        flags = [d["credited"] for d in await db.donations.find({}).to_list(None)]
+        return finished, flags, await collection_totals(db)
+
+    finished, flags, totals = asyncio.run(scenario())
+    assert finished == 2
+    assert flags == [True, True]
+    assert totals == (200.0, 2)
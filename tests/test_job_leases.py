@@ -0,0 +1,56 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import server
+
+
+def as_owner(monkeypatch, owner):
+    monkeypatch.setattr(server, "job_lease_owner", lambda: owner)
+
+
+def test_lease_is_exclusive_until_it_expires(db, monkeypatch):
+    async def scenario():
+        as_owner(monkeypatch, "host:1")
+        first = await server.acquire_job_lease("job", 60)
+        as_owner(monkeypatch, "host:2")
+        second = await server.acquire_job_lease("job", 60)
+        await db.settings.update_one({"_id": "job_lease:job"}, {"$set": {"expires_at": "2000-01-01T00:00:00+00:00"}})
+        takeover = await server.acquire_job_lease("job", 60)
+        return first, second, takeover, await db.settings.find_one({"_id": "job_lease:job"})
+
+    first, second, takeover, lease = asyncio.run(scenario())
+    assert (first, second, takeover) == (True, False, True)
+    assert lease["owner"] == "host:2" and lease["key"] == "job_lease:job"
+
+
+def test_job_runs_once_per_interval_across_workers(db, monkeypatch):
+    runs = []
+
+    async def job():
+        runs.append(server.job_lease_owner())
+
+    async def scenario():
+        as_owner(monkeypatch, "host:1")
+        ran = await server.run_job_once("job", 300, job)
+        lease = await db.settings.find_one({"_id": "job_lease:job"})
+        # Another worker starting up right after the first run finished
+        as_owner(monkeypatch, "host:2")
+        again = await server.run_job_once("job", 300, job)
+        return ran, again, lease
+
+    ran, again, lease = asyncio.run(scenario())
+    assert (ran, again) == (True, False)
+    assert runs == ["host:1"]
+    # Released to the end of the interval, not the renewal TTL
+    expires = datetime.fromisoformat(lease["expires_at"])
+    assert expires > datetime.now(timezone.utc) + timedelta(seconds=250)
+
+
+def test_expired_legacy_lease_is_replaced(db, monkeypatch):
+    async def scenario():
+        await db.settings.insert_one({"key": "job_lease:job", "owner": "old", "expires_at": "2000-01-01T00:00:00+00:00"})
+        await db.settings.create_index("key", unique=True)
+        as_owner(monkeypatch, "host:1")
+        return await server.acquire_job_lease("job", 60), await server.acquire_job_lease("job", 60)
+
+    assert asyncio.run(scenario()) == (False, True)
@@ -0,0 +1,57 @@
+import asyncio
+
+import pytest
+
+import server
+
+
+@pytest.fixture
+def gateway(monkeypatch, db):
+    """Razorpay order lookups answered from a dict of order id -> status"""
+    statuses = {}
+
+    async def fetch_order(razorpay_order_id):
+        return {"id": razorpay_order_id, "status": statuses[razorpay_order_id]}, None
+
+    monkeypatch.setattr(server, "fetch_razorpay_order", fetch_order)
+    monkeypatch.setattr(server, "donation_capture", server.DonationCaptureService("off"))
+    return statuses
+
+
+def donation(status):
+    return {
+        "id": "don_1", "collection_id": "col_1", "order_id": "order_1", "razorpay_order_id": "rzp_1",
+        "amount": 100.0, "status": status, "created_at": "2026-01-01T00:00:00+00:00"
+    }
+
+
+def test_paid_order_is_captured_and_reported(db, gateway):
+    gateway["rzp_1"] = "paid"
+
+    async def scenario():
+        await db.collections.insert_one({"id": "col_1", "current_amount": 0.0, "donor_count": 0})
+        await db.donations.insert_one(donation(server.PaymentStatus.PENDING.value))
+        return await server.sync_payment_status(donation(server.PaymentStatus.PENDING.value))
+
+    assert asyncio.run(scenario())["status"] == server.PaymentStatus.SUCCESS.value
+
+
+def test_reports_stored_status_when_another_path_settled_first(db, gateway):
+    gateway["rzp_1"] = "paid"
+
+    async def scenario():
+        # The sweeper failed the donation after the caller read it as pending
+        await db.donations.insert_one(donation(server.PaymentStatus.FAILED.value))
+        return await server.sync_payment_status(donation(server.PaymentStatus.PENDING.value))
+
+    result = asyncio.run(scenario())
+    assert result["status"] == server.PaymentStatus.FAILED.value
+    assert result["razorpay_status"] == "paid"
+
+
+def test_checkout_signature_mismatch_is_not_an_error(monkeypatch):
+    monkeypatch.setattr(server, "RAZORPAY_KEY_SECRET", "key_secret")
+    valid = server.hmac.new(b"key_secret", b"order_1|pay_1", server.hashlib.sha256).hexdigest()
+    assert server.verify_razorpay_signature("order_1", "pay_1", valid)
+    assert not server.verify_razorpay_signature("order_1", "pay_1", "ü" * 64)
+    assert not server.verify_razorpay_signature("order_1", "pay_1", "\ud800")
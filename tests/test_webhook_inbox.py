@@ -0,0 +1,138 @@
+import asyncio
+import json
+from datetime import datetime
+
+import db_indexes
+import server
+
+
+def make_inbox(processor, max_attempts=3):
+    return server.WebhookInbox({"payment": processor}, workers=1, max_attempts=max_attempts, lock_timeout=300, poll_interval=0.01)
+
+
+def test_redelivered_event_is_stored_once(db):
+    async def scenario():
+        await db.webhook_events.create_index("event_id", unique=True)
+        inbox = make_inbox(None)
+        first = await inbox.accept("payment", "evt_1", b"{}")
+        second = await inbox.accept("payment", "evt_1", b"{}")
+        return first, second, await db.webhook_events.count_documents({})
+
+    assert asyncio.run(scenario()) == (True, False, 1)
+
+
+def test_failed_processor_is_retried_then_dead_lettered(db):
+    async def failing(payload):
+        raise RuntimeError("boom")
+
+    async def scenario():
+        inbox = make_inbox(failing, max_attempts=2)
+        await inbox.accept("payment", "evt_1", b"{}")
+        event = await db.webhook_events.find_one({"event_id": "payment:evt_1"}, {"_id": 0})
+        await inbox._process({**event, "attempts": 1})
+        retried = await db.webhook_events.find_one({"event_id": "payment:evt_1"})
+        await inbox._process({**event, "attempts": 2})
+        dead = await db.webhook_events.find_one({"event_id": "payment:evt_1"})
+        return retried, dead
+
+    retried, dead = asyncio.run(scenario())
+    assert retried["status"] == "pending" and retried["last_error"] == "boom"
+    assert dead["status"] == "dead"
+
+
+def test_processed_event_gets_a_ttl_date(db):
+    async def processor(payload):
+        return {"status": "ok"}
+
+    async def scenario():
+        inbox = make_inbox(processor)
+        await inbox.accept("payment", "evt_1", b"{}")
+        event = await db.webhook_events.find_one({"event_id": "payment:evt_1"}, {"_id": 0})
+        await inbox._process(event)
+        return await db.webhook_events.find_one({"event_id": "payment:evt_1"})
+
+    done = asyncio.run(scenario())
+    ttl = next(i for i in db_indexes.INDEX_MIGRATIONS[12]["webhook_events"] if i.document["name"] == "done_processed_ttl")
+    assert done["status"] == "done" and isinstance(done["processed_at"], datetime)
+    assert ttl.document["partialFilterExpression"] == {"status": "done"}
+    assert list(ttl.document["key"]) == ["processed_at"] and ttl.document["expireAfterSeconds"] > 0
+
+
+def test_worker_survives_a_failure_while_recording_an_outcome(db, monkeypatch):
+    processed = []
+
+    async def processor(payload):
+        processed.append(payload["n"])
+        raise RuntimeError("processor failed")
+
+    async def scenario():
+        inbox = make_inbox(processor)
+        events = [
+            {"event_id": f"payment:evt_{n}", "source": "payment", "body": json.dumps({"n": n}), "attempts": 1}
+            for n in (1, 2)
+        ]
+
+        async def claim():
+            return events.pop(0) if events else None
+
+        monkeypatch.setattr(inbox, "_claim", claim)
+
+        class FlakyEvents:
+            """webhook_events whose first update fails, as on a dropped connection"""
+            calls = 0
+
+            async def update_one(self, *args, **kwargs):
+                FlakyEvents.calls += 1
+                if FlakyEvents.calls == 1:
+                    raise ConnectionError("mongo hiccup")
+                return await db.webhook_events.update_one(*args, **kwargs)
+
+        class FlakyDB:
+            webhook_events = FlakyEvents()
+
+        monkeypatch.setattr(server, "db", FlakyDB())
+        inbox.start()
+        for _ in range(100):
+            if len(processed) == 2:
+                break
+            await asyncio.sleep(0.01)
+        alive = not inbox._tasks[0].done()
+        await inbox.stop()
+        return alive
+
+    assert asyncio.run(scenario())
+    assert processed == [1, 2]
+
+
+class FakeRequest:
+    def __init__(self, body, headers):
+        self.body_bytes = body
+        self.headers = headers
+
+    async def body(self):
+        return self.body_bytes
+
+
+def deliver(body, signature):
+    headers = {"x-razorpay-event-id": "evt_1"}
+    if signature is not None:
+        headers["x-razorpay-signature"] = signature
+    try:
+        return asyncio.run(server.accept_webhook(FakeRequest(body, headers), "payment"))
+    except server.HTTPException as e:
+        return e.status_code
+
+
+def test_webhooks_are_refused_without_a_secret(db, monkeypatch):
+    monkeypatch.setattr(server, "RAZORPAY_WEBHOOK_SECRET", "")
+    assert deliver(b'{"event": "payment.captured"}', None) == 503
+
+
+def test_webhook_signature_checks(db, monkeypatch):
+    monkeypatch.setattr(server, "RAZORPAY_WEBHOOK_SECRET", "whsec")
+    body = b'{"event": "payment.captured"}'
+    valid = server.hmac.new(b"whsec", body, server.hashlib.sha256).hexdigest()
+    assert deliver(body, None) == 401
+    assert deliver(body, "é" * 64) == 401
+    assert deliver(body, valid[:-1] + "0" if valid[-1] != "0" else valid[:-1] + "1") == 401
+    assert deliver(body, valid) == {"status": "accepted"}
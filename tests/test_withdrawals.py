@@ -0,0 +1,320 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+import server
+
+PENDING = server.WithdrawalStatus.PENDING.value
+PROCESSING = server.WithdrawalStatus.PROCESSING.value
+FAILED = server.WithdrawalStatus.FAILED.value
+WITHDRAWAL_ID = "5f0c1d2e-3a4b-4c5d-8e9f-0a1b2c3d4e5f"
+
+
+@pytest.fixture
+def razorpayx(monkeypatch, db):
+    """Fake RazorpayX: records payout requests and answers reference_id lookups"""
+    state = {"requests": [], "outcome": ("pout_1", None, False), "existing": None}
+
+    async def create_payout(**kwargs):
+        state["requests"].append(kwargs)
+        return state["outcome"]
+
+    async def find_by_reference(withdrawal_id):
+        return state["existing"], None
+
+    monkeypatch.setattr(server, "process_razorpayx_payout", create_payout)
+    monkeypatch.setattr(server, "find_razorpayx_payout_by_reference", find_by_reference)
+    return state
+
+
+async def seed(db, **fields):
+    server.start_payout_dispatch()
+    await db.kyc.insert_one({"user_id": "user_1"})
+    await db.collections.insert_one({"id": "col_1", "withdrawn_amount": 500.0})
+    await db.settings.insert_one({"key": server.COUNTERS_KEY, "withdrawals": {PENDING: 1}})
+    await db.withdrawals.insert_one({
+        "id": WITHDRAWAL_ID, "user_id": "user_1", "collection_id": "col_1", "amount": 500.0,
+        "net_amount": 490.0, "platform_fee": 10.0, "payout_mode": "upi", "status": PENDING, **fields
+    })
+
+
+async def withdrawal(db):
+    return await db.withdrawals.find_one({"id": WITHDRAWAL_ID}, {"_id": 0})
+
+
+async def counters(db):
+    return (await db.settings.find_one({"key": server.COUNTERS_KEY}))["withdrawals"]
+
+
+def expire_claims():
+    return (datetime.now(timezone.utc) - timedelta(seconds=server.WITHDRAWAL_CLAIM_TIMEOUT + 60)).isoformat()
+
+
+def test_idempotency_key_is_stable_per_attempt():
+    key = server.payout_idempotency_key(WITHDRAWAL_ID, 1)
+    assert key == server.payout_idempotency_key(WITHDRAWAL_ID, 1)
+    assert key != server.payout_idempotency_key(WITHDRAWAL_ID, 2)
+    assert len(key) <= 36
+
+
+def test_in_flight_payout_cannot_be_claimed_again(db, razorpayx):
+    async def scenario():
+        await seed(db)
+        claimed = await server.claim_withdrawals([WITHDRAWAL_ID], "job_a")
+        # RazorpayX timed out: the payout may exist
+        razorpayx["outcome"] = (None, "timeout", True)
+        _, error = await server.approve_withdrawal(claimed[0], "admin")
+        await db.withdrawals.update_one({"id": WITHDRAWAL_ID}, {"$set": {"payout_attempt.started_at": expire_claims()}})
+        again = await server.claim_withdrawals([WITHDRAWAL_ID], "job_b")
+        return error, again, await withdrawal(db)
+
+    error, again, stored = asyncio.run(scenario())
+    assert error.startswith("Payout outcome unknown")
+    assert again == []
+    assert stored["status"] == PROCESSING and stored["payout_attempt"]["key"]
+    assert len(razorpayx["requests"]) == 1
+
+
+def test_stale_claim_adopts_existing_payout_instead_of_paying_again(db, razorpayx):
+    async def scenario():
+        await seed(db, claim_id="job_a", claimed_at=expire_claims())
+        razorpayx["existing"] = {"id": "pout_from_job_a", "status": "processing"}
+        claimed = await server.claim_withdrawals([WITHDRAWAL_ID], "job_b")
+        update_data, error = await server.approve_withdrawal(claimed[0], "admin")
+        return claimed, update_data, error, await withdrawal(db)
+
+    claimed, update_data, error, stored = asyncio.run(scenario())
+    assert claimed[0]["reclaimed"] is True
+    assert error is None and update_data["razorpay_payout_id"] == "pout_from_job_a"
+    assert stored["status"] == PROCESSING and stored["razorpay_payout_id"] == "pout_from_job_a"
+    assert razorpayx["requests"] == []
+
+
+def test_lost_claim_neither_updates_nor_counts(db, razorpayx):
+    async def scenario():
+        await seed(db)
+        claimed = await server.claim_withdrawals([WITHDRAWAL_ID], "job_a")
+        await db.withdrawals.update_one({"id": WITHDRAWAL_ID}, {"$set": {"claim_id": "job_b"}})
+        approve = await server.approve_withdrawal(claimed[0], "admin")
+        reject = await server.reject_withdrawal(claimed[0], "admin", None)
+        collection = await db.collections.find_one({"id": "col_1"})
+        return approve, reject, await withdrawal(db), collection, await counters(db)
+
+    approve, reject, stored, collection, counts = asyncio.run(scenario())
+    assert approve[0] == {} and reject[0] == {}
+    assert stored["status"] == PENDING and stored["claim_id"] == "job_b"
+    assert collection["withdrawn_amount"] == 500.0
+    assert counts == {PENDING: 1}
+    assert razorpayx["requests"] == []
+
+
+def test_successful_payout_uses_the_attempt_key(db, razorpayx):
+    async def scenario():
+        await seed(db)
+        claimed = await server.claim_withdrawals([WITHDRAWAL_ID], "job_a")
+        result = await server.approve_withdrawal(claimed[0], "admin")
+        return result, await withdrawal(db), await counters(db)
+
+    (update_data, error), stored, counts = asyncio.run(scenario())
+    assert error is None
+    assert razorpayx["requests"][0]["idempotency_key"] == server.payout_idempotency_key(WITHDRAWAL_ID, 1)
+    assert stored["status"] == PROCESSING and stored["razorpay_payout_id"] == "pout_1"
+    assert "payout_attempt" not in stored and "claim_id" not in stored
+    assert counts == {PENDING: 0, PROCESSING: 1}
+
+
+def test_rejected_payout_request_returns_to_pending(db, razorpayx):
+    async def scenario():
+        await seed(db)
+        razorpayx["outcome"] = (None, "Insufficient balance", False)
+        claimed = await server.claim_withdrawals([WITHDRAWAL_ID], "job_a")
+        result = await server.approve_withdrawal(claimed[0], "admin")
+        return result, await withdrawal(db), await counters(db)
+
+    (update_data, error), stored, counts = asyncio.run(scenario())
+    assert error == "Payout failed: Insufficient balance"
+    assert stored["status"] == PENDING and stored["payout_attempts"] == 1
+    assert counts == {PENDING: 1, PROCESSING: 0}
+
+
+@pytest.mark.parametrize("existing, expected_status", [({"id": "pout_1", "status": "processing"}, PROCESSING), (None, PENDING)])
+def test_recover_payout_attempts(db, razorpayx, existing, expected_status):
+    async def scenario():
+        await seed(db, status=PROCESSING, payout_attempts=1, payout_attempt={"key": "k1", "started_at": expire_claims()})
+        razorpayx["existing"] = existing
+        totals = await server.recover_payout_attempts()
+        return totals, await withdrawal(db)
+
+    totals, stored = asyncio.run(scenario())
+    assert stored["status"] == expected_status
+    assert "payout_attempt" not in stored
+    assert stored.get("razorpay_payout_id") == (existing or {}).get("id")
+    assert totals == {"adopted": 1 if existing else 0, "reset": 0 if existing else 1}
+
+
+def payout_event(event, status, payout_id="pout_1", created_at=None):
+    entity = {"id": payout_id, "status": status, "reference_id": WITHDRAWAL_ID, "failure_reason": f"Payout {status}"}
+    if created_at:
+        entity["created_at"] = created_at
+    return {"event": event, "payload": {"payout": {"entity": entity}}}
+
+
+async def withdrawn_amount(db):
+    return (await db.collections.find_one({"id": "col_1"}))["withdrawn_amount"]
+
+
+def test_webhook_and_reconciler_settle_a_failed_payout_once(db):
+    async def scenario():
+        await seed(db, status=PROCESSING, razorpay_payout_id="pout_1")
+        await db.settings.update_one({"key": server.COUNTERS_KEY}, {"$set": {"withdrawals": {PROCESSING: 1}}})
+        await server.process_payout_event(payout_event("payout.failed", "failed"))
+        # Redelivered webhook and a reconciler run that saw the same failed payout
+        await server.process_payout_event(payout_event("payout.failed", "failed"))
+        totals = await server.apply_payout_updates([{"id": "pout_1", "status": "failed"}], "run_1")
+        return totals, await withdrawal(db), await withdrawn_amount(db), await counters(db)
+
+    totals, stored, amount, counts = asyncio.run(scenario())
+    assert stored["status"] == FAILED and "refund_pending" not in stored
+    assert amount == 0.0
+    assert counts == {PROCESSING: 0, FAILED: 1}
+    assert totals == {"completed": 0, "failed": 0}
+
+
+def test_reversed_payout_refunds_once(db):
+    async def scenario():
+        await seed(db, status=PROCESSING, razorpay_payout_id="pout_1")
+        await server.process_payout_event(payout_event("payout.processed", "processed"))
+        completed = await withdrawal(db)
+        await server.process_payout_event(payout_event("payout.reversed", "reversed"))
+        await server.process_payout_event(payout_event("payout.reversed", "reversed"))
+        return completed, await withdrawal(db), await withdrawn_amount(db)
+
+    completed, stored, amount = asyncio.run(scenario())
+    assert completed["status"] == server.WithdrawalStatus.COMPLETED.value
+    assert stored["status"] == FAILED
+    assert amount == 0.0
+
+
+def test_interrupted_refund_is_finished_once(db):
+    async def scenario():
+        # Failed, but the process died before the collection was refunded
+        await seed(db, status=FAILED, razorpay_payout_id="pout_1", refund_pending=True)
+        await server.process_payout_event(payout_event("payout.failed", "failed"))
+        after_retry = await withdrawn_amount(db)
+        await db.withdrawals.update_one({"id": WITHDRAWAL_ID}, {"$set": {"refund_pending": True}})
+        finished = await server.finish_pending_refunds()
+        return after_retry, finished, await withdrawal(db), await withdrawn_amount(db)
+
+    after_retry, finished, stored, amount = asyncio.run(scenario())
+    assert after_retry == 0.0
+    # A second pass over an already refunded withdrawal only clears its flag
+    assert finished == 1 and amount == 0.0
+    assert "refund_pending" not in stored
+
+
+def test_late_webhook_for_an_old_payout_leaves_a_newer_attempt_alone(db):
+    async def scenario():
+        started = datetime.now(timezone.utc)
+        await seed(db, status=PROCESSING, payout_attempts=2,
+                   payout_attempt={"key": "k2", "started_at": started.isoformat()})
+        old_payout = int((started - timedelta(hours=1)).timestamp())
+        await server.process_payout_event(payout_event("payout.failed", "failed", "pout_old", old_payout))
+        unchanged = await withdrawal(db)
+        await server.process_payout_event(payout_event("payout.processed", "processed", "pout_new", int(started.timestamp())))
+        return unchanged, await withdrawal(db), await withdrawn_amount(db)
+
+    unchanged, stored, amount = asyncio.run(scenario())
+    assert unchanged["status"] == PROCESSING and unchanged["payout_attempt"]["key"] == "k2"
+    assert stored["status"] == server.WithdrawalStatus.COMPLETED.value
+    assert stored["razorpay_payout_id"] == "pout_new" and "payout_attempt" not in stored
+    assert amount == 500.0
+
+
+def test_withdrawal_waiting_for_a_payout_slot_stays_pending(db, razorpayx, monkeypatch):
+    async def scenario():
+        await seed(db)
+        claimed = await server.claim_withdrawals([WITHDRAWAL_ID], "job_a")
+        monkeypatch.setattr(server, "payout_slots", asyncio.Semaphore(0))
+        task = asyncio.create_task(server.approve_withdrawal(claimed[0], "admin"))
+        await asyncio.sleep(0.01)
+        queued = await withdrawal(db)
+        # However long the wait, recovery has no attempt to reset
+        monkeypatch.setattr(server, "WITHDRAWAL_CLAIM_TIMEOUT", -60)
+        recovered = await server.recover_payout_attempts()
+        server.payout_slots.release()
+        update_data, error = await task
+        return queued, recovered, error, await withdrawal(db)
+
+    queued, recovered, error, stored = asyncio.run(scenario())
+    assert queued["status"] == PENDING and "payout_attempt" not in queued
+    assert recovered == {"adopted": 0, "reset": 0}
+    assert error is None and stored["status"] == PROCESSING and stored["razorpay_payout_id"] == "pout_1"
+
+
+def test_bulk_job_uses_a_bounded_worker_pool(db, monkeypatch):
+    active = {"now": 0, "peak": 0, "done": 0}
+
+    async def approve(withdrawal, admin_id):
+        active["now"] += 1
+        active["peak"] = max(active["peak"], active["now"])
+        await asyncio.sleep(0)
+        active["now"] -= 1
+        active["done"] += 1
+        return {"status": PROCESSING}, None
+
+    monkeypatch.setattr(server, "approve_withdrawal", approve)
+    withdrawals = [{"id": f"w{i}"} for i in range(50)]
+    asyncio.run(server.run_bulk_withdrawal_job("job_1", withdrawals, "approve", "admin", None))
+    assert active["done"] == 50
+    assert active["peak"] <= server.PAYOUT_CONCURRENCY
+
+
+def test_reconciler_settles_a_page_in_bulk_and_only_once(db):
+    async def scenario():
+        await db.collections.insert_one({"id": "col_1", "withdrawn_amount": 1500.0})
+        await db.settings.insert_one({"key": server.COUNTERS_KEY, "withdrawals": {PROCESSING: 2, FAILED: 1}})
+        base = {"user_id": "user_1", "collection_id": "col_1", "amount": 500.0, "net_amount": 490.0, "platform_fee": 10.0}
+        await db.withdrawals.insert_many([
+            {**base, "id": "w_failed", "status": PROCESSING, "razorpay_payout_id": "pout_a"},
+            {**base, "id": "w_done", "status": PROCESSING, "razorpay_payout_id": "pout_b"},
+            # Already settled by the webhook: neither counted nor refunded again
+            {**base, "id": "w_settled", "status": FAILED, "razorpay_payout_id": "pout_c"},
+        ])
+        page = [
+            {"id": "pout_a", "status": "failed"},
+            {"id": "pout_b", "status": "processed", "utr": "UTR1"},
+            {"id": "pout_c", "status": "failed"},
+            {"id": "pout_unknown", "status": "processed"},
+        ]
+        first = await server.apply_payout_updates(page, "run_1")
+        second = await server.apply_payout_updates(page, "run_2")
+        statuses = {w["id"]: w["status"] for w in await db.withdrawals.find({}, {"_id": 0}).to_list(None)}
+        return first, second, statuses, await withdrawn_amount(db), await counters(db)
+
+    first, second, statuses, amount, counts = asyncio.run(scenario())
+    assert first == {"completed": 1, "failed": 1}
+    assert second == {"completed": 0, "failed": 0}
+    assert statuses == {"w_failed": FAILED, "w_done": server.WithdrawalStatus.COMPLETED.value, "w_settled": FAILED}
+    assert amount == 1000.0
+    assert counts == {PROCESSING: 0, FAILED: 2, server.WithdrawalStatus.COMPLETED.value: 1}
+
+
+def test_payout_listing_walks_the_window_oldest_slice_first(monkeypatch):
+    calls = []
+
+    async def get(path, params):
+        calls.append((params["from"], params["to"], params["skip"]))
+        full = params["from"] == 0 and params["skip"] == 0
+        return 200, {"items": [{}] * (server.PAYOUT_LIST_PAGE_SIZE if full else 1)}
+
+    monkeypatch.setattr(server.razorpay_http, "get", get)
+    monkeypatch.setattr(server, "PAYOUT_RECONCILE_SLICE", 100)
+    monkeypatch.setattr(server, "PAYOUT_RECONCILE_MAX_PAGES", 4)
+
+    async def scenario():
+        return [len(page) async for page in server.list_razorpayx_payouts(0, 1000)]
+
+    pages = asyncio.run(scenario())
+    assert calls == [(0, 99, 0), (0, 99, 100), (100, 199, 0), (200, 299, 0)]
+    assert pages == [100, 1, 1, 1]